@@ -4,7 +4,7 @@ from tkinter import (
     Tk, Frame, Button, Label, Listbox, SINGLE, END,
     filedialog, messagebox, simpledialog
 )
-from PyPDF2 import PdfReader, PdfWriter
+from pdf_dc import core
 
 class PDFToolGUI:
     def __init__(self, root):
@@ -102,22 +102,13 @@ class PDFToolGUI:
         self.pdf_paths[from_index], self.pdf_paths[to_index] = self.pdf_paths[to_index], self.pdf_paths[from_index]
         self.drag_data = {"widget": None, "index": None}
 
+    def ask_password(self, path, retry):
+        if retry:
+            messagebox.showerror("パスワードエラー", f"パスワードが正しくありません: {os.path.basename(path)}")
+        return simpledialog.askstring("パスワード要求", f"{os.path.basename(path)} のパスワードを入力：", show="*")
+
     def get_pdf_reader(self, path):
-        reader = PdfReader(path)
-        if reader.is_encrypted:
-            cached = self.password_cache.get(path)
-            if cached and reader.decrypt(cached):
-                return reader
-            while True:
-                pwd = simpledialog.askstring("パスワード要求", f"{os.path.basename(path)} のパスワードを入力：", show="*")
-                if not pwd:
-                    raise Exception(f"{os.path.basename(path)} の読み込みを中止しました")
-                if reader.decrypt(pwd):
-                    self.password_cache[path] = pwd
-                    return reader
-                else:
-                    messagebox.showerror("パスワードエラー", f"パスワードが正しくありません: {os.path.basename(path)}")
-        return reader
+        return core.open_reader(path, password_cache=self.password_cache, ask_password=self.ask_password)
 
     def merge_pdfs(self):
         if not self.pdf_paths:
@@ -128,13 +119,7 @@ class PDFToolGUI:
         if not save_path: return
 
         try:
-            writer = PdfWriter()
-            for path in self.pdf_paths:
-                reader = self.get_pdf_reader(path)
-                for page in reader.pages:
-                    writer.add_page(page)
-            with open(save_path, "wb") as f:
-                writer.write(f)
+            core.merge(self.pdf_paths, save_path, password_cache=self.password_cache, ask_password=self.ask_password)
             messagebox.showinfo("完了", f"{len(self.pdf_paths)}ファイルを結合しました。")
         except Exception as e:
             messagebox.showerror("エラー", str(e))
@@ -148,22 +133,7 @@ class PDFToolGUI:
         Button(self.split_frame, text="📄 PDF選択（複数可）", font=("Meiryo", 8, "bold"), command=self.split_pdfs).pack(pady=5)
 
     def parse_page_ranges(self, page_range_str, total_pages):
-        pages = set()
-        parts = page_range_str.split(",")
-        for part in parts:
-            part = part.strip()
-            if "-" in part:
-                try:
-                    start, end = map(int, part.split("-"))
-                    pages.update(range(max(1, start), min(total_pages, end)+1))
-                except: continue
-            else:
-                try:
-                    p = int(part)
-                    if 1 <= p <= total_pages:
-                        pages.add(p)
-                except: continue
-        return sorted(p - 1 for p in pages)  # 0-indexed
+        return core.parse_page_ranges(page_range_str, total_pages)
 
     def split_pdfs(self):
         input_files = filedialog.askopenfilenames(filetypes=[("PDF files", "*.pdf")], title="分割したいPDFファイルを選択")
@@ -173,19 +143,9 @@ class PDFToolGUI:
         page_range_str = self.page_range_entry.get().strip()
 
         try:
-            total_split_files = 0
-            for path in input_files:
-                base_name = os.path.splitext(os.path.basename(path))[0]
-                reader = self.get_pdf_reader(path)
-                total_pages = len(reader.pages)
-                pages = self.parse_page_ranges(page_range_str, total_pages) if page_range_str else list(range(total_pages))
-                for i in pages:
-                    writer = PdfWriter()
-                    writer.add_page(reader.pages[i])
-                    out_path = os.path.join(output_dir, f"{base_name}_{i+1}.pdf")
-                    with open(out_path, "wb") as f:
-                        writer.write(f)
-                total_split_files += len(pages)
+            summary = core.split(input_files, output_dir, page_ranges=page_range_str,
+                                 password_cache=self.password_cache, ask_password=self.ask_password)
+            total_split_files = summary["pages"]
             messagebox.showinfo("完了", f"{len(input_files)}ファイル、合計{total_split_files}ページを分割しました。")
         except Exception as e:
             messagebox.showerror("エラー", str(e))
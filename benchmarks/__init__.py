@@ -0,0 +1,3 @@
+"""
+性能計測用スクリプト（リポジトリ直下から python -m benchmarks.xxx で実行）
+"""
@@ -0,0 +1,38 @@
+"""
+OCRページ生成方式（reportlab / fpdf / tesseract）のスループット比較
+
+    python -m benchmarks.bench_backends --pages 20 --lang eng
+
+同じ合成ページ画像に対して各方式でサーチャブルPDFを作り，
+1秒あたりのページ数と出力サイズを表示する（画像化の時間は含まない）
+"""
+import argparse
+import random
+import time
+
+from pdf_dc.ocr import PAGE_BACKENDS, OCR_DPI
+from .corpus import make_scan_image
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--dpi", type=int, default=OCR_DPI)
+    parser.add_argument("--lang", default="eng")
+    parser.add_argument("--backends", nargs="+", default=list(PAGE_BACKENDS), choices=list(PAGE_BACKENDS))
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    images = [make_scan_image(rng, dpi=args.dpi).convert("RGB") for _ in range(args.pages)]
+
+    print(f"{'backend':>10} {'time[s]':>9} {'pages/s':>8} {'output[KB]':>11}")
+    for name in args.backends:
+        make_page = PAGE_BACKENDS[name]
+        start = time.perf_counter()
+        nbytes = sum(len(make_page(image, lang=args.lang, dpi=args.dpi)) for image in images)
+        elapsed = time.perf_counter() - start
+        print(f"{name:>10} {elapsed:>9.2f} {args.pages / elapsed:>8.2f} {nbytes / 1024:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+ocr_pdf のピークRSS計測（旧方式：全ページ一括展開 と ストリーム方式 の比較）
+
+    python -m benchmarks.bench_memory --pages 10 100 1000
+
+計測ごとに子プロセスを起動し，そのプロセス自身の最大RSSを記録する
+（tesseract/pdftoppm の子プロセス分は含まない）
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from .corpus import make_scanned_pdf
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows（psutil を入れなくても計測できるよう，Win32 APIを直接呼ぶ）
+        return _windows_peak_working_set() / (1024 * 1024)
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linuxはキロバイト，macOSはバイト単位
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _windows_peak_working_set():
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    kernel32 = ctypes.WinDLL("kernel32")
+    kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+    # Windows 7以降は kernel32 の K32GetProcessMemoryInfo（psapi.dll の GetProcessMemoryInfo と同じ）
+    get_info = kernel32.K32GetProcessMemoryInfo
+    get_info.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESS_MEMORY_COUNTERS), wintypes.DWORD]
+    get_info.restype = wintypes.BOOL
+    if not get_info(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb):
+        raise ctypes.WinError()
+    return counters.PeakWorkingSetSize
+
+
+def legacy_ocr_pdf(input_pdf, output_pdf, lang):
+    # 変更前の ocr_pdf と同じ処理（全ページの画像をリストで保持）
+    import pytesseract
+    from fpdf import FPDF
+    from pdf2image import convert_from_path
+    images = convert_from_path(input_pdf)
+    pdf = FPDF(unit='pt')
+    for image in images:
+        ocr_result = pytesseract.image_to_string(image, lang=lang)
+        with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as fp:
+            temp_img = fp.name
+            image.save(temp_img)
+        w, h = image.size
+        pdf.add_page(orientation='P' if h >= w else 'L')
+        pdf.image(temp_img, 0, 0, w, h)
+        pdf.set_xy(10, h-80)
+        pdf.set_font("Arial", size=10)
+        pdf.multi_cell(0, 10, ocr_result)
+        os.remove(temp_img)
+    pdf.output(output_pdf)
+
+
+def run_child(mode, input_pdf, lang, chunk_pages, max_memory_mb):
+    output_pdf = input_pdf + f".{mode}.out.pdf"
+    start = time.perf_counter()
+    if mode == "legacy":
+        legacy_ocr_pdf(input_pdf, output_pdf, lang)
+    else:
+        from pdf_dc.streaming import ocr_pdf
+        ocr_pdf(input_pdf, output_pdf, lang=lang, chunk_pages=chunk_pages, max_memory_mb=max_memory_mb)
+    elapsed = time.perf_counter() - start
+    os.remove(output_pdf)
+    print(json.dumps({"seconds": elapsed, "peak_rss_mb": peak_rss_mb()}))
+
+
+def measure(mode, input_pdf, args):
+    cmd = [sys.executable, "-m", "benchmarks.bench_memory", "--child", mode, input_pdf,
+           "--lang", args.lang, "--chunk-pages", str(args.chunk_pages), "--max-memory-mb", str(args.max_memory_mb)]
+    out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--modes", nargs="+", default=["legacy", "streaming"], choices=["legacy", "streaming"])
+    parser.add_argument("--lang", default="eng")
+    parser.add_argument("--chunk-pages", type=int, default=16)
+    parser.add_argument("--max-memory-mb", type=int, default=256)
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PDF"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child[0], args.child[1], args.lang, args.chunk_pages, args.max_memory_mb)
+        return
+
+    print(f"{'pages':>6} {'mode':>10} {'time[s]':>9} {'peak RSS[MB]':>13}")
+    with tempfile.TemporaryDirectory() as work:
+        for pages in args.pages:
+            input_pdf = make_scanned_pdf(os.path.join(work, f"scan_{pages}.pdf"), pages)
+            for mode in args.modes:
+                result = measure(mode, input_pdf, args)
+                print(f"{pages:>6} {mode:>10} {result['seconds']:>9.1f} {result['peak_rss_mb']:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
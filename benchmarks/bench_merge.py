@@ -0,0 +1,71 @@
+"""
+結合のピークRSS計測（PdfWriterに全ページを溜める方式 と ファイルごとに書き出すstream方式 の比較）
+
+    python -m benchmarks.bench_merge --files 20 --pages-per-file 50 500
+
+計測ごとに子プロセスを起動し，そのプロセス自身の最大RSSを記録する
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from .bench_memory import peak_rss_mb
+from .corpus import make_scanned_pdf, make_text_pdf
+
+
+def run_child(mode, output_pdf, inputs):
+    from pdf_dc import core
+    start = time.perf_counter()
+    core.merge(inputs, output_pdf, stream=mode == "stream")
+    elapsed = time.perf_counter() - start
+    size = os.path.getsize(output_pdf)
+    os.remove(output_pdf)
+    print(json.dumps({"seconds": elapsed, "peak_rss_mb": peak_rss_mb(), "output_mb": size / 1e6}))
+
+
+def measure(mode, output_pdf, inputs):
+    cmd = [sys.executable, "-m", "benchmarks.bench_merge", "--child", mode, output_pdf, *inputs]
+    out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--pages-per-file", type=int, nargs="+", default=[50, 500])
+    parser.add_argument("--kind", choices=["text", "scan"], default="scan")
+    parser.add_argument("--modes", nargs="+", default=["memory", "stream"], choices=["memory", "stream"])
+    parser.add_argument("--child", nargs="+", metavar="ARG", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        mode, output_pdf, *inputs = args.child
+        run_child(mode, output_pdf, inputs)
+        return
+
+    make = make_text_pdf if args.kind == "text" else make_scanned_pdf
+    print(f"{'files':>6} {'pages':>7} {'mode':>7} {'time[s]':>8} {'peak RSS[MB]':>13} {'output[MB]':>11}")
+    with tempfile.TemporaryDirectory() as work:
+        for pages in args.pages_per_file:
+            # 同じ内容のファイルを複製して入力にする（生成時間の短縮）
+            first = make(os.path.join(work, f"{args.kind}_{pages}_0.pdf"), pages)
+            inputs = [first]
+            with open(first, "rb") as f:
+                data = f.read()
+            for n in range(1, args.files):
+                path = os.path.join(work, f"{args.kind}_{pages}_{n}.pdf")
+                with open(path, "wb") as f:
+                    f.write(data)
+                inputs.append(path)
+            for mode in args.modes:
+                result = measure(mode, os.path.join(work, f"merged_{mode}.pdf"), inputs)
+                print(f"{args.files:>6} {args.files * pages:>7} {mode:>7} {result['seconds']:>8.1f} "
+                      f"{result['peak_rss_mb']:>13.1f} {result['output_mb']:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+OCR前の処理（解像度の自動調整・傾き補正・余白除去・2値化）ごとの処理時間と文字の正解率の表
+
+    python -m benchmarks.bench_preprocess --pages 5 --native-dpi 150 --skew 1.5 --lang eng
+
+正解テキストのわかる合成スキャン（--native-dpi の画像）を，pdftoppmと同じく目的の解像度へ拡大して認識する
+正解率は difflib による正解テキストとの一致度（空白・改行は除く）
+"""
+import argparse
+import difflib
+import random
+import time
+
+import pytesseract
+from PIL import Image
+
+from pdf_dc.ocr import OCR_DPI
+from pdf_dc.preprocess import MIN_OCR_DPI, PREPROCESS_STEPS, choose_dpi, prepare_for_ocr
+from .corpus import make_text_image
+
+# (名前, 解像度を自動調整するか, 前処理)
+VARIANTS = (
+    ("fixed", False, ()),
+    ("preprocess", False, PREPROCESS_STEPS),
+    ("adaptive", True, ()),
+    ("adaptive+pre", True, PREPROCESS_STEPS),
+)
+
+
+def accuracy(expected, actual):
+    return difflib.SequenceMatcher(None, "".join(expected.split()), "".join(actual.split())).ratio()
+
+
+def render(image, native_dpi, dpi):
+    # pdftoppmでの画像化に相当（埋め込み画像を描画解像度へ拡大・縮小する）
+    if dpi == native_dpi:
+        return image.copy()
+    size = (round(image.width * dpi / native_dpi), round(image.height * dpi / native_dpi))
+    return image.resize(size, Image.BILINEAR)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--native-dpi", type=int, default=150, help="合成スキャンの解像度")
+    parser.add_argument("--dpi", type=int, default=OCR_DPI, help="固定の描画解像度（自動調整の上限）")
+    parser.add_argument("--min-dpi", type=int, default=MIN_OCR_DPI)
+    parser.add_argument("--skew", type=float, default=1.5, help="原稿の傾き（度）")
+    parser.add_argument("--lang", default="eng")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    pages = [make_text_image(rng, dpi=args.native_dpi, skew=args.skew if n % 2 == 0 else -args.skew)
+             for n in range(args.pages)]
+
+    print(f"{'variant':>13} {'dpi':>5} {'Mpx/page':>9} {'time[s]':>8} {'pages/s':>8} {'accuracy':>9}")
+    for name, adaptive, steps in VARIANTS:
+        dpi = choose_dpi(args.native_dpi, args.dpi, args.min_dpi) if adaptive else args.dpi
+        pixels, score = 0, 0.0
+        start = time.perf_counter()
+        for image, text in pages:
+            ocr_image = prepare_for_ocr(render(image, args.native_dpi, dpi), steps, dpi)[0]
+            pixels += ocr_image.width * ocr_image.height
+            score += accuracy(text, pytesseract.image_to_string(ocr_image, lang=args.lang))
+        elapsed = time.perf_counter() - start
+        print(f"{name:>13} {dpi:>5} {pixels / 1e6 / args.pages:>9.1f} {elapsed:>8.2f} "
+              f"{args.pages / elapsed:>8.2f} {score / args.pages * 100:>8.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+埋め込み画像の圧縮方法（original / bilevel / gray-jpeg / color-150）ごとの出力サイズと処理時間の表
+
+    python -m benchmarks.bench_profiles --pages 10 --lang eng --backends reportlab fpdf tesseract
+
+OCRは常に --dpi の画像で行い，埋め込む画像だけを各方式で圧縮する
+実際のスキャンに近づけるため，合成ページに紙の地色とノイズを加える（--noise 0 で無効）
+"""
+import argparse
+import random
+import time
+
+from PIL import Image
+
+from pdf_dc.ocr import PAGE_BACKENDS, IMAGE_PROFILES, OCR_DPI
+from .corpus import make_scan_image
+
+
+def make_noisy_scan(rng, dpi, noise):
+    image = make_scan_image(rng, dpi=dpi).convert("RGB")
+    if noise:
+        grain = Image.effect_noise(image.size, noise).convert("RGB")
+        paper = Image.new("RGB", image.size, (236, 232, 220))
+        image = Image.blend(Image.blend(image, paper, 0.15), grain, 0.1)
+    return image
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--dpi", type=int, default=OCR_DPI)
+    parser.add_argument("--lang", default="eng")
+    parser.add_argument("--noise", type=float, default=10)
+    parser.add_argument("--backends", nargs="+", default=list(PAGE_BACKENDS), choices=list(PAGE_BACKENDS))
+    parser.add_argument("--profiles", nargs="+", default=list(IMAGE_PROFILES), choices=list(IMAGE_PROFILES))
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    images = [make_noisy_scan(rng, args.dpi, args.noise) for _ in range(args.pages)]
+
+    print(f"{'backend':>10} {'profile':>10} {'time[s]':>9} {'pages/s':>8} {'KB/page':>9} {'vs original':>12}")
+    for backend in args.backends:
+        make_page = PAGE_BACKENDS[backend]
+        baseline = None
+        for profile in args.profiles:
+            start = time.perf_counter()
+            nbytes = sum(len(make_page(image, lang=args.lang, dpi=args.dpi, profile=profile)) for image in images)
+            elapsed = time.perf_counter() - start
+            if profile == "original":
+                baseline = nbytes
+            ratio = f"{nbytes / baseline * 100:>11.1f}%" if baseline else f"{'-':>12}"
+            print(f"{backend:>10} {profile:>10} {elapsed:>9.2f} {args.pages / elapsed:>8.2f} "
+                  f"{nbytes / 1024 / args.pages:>9.0f} {ratio}")
+
+
+if __name__ == "__main__":
+    main()
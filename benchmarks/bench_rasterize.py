@@ -0,0 +1,53 @@
+"""
+ページごとのconvert_from_path呼び出しと，DocumentRasterizerによるまとめ描画の比較
+
+    python -m benchmarks.bench_rasterize --pages 50 100 --dpi 300
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from pdf2image import convert_from_path
+
+from pdf_dc.raster import DocumentRasterizer, DEFAULT_BATCH_SIZE
+from .corpus import make_scanned_pdf
+
+
+def render_per_page(pdf_path, pages, dpi):
+    for i in range(pages):
+        image = convert_from_path(pdf_path, first_page=i+1, last_page=i+1, dpi=dpi)[0]
+        image.close()
+
+
+def render_batched(pdf_path, pages, dpi, batch_size, thread_count):
+    rasterizer = DocumentRasterizer(pdf_path, dpi=dpi, batch_size=batch_size, thread_count=thread_count)
+    for _, image in rasterizer.iter_pages(range(pages)):
+        image.close()
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--thread-count", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{'pages':>6} {'per-page[s]':>12} {'batched[s]':>11} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as work:
+        for pages in args.pages:
+            pdf_path = make_scanned_pdf(os.path.join(work, f"scan_{pages}.pdf"), pages)
+            per_page = timed(render_per_page, pdf_path, pages, args.dpi)
+            batched = timed(render_batched, pdf_path, pages, args.dpi, args.batch_size, args.thread_count)
+            print(f"{pages:>6} {per_page:>12.2f} {batched:>11.2f} {per_page / batched:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+文字認識エンジン（tesserocr常駐 / pytesseract起動）ごとの，言語データ読み込みと認識の時間の内訳
+
+    python -m benchmarks.bench_recognizer --pages 20 --lang jpn+eng
+
+読み込み時間は，ほぼ空白の小さな画像の認識にかかる時間として測る
+（pytesseractは毎ページ起動・読み込みが発生するため「1回あたり × ページ数」，tesserocrは最初の1回だけ）
+認識時間は合計から読み込み時間を引いたもの
+"""
+import argparse
+import random
+import time
+
+from PIL import Image
+
+from pdf_dc import recognizer
+from .corpus import make_scan_image
+
+# 読み込み時間の計測に使う回数（pytesseract）
+PROBES = 3
+
+
+def probe_seconds(rec):
+    blank = Image.new("L", (32, 32), 255)
+    start = time.perf_counter()
+    for _ in range(PROBES):
+        rec.image_to_string(blank)
+    return (time.perf_counter() - start) / PROBES
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--lang", default="jpn+eng")
+    parser.add_argument("--recognizers", nargs="+", default=["tesserocr", "pytesseract"],
+                        choices=["tesserocr", "pytesseract"])
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    images = [make_scan_image(rng, dpi=args.dpi) for _ in range(args.pages)]
+
+    print(f"{'recognizer':>12} {'load[s]':>8} {'recognize[s]':>13} {'total[s]':>9} {'pages/s':>8} {'load share':>11}")
+    for kind in args.recognizers:
+        if kind == "tesserocr" and recognizer.tesserocr is None:
+            print(f"{kind:>12}  （未インストールのため省略）")
+            continue
+        recognizer.set_recognizer_kind(kind)
+        start = time.perf_counter()
+        rec = recognizer.get_recognizer(args.lang)
+        probe = probe_seconds(rec)
+        # 常駐型は読み込みが最初の1回だけ，起動型は毎ページ発生する
+        load = time.perf_counter() - start - PROBES * probe if kind == "tesserocr" else probe * args.pages
+        start = time.perf_counter()
+        for image in images:
+            rec.image_to_string(image, dpi=args.dpi)
+        total = time.perf_counter() - start + (load if kind == "tesserocr" else 0)
+        recognize = total - load
+        print(f"{kind:>12} {load:>8.2f} {recognize:>13.2f} {total:>9.2f} {args.pages / total:>8.2f} "
+              f"{load / total * 100:>10.1f}%")
+        recognizer.close_recognizers()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+分割方法ごとの処理時間と出力合計サイズ（1ページずつ逐次・1ページずつ並列・Nページごと）
+
+    python -m benchmarks.bench_split --pages 200 2000 --every 50 --workers 8
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from pdf_dc import core
+from .corpus import make_text_pdf, ensure_dir
+
+
+def run_split(pdf_path, out_dir, **options):
+    start = time.perf_counter()
+    summary = core.split([pdf_path], ensure_dir(out_dir), **options)
+    seconds = time.perf_counter() - start
+    size = sum(os.path.getsize(path) for path in summary["outputs"])
+    return seconds, len(summary["outputs"]), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[200, 2000])
+    parser.add_argument("--every", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    cases = [
+        ("per-page", {}),
+        (f"per-page x{args.workers}", {"workers": args.workers}),
+        (f"every {args.every}", {"every": args.every}),
+        (f"every {args.every} x{args.workers}", {"every": args.every, "workers": args.workers}),
+    ]
+    print(f"{'pages':>6} {'input[MB]':>10} {'mode':<20} {'time[s]':>8} {'files':>6} {'output[MB]':>11}")
+    with tempfile.TemporaryDirectory() as work:
+        for pages in args.pages:
+            pdf_path = make_text_pdf(os.path.join(work, f"text_{pages}.pdf"), pages)
+            input_mb = os.path.getsize(pdf_path) / 1e6
+            for n, (name, options) in enumerate(cases):
+                seconds, files, size = run_split(pdf_path, os.path.join(work, f"out_{pages}_{n}"), **options)
+                print(f"{pages:>6} {input_mb:>10.2f} {name:<20} {seconds:>8.2f} {files:>6} {size / 1e6:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
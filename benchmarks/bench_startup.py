@@ -0,0 +1,142 @@
+"""
+起動時間の計測（プロセスの起動から，GUIの画面が操作できるようになるまで・コマンドラインが引数を解釈し終えるまで）
+
+    python -m benchmarks.bench_startup --repeat 5
+    python -m benchmarks.bench_startup --entries pdf_dc_ocr cli --budget 1.0
+
+入口（GUIのスクリプト・python -m pdf_dc）ごとに子プロセスを起動し，準備ができたと報告が届くまでの時間を測る。
+GUIは mainloop に入る直前に画面を描画し終えた時点，コマンドラインは --help を表示し終えた時点を準備完了とする。
+起動時に読み込まれた重いライブラリ（OCR・画像処理）も表示する（OCRを使うまで読み込まないのが正しい状態）。
+画面を表示できない環境（DISPLAY の無いLinuxなど）ではGUIの計測を省略する。
+PyInstaller --onefile の実行ファイルは，このほかに展開の時間がかかる
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 入口の名前 -> (種類, スクリプトまたはモジュール)
+ENTRIES = {
+    "python": ("python", None),          # 比較用（Pythonそのものの起動時間）
+    "cli": ("cli", "pdf_dc"),
+    "pdf_dc_ocr": ("gui", "pdf_dc_ocr.py"),
+    "ocr_pdf_gui": ("gui", "ocr_pdf_gui.py"),
+    "PDF_DC2": ("gui", "PDF_DC2.py"),
+}
+# 起動時に読み込まれていないか確かめるライブラリ
+HEAVY_MODULES = ("numpy", "PIL", "pytesseract", "tesserocr", "reportlab", "fpdf", "pdf2image", "PyPDF2")
+
+# 子プロセスで実行するコード（計測用のモジュールを読み込まないよう，文字列で渡す）
+_REPORT = f"""
+import json, sys
+def _report(**fields):
+    fields["modules"] = [m for m in {HEAVY_MODULES!r} if m in sys.modules]
+    print("READY " + json.dumps(fields), flush=True)
+"""
+
+_GUI_CHILD = _REPORT + """
+import runpy, tkinter
+def _mainloop(self, n=0):
+    # 画面を描画し終えたら（操作できる状態になったら）報告して閉じる
+    self.update()
+    _report()
+    self.destroy()
+tkinter.Misc.mainloop = _mainloop
+sys.argv = [sys.argv[1]]
+runpy.run_path(sys.argv[0], run_name="__main__")
+"""
+
+_CLI_CHILD = _REPORT + """
+import contextlib, io, runpy
+sys.argv = [sys.argv[1], "--help"]
+try:
+    with contextlib.redirect_stdout(io.StringIO()):
+        runpy.run_module(sys.argv[0], run_name="__main__", alter_sys=True)
+except SystemExit:
+    pass
+_report()
+"""
+
+_PYTHON_CHILD = _REPORT + "_report()\n"
+
+
+def can_open_display():
+    code = "import tkinter; tkinter.Tk().destroy()"
+    return subprocess.run([sys.executable, "-c", code], capture_output=True, cwd=REPO_ROOT).returncode == 0
+
+
+def measure(kind, target):
+    """
+    1回起動し，準備完了までの秒数と読み込まれた重いライブラリを返す
+    """
+    code = {"gui": _GUI_CHILD, "cli": _CLI_CHILD, "python": _PYTHON_CHILD}[kind]
+    cmd = [sys.executable, "-c", code] + ([target] if target else [])
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=REPO_ROOT, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    for line in proc.stdout:
+        if line.startswith("READY "):
+            seconds = time.perf_counter() - start
+            result = json.loads(line[len("READY "):])
+            break
+    else:
+        proc.wait()
+        error = proc.stderr.read().strip().splitlines()
+        raise RuntimeError(error[-1] if error else f"終了コード {proc.returncode}")
+    proc.communicate()
+    result["seconds"] = seconds
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--entries", nargs="+", default=list(ENTRIES), choices=list(ENTRIES))
+    parser.add_argument("--repeat", type=int, default=5, help="起動する回数（時間は中央値，1回目はディスクキャッシュの影響を受ける）")
+    parser.add_argument("--budget", type=float, help="準備完了までの上限（秒）。超えた入口があれば終了コード1で終わる")
+    parser.add_argument("--output", help="結果のJSONの保存先")
+    args = parser.parse_args()
+
+    display = None
+    results = []
+    print(f"{'entry':<12} {'kind':<7} {'median[s]':>10} {'min[s]':>8} {'max[s]':>8}  heavy modules at startup")
+    for name in args.entries:
+        kind, target = ENTRIES[name]
+        result = {"entry": name, "kind": kind}
+        results.append(result)
+        if kind == "gui":
+            if display is None:
+                display = can_open_display()
+            if not display:
+                result.update(status="skipped", reason="画面を表示できない環境")
+                print(f"{name:<12} {kind:<7}  （省略: {result['reason']}）")
+                continue
+        try:
+            runs = [measure(kind, target) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            result.update(status="error", reason=str(e))
+            print(f"{name:<12} {kind:<7}  （失敗: {e}）")
+            continue
+        seconds = [run["seconds"] for run in runs]
+        result.update(status="ok", seconds=statistics.median(seconds), seconds_runs=seconds, modules=runs[-1]["modules"])
+        over = args.budget is not None and kind != "python" and result["seconds"] > args.budget
+        result["over_budget"] = over
+        print(f"{name:<12} {kind:<7} {result['seconds']:>10.3f} {min(seconds):>8.3f} {max(seconds):>8.3f}  "
+              f"{', '.join(result['modules']) or '-'}{'  上限超過' if over else ''}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "platform": sys.platform, "budget": args.budget,
+                       "results": results}, f, ensure_ascii=False, indent=1)
+    over = [result["entry"] for result in results if result.get("over_budget")]
+    if over:
+        print(f"\n起動時間の上限（{args.budget}秒）を超えた入口: {', '.join(over)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""
+ベンチマーク用の合成PDFを生成する
+"""
+import json
+import os
+import random
+
+from PIL import Image, ImageDraw, ImageFont
+from PyPDF2 import PdfReader, PdfWriter
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+WORDS = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut labore".split()
+
+
+def random_lines(rng, count, words_per_line=10):
+    return [" ".join(rng.choice(WORDS) for _ in range(words_per_line)) for _ in range(count)]
+
+
+def make_scan_image(rng, dpi=150, size=A4):
+    """
+    スキャン原稿に見立てた白地に黒文字のページ画像を作る
+    """
+    width, height = int(size[0] / 72 * dpi), int(size[1] / 72 * dpi)
+    image = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(image)
+    line_height = max(12, dpi // 6)
+    y = dpi // 2
+    for line in random_lines(rng, (height - dpi) // line_height):
+        draw.text((dpi // 2, y), line, fill=0)
+        y += line_height
+    return image
+
+
+def make_text_image(rng, dpi=150, size=A4, lines=25, skew=0.0):
+    """
+    読める大きさ（約11pt）の文字で書いたページ画像と，その正解テキストを返す（OCR精度の計測用）
+    skew: 原稿の傾き（度，反時計回り）
+    """
+    width, height = int(size[0] / 72 * dpi), int(size[1] / 72 * dpi)
+    image = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default(size=max(8, dpi * 11 // 72))
+    text = random_lines(rng, lines, words_per_line=8)
+    y = dpi
+    for line in text:
+        draw.text((dpi, y), line, fill=0, font=font)
+        y += dpi * 18 // 72
+    if skew:
+        image = image.rotate(skew, resample=Image.BICUBIC, fillcolor=255)
+    return image, "\n".join(text)
+
+
+def make_text_pdf(path, pages, seed=0):
+    """
+    テキストレイヤーのみのPDF（ボーンデジタル相当）
+    """
+    rng = random.Random(seed)
+    c = canvas.Canvas(path, pagesize=A4)
+    for _ in range(pages):
+        y = A4[1] - 50
+        for line in random_lines(rng, 50):
+            c.drawString(40, y, line)
+            y -= 15
+        c.showPage()
+    c.save()
+    return path
+
+
+def make_scanned_pdf(path, pages, dpi=150, seed=0):
+    """
+    ページ全体が1枚の画像のPDF（スキャン相当，テキストレイヤーなし）
+    """
+    rng = random.Random(seed)
+    c = canvas.Canvas(path, pagesize=A4)
+    for _ in range(pages):
+        c.drawImage(ImageReader(make_scan_image(rng, dpi=dpi)), 0, 0, width=A4[0], height=A4[1])
+        c.showPage()
+    c.save()
+    return path
+
+
+def make_mixed_pdf(path, pages, dpi=150, seed=0):
+    """
+    テキストのページとスキャン画像のページが交互に並ぶPDF（スキャンと電子文書が混ざった束に相当）
+    """
+    rng = random.Random(seed)
+    c = canvas.Canvas(path, pagesize=A4)
+    for i in range(pages):
+        if i % 2:
+            c.drawImage(ImageReader(make_scan_image(rng, dpi=dpi)), 0, 0, width=A4[0], height=A4[1])
+        else:
+            y = A4[1] - 50
+            for line in random_lines(rng, 50):
+                c.drawString(40, y, line)
+                y -= 15
+        c.showPage()
+    c.save()
+    return path
+
+
+def encrypt_pdf(path, password):
+    """
+    path をパスワード付き（RC4 128bit，追加のライブラリなしで復号できる方式）に置き換える
+    """
+    writer = PdfWriter()
+    writer.append_pages_from_reader(PdfReader(path))
+    writer.encrypt(password)
+    with open(path, "wb") as f:
+        writer.write(f)
+    return path
+
+
+# 合成コーパスの種類（encrypted はテキストのPDFに ENCRYPTED_PASSWORD を付けたもの）
+CORPUS_KINDS = ("text", "scan", "mixed", "encrypted")
+ENCRYPTED_PASSWORD = "bench"
+CORPUS_VERSION = 1
+
+
+def make_corpus(directory, kind, pages, pages_per_file=50, seed=0):
+    """
+    合計 pages ページを pages_per_file ページずつのファイルに分けた合成コーパスを作り，ファイルのリストを返す
+    同じ引数なら同じ内容になり（乱数の種を固定），作成済みのコーパスは作り直さない
+    """
+    folder = ensure_dir(os.path.join(directory, f"{kind}_{pages}_{pages_per_file}_{seed}"))
+    marker = os.path.join(folder, "corpus.json")
+    spec = {"version": CORPUS_VERSION, "kind": kind, "pages": pages, "pages_per_file": pages_per_file, "seed": seed}
+    if os.path.exists(marker):
+        with open(marker, encoding="utf-8") as f:
+            done = json.load(f)
+        if done["spec"] == spec and all(os.path.exists(path) for path in done["files"]):
+            return done["files"]
+    make = {"text": make_text_pdf, "scan": make_scanned_pdf, "mixed": make_mixed_pdf, "encrypted": make_text_pdf}[kind]
+    files = []
+    for n, start in enumerate(range(0, pages, pages_per_file)):
+        path = make(os.path.join(folder, f"{kind}_{n:05d}.pdf"), min(pages_per_file, pages - start), seed=seed + n)
+        if kind == "encrypted":
+            encrypt_pdf(path, ENCRYPTED_PASSWORD)
+        files.append(path)
+    with open(marker, "w", encoding="utf-8") as f:
+        json.dump({"spec": spec, "files": files}, f)
+    return files
+
+
+def ensure_dir(path):
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,194 @@
+"""
+結合・分割・OCR結合・ocr_pdf の処理速度をまとめて測り，結果をJSONで保存する（版ごとの比較用）
+
+    python -m benchmarks.suite --pages 1 100 1000 --output results/20240601.json
+    python -m benchmarks.suite --pages 10000 --kinds text scan --operations merge split
+    python -m benchmarks.suite --output new.json --compare results/20240601.json
+
+合成コーパス（text / scan / mixed / encrypted）は --corpus-dir に作って再利用する（乱数の種が同じなら同じ内容）。
+計測ごとに子プロセスを起動し，ページ/秒・そのプロセスの最大RSS・出力サイズを記録する
+（tesseract・pdftoppm の子プロセスのメモリは含まない）。
+--compare を指定すると，前回の結果よりページ/秒が --threshold 以上遅くなった計測を示し，終了コード1で終わる
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from .bench_memory import peak_rss_mb
+from .corpus import CORPUS_KINDS, ENCRYPTED_PASSWORD, ensure_dir, make_corpus
+
+SUITE_VERSION = 1
+OPERATIONS = ("merge", "split", "ocr-merge", "ocr")
+OCR_OPERATIONS = ("ocr-merge", "ocr")
+DEFAULT_PAGES = (1, 100, 1000)
+# OCRは1ページ数秒かかるため，これより多いページ数のコーパスでは測らない（--ocr-max-pages で変更）
+DEFAULT_OCR_MAX_PAGES = 100
+# ページ/秒がこの割合以上下がったら遅くなったとみなす
+DEFAULT_THRESHOLD = 0.10
+
+
+def run_operation(operation, inputs, work_dir, workers):
+    """
+    1つの計測を実行し，出力ファイルのリストを返す（子プロセスで呼ばれる）
+    """
+    from pdf_dc import core
+    passwords = [ENCRYPTED_PASSWORD]
+    if operation == "merge":
+        return core.merge(inputs, os.path.join(work_dir, "merged.pdf"), passwords=passwords)["outputs"]
+    if operation == "split":
+        return core.split(inputs, work_dir, workers=workers, passwords=passwords)["outputs"]
+    if operation == "ocr-merge":
+        from pdf_dc.engine import OcrEngine
+        return core.merge(inputs, os.path.join(work_dir, "merged.pdf"), ocr=True, engine=OcrEngine(workers=workers),
+                          passwords=passwords)["outputs"]
+    return core.ocr(inputs, output_dir=work_dir, passwords=passwords)["outputs"]
+
+
+def run_child(operation, work_dir, workers, inputs):
+    start = time.perf_counter()
+    outputs = run_operation(operation, inputs, work_dir, workers)
+    seconds = time.perf_counter() - start
+    print(json.dumps({"seconds": seconds, "peak_rss_mb": peak_rss_mb(),
+                      "output_bytes": sum(os.path.getsize(path) for path in outputs), "outputs": len(outputs)}))
+
+
+def measure(operation, inputs, workers):
+    with tempfile.TemporaryDirectory(prefix="pdf_dc_suite_") as work_dir:
+        cmd = [sys.executable, "-m", "benchmarks.suite", "--child", operation, work_dir, str(workers), *inputs]
+        out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def skip_reason(operation, kind, pages, ocr_max_pages):
+    if operation not in OCR_OPERATIONS:
+        return None
+    if pages > ocr_max_pages:
+        return f"--ocr-max-pages（{ocr_max_pages}）より多い"
+    missing = [tool for tool in ("tesseract", "pdftoppm") if shutil.which(tool) is None]
+    if missing:
+        return "見つからないコマンド: " + ", ".join(missing)
+    return None
+
+
+def environment():
+    info = {"python": platform.python_version(), "platform": platform.platform(), "cpu_count": os.cpu_count()}
+    for module in ("PyPDF2", "reportlab", "fpdf", "pdf2image", "pytesseract", "PIL"):
+        try:
+            info[module] = __import__(module).__version__
+        except Exception:
+            info[module] = None
+    try:
+        info["git_commit"] = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                            check=True).stdout.strip()
+    except Exception:
+        info["git_commit"] = None
+    return info
+
+
+def result_key(result):
+    return result["operation"], result["kind"], result["pages"]
+
+
+def compare(results, baseline_path, threshold):
+    """
+    前回の結果と比べて表示し，遅くなった計測のリストを返す
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {result_key(r): r for r in json.load(f)["results"] if r.get("pages_per_second")}
+    regressions = []
+    print(f"\n{'operation':<10} {'kind':<10} {'pages':>6} {'before':>9} {'after':>9} {'change':>8}")
+    for result in results:
+        before = baseline.get(result_key(result))
+        if before is None or not result.get("pages_per_second"):
+            continue
+        change = result["pages_per_second"] / before["pages_per_second"] - 1
+        mark = "  遅くなった" if change <= -threshold else ""
+        print(f"{result['operation']:<10} {result['kind']:<10} {result['pages']:>6} {before['pages_per_second']:>9.1f} "
+              f"{result['pages_per_second']:>9.1f} {change:>+8.0%}{mark}")
+        if mark:
+            regressions.append(result)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=list(DEFAULT_PAGES), help="コーパスの合計ページ数（1〜10000）")
+    parser.add_argument("--kinds", nargs="+", default=list(CORPUS_KINDS), choices=CORPUS_KINDS)
+    parser.add_argument("--operations", nargs="+", default=list(OPERATIONS), choices=OPERATIONS)
+    parser.add_argument("--pages-per-file", type=int, default=50, help="コーパスの1ファイルあたりのページ数")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="分割・OCRの並列プロセス数")
+    parser.add_argument("--repeat", type=int, default=1, help="同じ計測を繰り返す回数（時間は中央値）")
+    parser.add_argument("--ocr-max-pages", type=int, default=DEFAULT_OCR_MAX_PAGES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--corpus-dir", default=os.path.join(tempfile.gettempdir(), "pdf_dc_bench_corpus"),
+                        help="合成コーパスの保存先（作成済みなら再利用）")
+    parser.add_argument("--output", help="結果のJSONの保存先")
+    parser.add_argument("--compare", help="比較する前回の結果のJSON")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--child", nargs="+", metavar="ARG", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        operation, work_dir, workers, *inputs = args.child
+        run_child(operation, work_dir, int(workers), inputs)
+        return 0
+
+    results = []
+    print(f"{'operation':<10} {'kind':<10} {'pages':>6} {'files':>6} {'time[s]':>8} {'pages/s':>9} "
+          f"{'peak RSS[MB]':>13} {'output[MB]':>11}")
+    for pages in args.pages:
+        for kind in args.kinds:
+            inputs = make_corpus(ensure_dir(args.corpus_dir), kind, pages, args.pages_per_file, args.seed)
+            for operation in args.operations:
+                result = {"operation": operation, "kind": kind, "pages": pages, "files": len(inputs),
+                          "workers": args.workers}
+                reason = skip_reason(operation, kind, pages, args.ocr_max_pages)
+                if reason:
+                    result.update(status="skipped", reason=reason)
+                    results.append(result)
+                    print(f"{operation:<10} {kind:<10} {pages:>6} {len(inputs):>6}  （省略: {reason}）")
+                    continue
+                try:
+                    runs = [measure(operation, inputs, args.workers) for _ in range(args.repeat)]
+                except subprocess.CalledProcessError as e:
+                    error = (e.stderr or "").strip().splitlines()
+                    result.update(status="error", reason=error[-1] if error else str(e))
+                    results.append(result)
+                    print(f"{operation:<10} {kind:<10} {pages:>6} {len(inputs):>6}  （失敗: {result['reason']}）")
+                    continue
+                seconds = statistics.median(run["seconds"] for run in runs)
+                result.update(status="ok", seconds=seconds, seconds_runs=[run["seconds"] for run in runs],
+                              pages_per_second=pages / seconds if seconds > 0 else None,
+                              peak_rss_mb=max(run["peak_rss_mb"] for run in runs),
+                              output_bytes=runs[-1]["output_bytes"], outputs=runs[-1]["outputs"])
+                results.append(result)
+                print(f"{operation:<10} {kind:<10} {pages:>6} {len(inputs):>6} {seconds:>8.2f} "
+                      f"{result['pages_per_second'] or 0:>9.1f} {result['peak_rss_mb']:>13.1f} "
+                      f"{result['output_bytes'] / 1e6:>11.1f}")
+
+    report = {"suite_version": SUITE_VERSION, "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+              "environment": environment(), "settings": {key: value for key, value in vars(args).items()
+                                                         if key not in ("child", "output", "compare")},
+              "results": results}
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+        print(f"\n結果: {args.output}")
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)}件の計測が前回より{args.threshold:.0%}以上遅くなりました")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,57 +1,52 @@
 import tkinter as tk
-from tkinter import filedialog, messagebox
+from tkinter import filedialog, messagebox, ttk
 import os
-import pytesseract
-from pdf2image import convert_from_path
-from fpdf import FPDF
-from PIL import Image
-import tempfile
-import threading
-
-# 必要に応じてTesseractのパスを明示（Windows向け、要調整）
-# pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
-
-def ocr_pdf(input_pdf, output_pdf, lang='jpn+eng', progress_var=None):
-    images = convert_from_path(input_pdf)
-    pdf = FPDF(unit='pt')
-    total_pages = len(images)
-    for i, image in enumerate(images):
-        if progress_var is not None:
-            progress_var.set(int((i+1)/total_pages*100))
-        ocr_result = pytesseract.image_to_string(image, lang=lang)
-        with tempfile.NamedTemporaryFile(suffix='.png', delete=False) as fp:
-            temp_img = fp.name
-            image.save(temp_img)
-        w, h = image.size
-        pdf.add_page(orientation='P' if h >= w else 'L')
-        pdf.image(temp_img, 0, 0, w, h)
-        pdf.set_xy(10, h-80)
-        pdf.set_font("Arial", size=10)
-        pdf.multi_cell(0, 10, ocr_result)
-        os.remove(temp_img)
-    pdf.output(output_pdf)
-
-def run_ocr(input_pdf, output_pdf, lang, progress_var, btn):
+
+from pdf_dc.options import (DEFAULT_CHUNK_PAGES, DEFAULT_IMAGE_PROFILE, DEFAULT_MAX_MEMORY_MB, DEFAULT_STREAM_BACKEND,
+                            IMAGE_PROFILES, PAGE_BACKEND_NAMES, PREPROCESS_STEPS)
+from pdf_dc.jobs import JobRunner, format_progress
+from pdf_dc.profiling import profiled
+
+def ocr_pdf(input_pdf, output_pdf, lang='jpn+eng', progress=None, cancel=None,
+            chunk_pages=DEFAULT_CHUNK_PAGES, max_memory_mb=DEFAULT_MAX_MEMORY_MB,
+            backend=DEFAULT_STREAM_BACKEND, use_cache=True, profile=DEFAULT_IMAGE_PROFILE,
+            adaptive_dpi=False, preprocess=(), sidecar=None):
+    # ページ単位でストリーム処理（全ページの画像を一度にメモリへ展開しない）
+    # 作業スレッドで呼ばれるため，ここではTkのウィジェットに触らない（進捗は progress(done, total) で返す）
+    # OCR・画像処理のライブラリは読み込みに時間がかかるため，画面を出した後，OCRを始めるときに読み込む
+    from pdf_dc import streaming
+    from pdf_dc.cache import OcrCache
+
+    # 必要に応じてTesseractのパスを明示（Windows向け、要調整）
+    # import pytesseract
+    # pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+    cache = OcrCache() if use_cache else None
     try:
-        btn.config(state="disabled")
-        ocr_pdf(input_pdf, output_pdf, lang=lang, progress_var=progress_var)
-        messagebox.showinfo("完了", f"OCR PDF作成が完了しました。\n{output_pdf}")
-    except Exception as e:
-        messagebox.showerror("エラー", f"OCR PDF作成中にエラー: {e}")
+        return streaming.ocr_pdf(input_pdf, output_pdf, lang=lang, progress=progress, cancel=cancel,
+                                 chunk_pages=chunk_pages, max_memory_mb=max_memory_mb, backend=backend, cache=cache,
+                                 profile=profile, adaptive_dpi=adaptive_dpi, preprocess=preprocess, sidecar=sidecar)
     finally:
-        btn.config(state="normal")
-        progress_var.set(0)
+        if cache is not None:
+            cache.close()
 
 class App(tk.Tk):
     def __init__(self):
         super().__init__()
         self.title("PDF OCRツール")
-        self.geometry("450x250")
+        self.geometry("450x405")
 
         self.input_path = tk.StringVar()
         self.output_path = tk.StringVar()
         self.lang = tk.StringVar(value='jpn+eng')
-        self.progress = tk.IntVar()
+        self.backend = tk.StringVar(value=DEFAULT_STREAM_BACKEND)
+        self.profile = tk.StringVar(value=DEFAULT_IMAGE_PROFILE)
+        self.use_cache = tk.IntVar(value=1)
+        self.adaptive_dpi = tk.IntVar()
+        self.preprocess = tk.IntVar()
+        self.sidecar = tk.IntVar()
+        self.profile_job = tk.IntVar()
+        self.runner = JobRunner(self, on_progress=self.show_progress, on_done=self.on_done,
+                                on_error=self.on_error, on_cancel=self.on_cancel)
 
         # 入力ラベル＆テキスト
         tk.Label(self, text="入力PDFファイル:").pack(anchor=tk.W, pady=(10,0), padx=10)
@@ -71,13 +66,42 @@ class App(tk.Tk):
         tk.Label(self, text="OCR言語 (例:jpn, eng, jpn+eng):").pack(anchor=tk.W, pady=(10,0), padx=10)
         tk.Entry(self, textvariable=self.lang, width=10).pack(anchor=tk.W, padx=10)
 
-        # 進捗バー
-        self.progressbar = tk.Scale(self, from_=0, to=100, orient=tk.HORIZONTAL, variable=self.progress, length=350)
+        # 出力方式（fpdf: 従来方式 / reportlab / tesseract: tesseractのPDF出力をそのまま使う）
+        frame3 = tk.Frame(self)
+        frame3.pack(fill=tk.X, padx=10)
+        tk.Label(frame3, text="出力方式:").pack(side=tk.LEFT)
+        tk.OptionMenu(frame3, self.backend, *PAGE_BACKEND_NAMES).pack(side=tk.LEFT)
+        tk.Checkbutton(frame3, text="OCRキャッシュを使う", variable=self.use_cache).pack(side=tk.LEFT, padx=10)
+
+        # 埋め込む画像の圧縮方法（OCRの解像度とは別）
+        frame5 = tk.Frame(self)
+        frame5.pack(fill=tk.X, padx=10)
+        tk.Label(frame5, text="画像の圧縮:").pack(side=tk.LEFT)
+        tk.OptionMenu(frame5, self.profile, *IMAGE_PROFILES).pack(side=tk.LEFT)
+
+        # OCR前の処理（埋め込み画像の解像度に合わせた画像化・傾き補正・余白除去・2値化）
+        frame6 = tk.Frame(self)
+        frame6.pack(fill=tk.X, padx=10)
+        tk.Checkbutton(frame6, text="解像度を自動調整", variable=self.adaptive_dpi).pack(side=tk.LEFT)
+        tk.Checkbutton(frame6, text="傾き補正・余白除去・2値化", variable=self.preprocess).pack(side=tk.LEFT, padx=10)
+        tk.Checkbutton(frame6, text="単語の位置をJSONで保存", variable=self.sidecar).pack(side=tk.LEFT)
+
+        # 段階ごとの処理時間の計測（出力PDFの横に <出力名>.trace.json を書き出す）
+        tk.Checkbutton(self, text="処理時間を段階ごとに計測", variable=self.profile_job).pack(anchor=tk.W, padx=10)
+
+        # 進捗バー（処理ページ数・ページ/秒・残り時間）
+        self.progressbar = ttk.Progressbar(self, maximum=100, length=350)
         self.progressbar.pack(pady=(10,0))
+        self.progress_label = tk.Label(self, text="")
+        self.progress_label.pack()
 
-        # 実行ボタン
-        self.btn = tk.Button(self, text="OCRしてPDF出力", command=self.start)
-        self.btn.pack(pady=15)
+        # 実行・キャンセルボタン
+        frame4 = tk.Frame(self)
+        frame4.pack(pady=10)
+        self.btn = tk.Button(frame4, text="OCRしてPDF出力", command=self.start)
+        self.btn.pack(side=tk.LEFT, padx=5)
+        self.cancel_btn = tk.Button(frame4, text="キャンセル", state="disabled", command=self.cancel)
+        self.cancel_btn.pack(side=tk.LEFT, padx=5)
 
     def select_input(self):
         filename = filedialog.askopenfilename(filetypes=[("PDF files", "*.pdf")])
@@ -96,11 +120,55 @@ class App(tk.Tk):
         if not self.input_path.get() or not self.output_path.get():
             messagebox.showwarning("ファイル未指定", "入力PDF・出力PDFファイルを指定してください。")
             return
-        t = threading.Thread(
-            target=run_ocr,
-            args=(self.input_path.get(), self.output_path.get(), self.lang.get(), self.progress, self.btn)
-        )
-        t.start()
+        if self.runner.running:
+            return
+        self.btn.config(state="disabled")
+        self.cancel_btn.config(state="normal")
+        func = ocr_pdf
+        if self.profile_job.get() == 1:
+            func = profiled(ocr_pdf, trace=self.output_path.get() + ".trace.json", trace_format="chrome")
+        self.runner.start(func, self.input_path.get(), self.output_path.get(), lang=self.lang.get(),
+                          backend=self.backend.get(), use_cache=self.use_cache.get() == 1, profile=self.profile.get(),
+                          adaptive_dpi=self.adaptive_dpi.get() == 1,
+                          preprocess=PREPROCESS_STEPS if self.preprocess.get() == 1 else (),
+                          sidecar="json" if self.sidecar.get() == 1 else None)
+
+    def cancel(self):
+        self.cancel_btn.config(state="disabled")
+        self.progress_label.config(text="中止しています…")
+        self.runner.cancel()
+
+    def show_progress(self, info):
+        self.progressbar["value"] = info["done"] / info["total"] * 100 if info["total"] else 0
+        self.progress_label.config(text=format_progress(info))
+
+    def finish(self):
+        self.btn.config(state="normal")
+        self.cancel_btn.config(state="disabled")
+        self.progressbar["value"] = 0
+        self.progress_label.config(text="")
+
+    def on_done(self, summary):
+        self.finish()
+        message = f"OCR PDF作成が完了しました。\n{self.output_path.get()}"
+        if "cache_hits" in summary:
+            message += f"\nキャッシュ: ヒット{summary['cache_hits']}ページ / ミス{summary['cache_misses']}ページ"
+        messagebox.showinfo("完了", message)
+        if "profile_table" in summary:
+            window = tk.Toplevel(self)
+            window.title("処理時間の計測結果")
+            text = tk.Text(window, width=100, height=16, font=("MS Gothic", 9))
+            text.pack(fill=tk.BOTH, expand=True)
+            text.insert("1.0", summary["profile_table"] + f"\n\nトレース: {summary['trace']}")
+            text.config(state="disabled")
+
+    def on_error(self, e):
+        self.finish()
+        messagebox.showerror("エラー", f"OCR PDF作成中にエラー: {e}")
+
+    def on_cancel(self):
+        self.finish()
+        messagebox.showinfo("中止", "OCR PDF作成を中止しました。")
 
 if __name__ == "__main__":
     app = App()
@@ -0,0 +1,3 @@
+"""
+PDF結合/分割＋OCRツールの共通処理（GUIから独立した部分）
+"""
@@ -0,0 +1,84 @@
+"""
+白紙ページ（スキャンした裏面・区切り用の紙）の判定
+ページを低解像度で描画し，NumPyでインク（紙の地色より十分に暗い画素）の割合と濃淡のばらつき（標準偏差）を求める。
+どちらも小さいページを白紙とみなし，OCRを省く・出力から除く（core.merge / core.split の drop_blank）
+地色との差で判定するため，色紙の区切りや薄い裏写りは白紙，鉛筆の書き込みなど薄くても広がりのあるものは白紙にしない
+"""
+import numpy as np
+from pdf2image import convert_from_path
+
+from .profiling import stage
+from .raster import iter_page_runs
+from .search import page_text
+
+# 判定用の描画解像度（A4で約410×580ピクセル．これより高い解像度の画像は縮小してから判定する）
+BLANK_DPI = 50
+# 上下左右の端から除く割合（スキャナーの縁の影・パンチ穴）
+BLANK_MARGIN = 0.05
+# 地色よりこれ以上暗い画素をインクとみなす（0〜255）
+INK_CONTRAST = 64
+# インクの割合・濃淡の標準偏差がこれ以下なら白紙（A4で約20画素．ごみの点は白紙，ページ番号だけのページは白紙にしない）
+MAX_INK_COVERAGE = 0.0001
+MAX_INK_STDDEV = 10.0
+# 1回の pdftoppm 呼び出しで描画するページ数
+BLANK_BATCH_SIZE = 32
+
+
+def ink_stats(image, dpi=BLANK_DPI):
+    """
+    画像の (インクの割合, 濃淡の標準偏差) を返す
+    dpi: image の解像度（BLANK_DPI より高ければ縮小してから求め，解像度によらず同じしきい値で比べる）
+    """
+    factor = int(dpi // BLANK_DPI)
+    gray = image.convert("L")
+    if factor > 1:
+        gray = gray.reduce(factor)
+    pixels = np.asarray(gray, dtype=np.int16)
+    h, w = pixels.shape
+    dy, dx = int(h * BLANK_MARGIN), int(w * BLANK_MARGIN)
+    pixels = pixels[dy:h - dy, dx:w - dx]
+    if pixels.size == 0:
+        return 0.0, 0.0
+    # 地色は明るい側の分位点（インクの多いページでも紙の色になる）
+    paper = np.percentile(pixels, 90)
+    coverage = np.count_nonzero(pixels < paper - INK_CONTRAST) / pixels.size
+    return float(coverage), float(pixels.std())
+
+
+def is_blank_stats(coverage, stddev, max_coverage=MAX_INK_COVERAGE, max_stddev=MAX_INK_STDDEV):
+    # ink_stats の結果が白紙のしきい値以下なら真
+    return coverage <= max_coverage and stddev <= max_stddev
+
+
+def is_blank_image(image, dpi=BLANK_DPI, max_coverage=MAX_INK_COVERAGE, max_stddev=MAX_INK_STDDEV):
+    return is_blank_stats(*ink_stats(image, dpi), max_coverage, max_stddev)
+
+
+class BlankDetector:
+    """
+    PDFのページが白紙かを判定する
+    テキストの取り出せるページは描画せずに白紙ではないとし，それ以外を dpi で描画して ink_stats で判定する
+    """
+
+    def __init__(self, dpi=BLANK_DPI, max_coverage=MAX_INK_COVERAGE, max_stddev=MAX_INK_STDDEV, poppler_path=None):
+        self.dpi = dpi
+        self.max_coverage = max_coverage
+        self.max_stddev = max_stddev
+        self.poppler_path = poppler_path
+
+    def blank_pages(self, path, reader, pages, password=None):
+        """
+        pages（0始まり）のうち白紙のページの {ページ番号: (インクの割合, 標準偏差)} を返す
+        password: パスワード付きPDFのパスワード（pdftoppm に渡す）
+        """
+        candidates = [i for i in pages if not page_text(reader.pages[i]).strip()]
+        blank = {}
+        for run in iter_page_runs(candidates, BLANK_BATCH_SIZE):
+            with stage("blank", path=path, page=run[0], pages=len(run)):
+                images = convert_from_path(path, dpi=self.dpi, first_page=run[0] + 1, last_page=run[-1] + 1,
+                                           grayscale=True, userpw=password, poppler_path=self.poppler_path)
+                for i, image in zip(run, images):
+                    coverage, stddev = ink_stats(image, self.dpi)
+                    if is_blank_stats(coverage, stddev, self.max_coverage, self.max_stddev):
+                        blank[i] = (coverage, stddev)
+        return blank
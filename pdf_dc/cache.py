@@ -0,0 +1,166 @@
+import functools
+import hashlib
+import os
+import time
+
+from .sidecar import page_pdf_text
+from .store import cache_dir, connect, evict_lru
+
+# キャッシュの保存形式（ページの生成方法を変えたら上げて古いエントリを無効にする）
+CACHE_FORMAT = 2
+DEFAULT_MAX_MB = 2048
+# ファイル内容のハッシュを覚えておく件数（常駐するGUI・監視フォルダでメモリが増え続けないよう上限を設ける）
+DIGEST_MEMO_SIZE = 4096
+
+
+def default_cache_path():
+    # 環境変数 PDF_DC_CACHE で場所を変更できる
+    return os.environ.get("PDF_DC_CACHE") or cache_dir("ocr_cache.sqlite3")
+
+
+def file_digest(path):
+    """
+    ファイル内容のSHA-256（同じパス・サイズ・更新日時なら計算結果を使い回す）
+    """
+    st = os.stat(path)
+    return _digest(os.path.abspath(path), st.st_size, st.st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=DIGEST_MEMO_SIZE)
+def _digest(path, size, mtime_ns):
+    # size・mtime_ns はキーにするためだけの引数（変わったら計算し直す）
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def engine_version(backend):
+    """
+    OCR結果に影響するエンジン側の版（tesseractの版・出力方式・保存形式）
+    """
+    import pytesseract  # file_digest だけを使う場合（差分結合・サムネイル）にOCRのライブラリを読み込まない
+    try:
+        tesseract = str(pytesseract.get_tesseract_version())
+    except Exception:
+        tesseract = "unknown"
+    return f"tesseract-{tesseract}/{backend}/{CACHE_FORMAT}"
+
+
+class OcrCache:
+    """
+    OCR済みページ（サーチャブルPDF1ページのbytesとテキスト）のディスクキャッシュ（SQLite）
+    キーは 元ファイルのハッシュ・ページ番号・DPI・言語・エンジン版
+    合計サイズがmax_mbを超えたら，最後に使われたのが古い順に削除する
+    """
+
+    def __init__(self, path=None, max_mb=DEFAULT_MAX_MB):
+        self.path = path or default_cache_path()
+        self.max_bytes = max_mb * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        self._conn, self._lock = connect(self.path)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS pages (
+                    file_hash TEXT NOT NULL,
+                    page_index INTEGER NOT NULL,
+                    dpi INTEGER NOT NULL,
+                    lang TEXT NOT NULL,
+                    engine TEXT NOT NULL,
+                    pdf BLOB NOT NULL,
+                    text TEXT,
+                    size INTEGER NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (file_hash, page_index, dpi, lang, engine)
+                )""")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS pages_last_used ON pages (last_used)")
+        self._total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+
+    def page_key(self, pdf_path, page_index, dpi, lang, backend, profile="original", options=()):
+        # 画像の圧縮方法は従来の出力（original）以外のときだけエンジン版に付ける（既存のキャッシュを生かすため）
+        engine = engine_version(backend) if profile == "original" else f"{engine_version(backend)}/{profile}"
+        # 解像度の自動調整・前処理（preprocess.ocr_variant）も同様に，指定したときだけ付ける
+        if options:
+            engine = "/".join((engine, *options))
+        return (file_digest(pdf_path), page_index, dpi, lang, engine)
+
+    def contains(self, key):
+        """
+        キーがあるかを調べる（無ければミスとして数える．あればヒットかは get で数える）
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM pages WHERE file_hash=? AND page_index=? AND dpi=? AND lang=? AND engine=?", key
+            ).fetchone()
+        if not row:
+            self.misses += 1
+        return row is not None
+
+    def get(self, key):
+        """
+        (pdf_bytes, text) を返し，ヒットとして数える（contains の後に追い出されていればNoneを返し，ミスとして数える）
+        """
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT pdf, text FROM pages WHERE file_hash=? AND page_index=? AND dpi=? AND lang=? AND engine=?", key
+            ).fetchone()
+            if row:
+                self._conn.execute(
+                    "UPDATE pages SET last_used=? WHERE file_hash=? AND page_index=? AND dpi=? AND lang=? AND engine=?",
+                    (time.time(), *key),
+                )
+        if row:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return (bytes(row[0]), row[1]) if row else None
+
+    def put(self, key, page_pdf, text):
+        """
+        text: ページの認識結果（sidecar.page_pdf_text．CIDフォントの見えないテキストは extract_text では正しく取り出せない）
+        """
+        size = len(page_pdf) + len(text.encode("utf-8"))
+        with self._lock, self._conn:
+            old = self._conn.execute(
+                "SELECT size FROM pages WHERE file_hash=? AND page_index=? AND dpi=? AND lang=? AND engine=?", key
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (*key, page_pdf, text, size, time.time()),
+            )
+            self._total += size - (old[0] if old else 0)
+            if self._total > self.max_bytes:
+                self._total = evict_lru(self._conn, "pages", self._total, self.max_bytes)
+
+    def summary(self):
+        return {"cache_hits": self.hits, "cache_misses": self.misses}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def iter_cached_pages(cache, pages, key_for, ocr_misses, ocr_one):
+    """
+    キャッシュを確認しながらOCRページ（bytes）を入力順に返す
+    pages: (pdf_path, page_index) のリスト
+    key_for(pdf_path, page_index): キャッシュキー
+    ocr_misses(pages): キャッシュに無かったページをOCRし，bytesを順に返すジェネレータ
+    ocr_one(pdf_path, page_index): 確認後に追い出されたページを単独でOCRする
+    """
+    slots = []
+    for path, i in pages:
+        key = key_for(path, i)
+        slots.append((path, i, key, cache.contains(key)))
+    results = ocr_misses([(path, i) for path, i, _, hit in slots if not hit])
+    for path, i, key, hit in slots:
+        entry = cache.get(key) if hit else None
+        if entry is not None:
+            yield entry[0]
+            continue
+        page_pdf = ocr_one(path, i) if hit else next(results)
+        cache.put(key, page_pdf, page_pdf_text(page_pdf))
+        yield page_pdf
@@ -0,0 +1,183 @@
+from PyPDF2.generic import ContentStream
+
+# この文字数以上のテキストが取り出せるページは「テキストあり」とみなす
+TEXT_MIN_CHARS = 20
+
+# ページの判定結果
+TEXT = "text"    # テキストレイヤーあり：そのままコピー
+OCR = "ocr"      # 画像のみ：OCRする
+EMPTY = "empty"  # テキストも画像もない：そのままコピー
+BLANK = "blank"  # 画像はあるが白紙（blank.BlankDetector で判定）：OCRせずにそのままコピー
+
+
+def _mat_mul(m, n):
+    a, b, c, d, e, f = m
+    a2, b2, c2, d2, e2, f2 = n
+    return (a*a2 + b*c2, a*b2 + b*d2, c*a2 + d*c2, c*b2 + d*d2, e*a2 + f*c2 + e2, e*b2 + f*d2 + f2)
+
+
+def _resolve(obj):
+    # 間接参照を実体に解決する（Noneはそのまま）
+    return obj.get_object() if obj is not None else None
+
+
+def _iter_images(obj, resources, ctm, reader, depth=0):
+    """
+    コンテンツストリーム中で描画される画像XObjectを (画像, 変換行列) の順に返す
+    cm/q/Q で変換行列を追い，フォームXObjectの中も数段までたどる
+    """
+    if depth > 3:
+        return
+    resources = _resolve(resources)
+    xobjects = _resolve(resources.get("/XObject")) if resources else None
+    xobjects = xobjects or {}
+    stack = []
+    for operands, operator in ContentStream(obj, reader).operations:
+        if operator == b"q":
+            stack.append(ctm)
+        elif operator == b"Q" and stack:
+            ctm = stack.pop()
+        elif operator == b"cm":
+            ctm = _mat_mul(tuple(float(x) for x in operands), ctm)
+        elif operator == b"Do" and operands[0] in xobjects:
+            xobj = xobjects[operands[0]].get_object()
+            subtype = xobj.get("/Subtype")
+            if subtype == "/Image":
+                yield xobj, ctm
+            elif subtype == "/Form":
+                matrix = tuple(float(x) for x in xobj.get("/Matrix", (1, 0, 0, 1, 0, 0)))
+                yield from _iter_images(xobj, xobj.get("/Resources"), _mat_mul(matrix, ctm), reader, depth + 1)
+
+
+def page_images(page, reader=None):
+    """
+    ページに描画される画像XObjectと変換行列 (画像, (a, b, c, d, e, f)) のリスト（解析できなければNone）
+    """
+    contents = page.get_contents()
+    if contents is None:
+        return []
+    try:
+        return list(_iter_images(contents, page.get("/Resources"), (1, 0, 0, 1, 0, 0), reader or page.pdf))
+    except Exception:
+        return None
+
+
+def image_coverage(page, reader=None):
+    """
+    ページ面積に対する画像の占める割合（0〜1，重なりは考慮しない）
+    """
+    box = page.mediabox
+    page_area = float(box.width) * float(box.height)
+    if page_area <= 0:
+        return 0.0
+    images = page_images(page, reader)
+    if images is None:
+        # 解析できないページは安全側（画像ありとしてOCR対象）に倒す
+        return 1.0
+    area = sum(abs(a*d - b*c) for _, (a, b, c, d, _, _) in images)
+    return min(1.0, area / page_area)
+
+
+def classify_page(page, min_chars=TEXT_MIN_CHARS, text=None):
+    """
+    ページの判定結果 (TEXT/OCR/EMPTY, 文字数, 画像の被覆率) を返す
+    text: 抽出済みのページのテキスト（省略時はここで抽出する）
+    """
+    if text is None:
+        try:
+            text = page.extract_text()
+        except Exception:
+            text = ""
+    chars = len("".join(text.split()))
+    resources = _resolve(page.get("/Resources"))
+    fonts = _resolve(resources.get("/Font")) if resources else None
+    coverage = image_coverage(page)
+    if chars >= min_chars and fonts:
+        decision = TEXT
+    elif coverage > 0:
+        decision = OCR
+    elif chars:
+        decision = TEXT
+    else:
+        decision = EMPTY
+    return decision, chars, coverage
+
+
+def format_page_list(page_indices):
+    """
+    0始まりのページ番号を「1-3,5」のような1始まりの範囲表記にする
+    """
+    parts = []
+    pages = sorted(i + 1 for i in page_indices)
+    start = prev = None
+    for p in pages + [None]:
+        if start is not None and p == prev + 1:
+            prev = p
+            continue
+        if start is not None:
+            parts.append(str(start) if start == prev else f"{start}-{prev}")
+        start = prev = p
+    return ",".join(parts)
+
+
+class PageDecisionLog:
+    """
+    ページごとの判定結果とOCR時間を記録し，処理結果の概要を作る
+    """
+
+    def __init__(self):
+        self.decisions = []  # (pdf_path, page_index, decision, chars, coverage)
+        self.ocr_seconds = 0.0  # OCRにかかった時間（呼び出し側で設定）
+
+    def classify(self, pdf_path, page_index, page, min_chars=TEXT_MIN_CHARS, text=None):
+        decision, chars, coverage = classify_page(page, min_chars=min_chars, text=text)
+        self.decisions.append((pdf_path, page_index, decision, chars, coverage))
+        return decision
+
+    def mark(self, pdf_path, page_index, decision):
+        # 判定結果を後から変える（白紙と分かったOCR対象ページなど）
+        for n, (path, i, _, chars, coverage) in enumerate(self.decisions):
+            if path == pdf_path and i == page_index:
+                self.decisions[n] = (path, i, decision, chars, coverage)
+                return
+        self.decisions.append((pdf_path, page_index, decision, 0, 0.0))
+
+    def count(self, decision):
+        return sum(1 for d in self.decisions if d[2] == decision)
+
+    def estimated_seconds_saved(self):
+        # OCRしたページの平均処理時間 × OCRを省いたページ数
+        ocr_pages = self.count(OCR)
+        if not ocr_pages:
+            return None
+        return self.ocr_seconds / ocr_pages * (len(self.decisions) - ocr_pages)
+
+    def as_dicts(self):
+        return [
+            {"file": path, "page": i + 1, "decision": decision, "chars": chars, "image_coverage": round(coverage, 3)}
+            for path, i, decision, chars, coverage in self.decisions
+        ]
+
+    def summary_text(self, basename=lambda p: p, max_files=20):
+        return summarize_decisions(self.as_dicts(), self.estimated_seconds_saved(), basename, max_files)
+
+
+def summarize_decisions(decisions, seconds_saved=None, basename=lambda p: p, max_files=20):
+    """
+    PageDecisionLog.as_dicts() の結果を，件数・推定短縮時間・ファイルごとのページ範囲の文章にする
+    """
+    counts = {name: sum(1 for d in decisions if d["decision"] == name) for name in (OCR, TEXT, EMPTY, BLANK)}
+    lines = [f"OCR {counts[OCR]}ページ / テキストあり {counts[TEXT]}ページ / 空白 {counts[EMPTY]}ページ"]
+    if counts[BLANK]:
+        lines[0] += f" / 白紙 {counts[BLANK]}ページ"
+    if seconds_saved is not None:
+        lines.append(f"OCR省略による短縮（推定）: {seconds_saved:.0f}秒")
+    by_file = {}
+    for d in decisions:
+        by_file.setdefault(d["file"], {}).setdefault(d["decision"], []).append(d["page"] - 1)
+    for path, groups in list(by_file.items())[:max_files]:
+        detail = " / ".join(f"{name} {format_page_list(pages)}" for name, pages in groups.items())
+        lines.append(f"{basename(path)}: {detail}")
+    if len(by_file) > max_files:
+        lines.append(f"…ほか{len(by_file) - max_files}ファイル")
+    return "\n".join(lines)
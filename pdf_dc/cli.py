@@ -0,0 +1,398 @@
+"""
+コマンドライン版（GUIなしでサーバー・cronから実行する）
+
+    python -m pdf_dc merge  -o out.pdf "scans/*.pdf"
+    python -m pdf_dc merge-ocr -o out.pdf scans/ --workers 16
+    python -m pdf_dc merge  -o archive.pdf monthly/ --stream  （ページ数の多い結合を省メモリで）
+    python -m pdf_dc merge-ocr -o daily.pdf inbox/ --incremental （前回から変わっていないファイルは処理し直さない）
+    python -m pdf_dc split  --pages 1,3,5-7 --output-dir parts/ a.pdf b.pdf
+    python -m pdf_dc split  --every 100 catalogue.pdf       （--by-bookmark でしおりごと）
+    python -m pdf_dc ocr    --template "{stem}_ocr.pdf" "in/*.pdf" --json
+    python -m pdf_dc merge-ocr -o out.pdf scans/ --index   （出力ページのテキストを全文検索索引に登録）
+    python -m pdf_dc index  archive/                       （既存のPDFを索引に追加，変わっていないものは飛ばす）
+    python -m pdf_dc search "請求書 2024"
+    python -m pdf_dc watch  inbox/ --output-dir searchable/   （届いたPDFを順にOCRする常駐処理，Ctrl+Cで終了）
+    python -m pdf_dc watch  inbox/ --merge-into daily.pdf --ocr
+    python -m pdf_dc merge-ocr -o out.pdf scans/ --profile --trace trace.json --trace-format chrome
+                                                           （段階ごとの処理時間を表示し，トレースを書き出す）
+
+終了コード: 0 成功 / 1 処理中のエラー / 2 引数の誤り / 3 入力PDFが見つからない / 4 パスワードが必要・誤り
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+from . import core
+from .incremental import merge_incremental
+from .scanner import natural_key
+from .splitter import PARALLEL_MIN_PAGES
+
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_USAGE = 2
+EXIT_NO_INPUT = 3
+EXIT_PASSWORD = 4
+
+
+def expand_inputs(patterns):
+    """
+    ファイル・フォルダ・ワイルドカードを入力PDFのリストにする（指定順，各パターン内は名前の自然順）
+    """
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = [os.path.join(pattern, f) for f in os.listdir(pattern)]
+        else:
+            matches = glob.glob(pattern, recursive=True)
+        for path in sorted(matches, key=natural_key):
+            if path.lower().endswith(".pdf") and os.path.isfile(path) and path not in paths:
+                paths.append(path)
+    return paths
+
+
+def read_passwords(args):
+    passwords = list(args.password or [])
+    if args.password_file:
+        with open(args.password_file, encoding="utf-8") as f:
+            passwords.extend(line.rstrip("\n") for line in f if line.strip())
+    return passwords
+
+
+def make_reader_options(args):
+    from .credentials import CredentialStore
+    return {"passwords": read_passwords(args), "password_cache": {},
+            "credentials": CredentialStore(persist=args.keyring)}
+
+
+def unlock_inputs(paths, args, reader_options):
+    """
+    処理を始める前に暗号化された入力のパスワードを並列に確かめる（分からない入力があれば何もせず終了）
+    """
+    from .credentials import prescan
+    result = prescan(paths, reader_options["passwords"], credentials=reader_options["credentials"],
+                     password_cache=reader_options["password_cache"], workers=getattr(args, "workers", None))
+    if result["locked"]:
+        names = ", ".join(os.path.basename(path) for path in result["locked"])
+        raise core.PasswordError(f"パスワードが必要です（{len(result['locked'])}ファイル）: {names}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m pdf_dc", description="PDF結合/分割＋OCR（コマンドライン版）")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("inputs", nargs="+", help="入力PDF（ファイル・フォルダ・ワイルドカード）")
+    common.add_argument("--password", action="append", help="暗号化PDFに試すパスワード（複数指定可）")
+    common.add_argument("--password-file", help="試すパスワードを1行に1つ書いたファイル")
+    common.add_argument("--keyring", action="store_true",
+                        help="開けたパスワードを文書ごとにOSの資格情報ストア（keyring）に記憶し，次回から使う")
+    common.add_argument("--json", action="store_true", help="処理結果をJSONで標準出力に出す")
+    common.add_argument("--summary", help="処理結果のJSONを書き出すファイル")
+    common.add_argument("--index", action="store_true", help="出力ページのテキストを全文検索索引に登録する")
+    common.add_argument("--index-path", help="全文検索索引のファイル")
+    common.add_argument("--profile", action="store_true", help="段階ごとの処理時間・CPU時間・入出力量を計測して表示する")
+    common.add_argument("--trace", help="計測の記録を書き出すファイル（--profile を含む）")
+    common.add_argument("--trace-format", choices=("json", "chrome"), default="json",
+                        help="記録の形式（chrome: chrome://tracing・Perfettoで表示できる形式）")
+    common.add_argument("--profile-memory", action="store_true", help="段階ごとのメモリの最大使用量も計測する（遅くなる）")
+    common.add_argument("--cprofile", action="store_true", help="cProfileで関数ごとの時間も計測する（--trace があれば .prof も書き出す）")
+
+    ocr_opts = argparse.ArgumentParser(add_help=False)
+    ocr_opts.add_argument("--lang", default="jpn+eng", help="OCR言語（例: jpn, eng, jpn+eng）")
+    ocr_opts.add_argument("--backend", help="OCRページの生成方式（reportlab / fpdf / tesseract）")
+    ocr_opts.add_argument("--dpi", type=int, help="OCR用の画像化解像度")
+    ocr_opts.add_argument("--image-profile", help="埋め込む画像の圧縮方法（original / bilevel / gray-jpeg / color-150）")
+    ocr_opts.add_argument("--adaptive-dpi", action="store_true", help="埋め込み画像の解像度に合わせてページごとに画像化解像度を下げる")
+    ocr_opts.add_argument("--min-dpi", type=int, help="--adaptive-dpi で下回らない解像度")
+    ocr_opts.add_argument("--preprocess", help="OCR前の画像処理（deskew,crop,binarize をカンマ区切り，all ですべて）")
+    ocr_opts.add_argument("--recognizer", help="文字認識エンジン（auto / tesserocr / pytesseract，autoはtesserocrがあれば常駐させる．"
+                          "常駐させるのは --backend reportlab / fpdf のみで，tesseract はページごとに起動する）")
+    ocr_opts.add_argument("--workers", type=int, help="OCR・パスワード確認の並列プロセス数（1で逐次処理，既定はCPUコア数）")
+    ocr_opts.add_argument("--tesseract-threads", type=int, default=1, help="1プロセスあたりのtesseractスレッド数")
+    ocr_opts.add_argument("--poppler-path", help="Popplerのbinフォルダ（Windows）")
+    ocr_opts.add_argument("--no-cache", action="store_true", help="OCRキャッシュを使わない")
+    ocr_opts.add_argument("--cache-path", help="OCRキャッシュのファイル")
+    ocr_opts.add_argument("--sidecar", help="OCRした単語の位置を <出力名>.words.json / .words.tsv に書き出す（json / tsv）")
+    ocr_opts.add_argument("--no-skip-text", action="store_true", help="テキストのあるページもOCRする")
+
+    for name, help_text in (("merge", "結合"), ("merge-ocr", "OCRしながら結合")):
+        p = sub.add_parser(name, parents=[common, ocr_opts], help=help_text)
+        p.add_argument("-o", "--output", required=True, help="結合後のPDF")
+        p.add_argument("--pages", default="", help="各ファイルから使うページ（例: 1,3,5-7）")
+        p.add_argument("--stream", action="store_true", help="ファイルごとに出力へ書き出して省メモリで結合する")
+        p.add_argument("--incremental", action="store_true",
+                       help="前回の出力を再利用し，新しい・変わったファイルだけを結合（OCR）する")
+        p.add_argument("--drop-blank", action="store_true", help="白紙のページ（スキャンした裏面・区切りの紙）を除く")
+        p.add_argument("--no-skip-blank", action="store_true", help="白紙のページもOCRする（既定は低解像度で判定してOCRを省く）")
+        if name == "merge":
+            p.add_argument("--ocr", action="store_true", help="ページごとにOCRしてサーチャブルPDF化")
+
+    p = sub.add_parser("split", parents=[common, ocr_opts], help="ページ単位・Nページごと・しおりごとに分割")
+    p.add_argument("--output-dir", help="出力先フォルダ（省略時は元ファイルと同じフォルダ）")
+    p.add_argument("--template", help="出力ファイル名（{stem}, {page}, {last}, {index}, {title} が使える）")
+    p.add_argument("--pages", default="", help="分割するページ（例: 1,3,5-7）")
+    group = p.add_mutually_exclusive_group()
+    group.add_argument("--every", type=int, help="Nページごとに1ファイルにまとめる")
+    group.add_argument("--by-bookmark", action="store_true", help="最上位のしおりごとに1ファイルにまとめる")
+    p.add_argument("--split-workers", type=int, default=1,
+                   help="OCRしない分割で出力ファイルを書き出す並列プロセス数"
+                        f"（既定は1．合計{PARALLEL_MIN_PAGES}ページ未満は常に逐次）")
+    p.add_argument("--ocr", action="store_true", help="ページごとにOCRしてサーチャブルPDF化")
+    p.add_argument("--drop-blank", action="store_true", help="白紙のページを除いてから分割する")
+    p.add_argument("--no-skip-blank", action="store_true", help="白紙のページもOCRする（既定は低解像度で判定してOCRを省く）")
+
+    p = sub.add_parser("ocr", parents=[common, ocr_opts], help="PDF全体をOCRしてサーチャブルPDF化")
+    p.add_argument("--output-dir", help="出力先フォルダ（省略時は元ファイルと同じフォルダ）")
+    p.add_argument("--template", default=core.DEFAULT_OCR_TEMPLATE, help="出力ファイル名（{stem} が使える）")
+    p.add_argument("--chunk-pages", type=int, help="部分PDFに書き出すページ数")
+    p.add_argument("--max-memory-mb", type=int, help="部分PDF1つに溜める画像データ量の上限")
+
+    p = sub.add_parser("index", parents=[common], help="既存のPDFを全文検索索引に登録")
+    p.add_argument("--force", action="store_true", help="変わっていないPDFも登録し直す")
+    p.add_argument("--prune", action="store_true", help="無くなったファイルを索引から消す")
+
+    p = sub.add_parser("watch", parents=[common, ocr_opts], help="フォルダを監視し，届いたPDFを自動でOCR・結合")
+    p.add_argument("--output-dir", help="OCRしたPDFの出力先フォルダ（監視フォルダ以外）")
+    p.add_argument("--template", default=core.DEFAULT_OCR_TEMPLATE, help="出力ファイル名（{stem} が使える）")
+    p.add_argument("--merge-into", help="届いたPDFを名前順にこのPDFへ結合していく（前回の結合結果を再利用）")
+    p.add_argument("--ocr", action="store_true", help="--merge-into でページごとにOCRする")
+    p.add_argument("--pages", default="", help="--merge-into で各ファイルから使うページ（例: 1,3,5-7）")
+    p.add_argument("--settle", type=float, default=5.0, help="サイズ・更新日時がこの秒数変わらなければ処理する")
+    p.add_argument("--interval", type=float, default=2.0, help="フォルダを走査する間隔（秒）")
+    p.add_argument("--queue-size", type=int, default=64, help="処理待ちのファイル数の上限")
+    p.add_argument("--jobs", type=int, default=1, help="同時に処理するファイル数（--merge-into では1）")
+    p.add_argument("--state", help="処理状況を保存するファイル（既定は監視フォルダの .pdf_dc_watch.json）")
+
+    p = sub.add_parser("search", help="全文検索索引からページを探す")
+    p.add_argument("query", help="探す語（空白区切りですべてを含むページ）")
+    p.add_argument("--index-path", help="全文検索索引のファイル")
+    p.add_argument("--limit", type=int, default=50, help="表示する件数の上限")
+    p.add_argument("--json", action="store_true", help="検索結果をJSONで標準出力に出す")
+    p.add_argument("--summary", help="検索結果のJSONを書き出すファイル")
+    return parser
+
+
+def open_cache(args):
+    if args.no_cache:
+        return None
+    from .cache import OcrCache
+    return OcrCache(args.cache_path)
+
+
+def open_search_index(args):
+    from .search import SearchIndex
+    return SearchIndex(args.index_path)
+
+
+def run_search(args):
+    started = time.perf_counter()
+    search_index = open_search_index(args)
+    try:
+        results = search_index.search(args.query, limit=args.limit)
+    finally:
+        search_index.close()
+    return {"query": args.query, "results": results, "seconds": time.perf_counter() - started}
+
+
+def run_index(paths, args, search_index, reader_options):
+    started = time.perf_counter()
+    indexed, pages = [], 0
+    for path in paths:
+        if not args.force and search_index.is_current(path):
+            continue
+        pages += search_index.index_pdf(path, reader=core.open_reader(path, **reader_options), force=True)
+        indexed.append(path)
+    summary = {"operation": "index", "inputs": list(paths), "outputs": indexed, "pages": pages}
+    if args.prune:
+        summary["pruned"] = search_index.prune()
+    summary.update(search_index.stats())
+    summary["seconds"] = time.perf_counter() - started
+    return summary
+
+
+def ocr_variant_options(args):
+    # 解像度の自動調整・前処理・認識エンジンの指定を OcrEngine / streaming.ocr_pdf の引数にする
+    from .options import PREPROCESS_STEPS
+    options = {}
+    if args.adaptive_dpi:
+        options["adaptive_dpi"] = True
+    if args.min_dpi:
+        options["min_dpi"] = args.min_dpi
+    if args.recognizer:
+        options["recognizer"] = args.recognizer
+    if args.preprocess:
+        steps = [step.strip() for step in args.preprocess.split(",") if step.strip()]
+        options["preprocess"] = PREPROCESS_STEPS if steps == ["all"] else tuple(steps)
+    return options
+
+
+def create_engine(args, cache):
+    from .engine import OcrEngine
+    options = {"lang": args.lang, "poppler_path": args.poppler_path, "cache": cache,
+               "workers": args.workers, "tesseract_threads": args.tesseract_threads}
+    if args.backend:
+        options["backend"] = args.backend
+    if args.dpi:
+        options["dpi"] = args.dpi
+    if args.image_profile:
+        options["profile"] = args.image_profile
+    options.update(ocr_variant_options(args))
+    return OcrEngine(**options)
+
+
+def streaming_ocr_options(args, cache, search_index):
+    # ocr / watch の streaming.ocr_pdf の引数
+    options = {"lang": args.lang, "poppler_path": args.poppler_path, "cache": cache, "search_index": search_index}
+    for name in ("backend", "dpi", "chunk_pages", "max_memory_mb"):
+        if getattr(args, name, None):
+            options[name] = getattr(args, name)
+    if args.image_profile:
+        options["profile"] = args.image_profile
+    options.update(ocr_variant_options(args))
+    if args.sidecar:
+        options["sidecar"] = args.sidecar
+    return options
+
+
+def run_watch(args):
+    from .watch import WatchService, merge_action, ocr_action
+    folders = [os.path.abspath(folder) for folder in args.inputs]
+    if not all(os.path.isdir(folder) for folder in folders):
+        raise core.InputNotFound("監視するフォルダが見つかりません: " + " ".join(args.inputs))
+    if not args.merge_into and (not args.output_dir or os.path.abspath(args.output_dir) in folders):
+        raise ValueError("--output-dir に監視フォルダ以外のフォルダを指定してください（または --merge-into）")
+    reader_options = make_reader_options(args)
+    use_ocr = args.ocr or not args.merge_into
+    cache = open_cache(args) if use_ocr else None
+    search_index = open_search_index(args) if args.index else None
+    try:
+        if args.merge_into:
+            engine = create_engine(args, cache) if use_ocr else None
+            action = merge_action(args.merge_into, page_ranges=args.pages, ocr=use_ocr, engine=engine,
+                                  skip_text=not args.no_skip_text, search_index=search_index, **reader_options)
+            service = WatchService(folders, action, state_path=args.state, settle_seconds=args.settle,
+                                   poll_interval=args.interval, queue_size=args.queue_size, workers=1,
+                                   outputs=[args.merge_into])
+        else:
+            os.makedirs(args.output_dir, exist_ok=True)
+            action = ocr_action(args.output_dir, args.template, **streaming_ocr_options(args, cache, search_index),
+                                **reader_options)
+            service = WatchService(folders, action, state_path=args.state, settle_seconds=args.settle,
+                                   poll_interval=args.interval, queue_size=args.queue_size, workers=args.jobs)
+        stats = service.run()
+    finally:
+        if cache is not None:
+            cache.close()
+        if search_index is not None:
+            search_index.close()
+    return {"operation": "watch", "inputs": folders, "outputs": [], "pages": 0, **stats}
+
+
+def run(args):
+    if args.command == "search":
+        return run_search(args)
+    if args.command == "watch":
+        return run_watch(args)
+    paths = expand_inputs(args.inputs)
+    if not paths:
+        raise core.InputNotFound("入力PDFが見つかりません: " + " ".join(args.inputs))
+    reader_options = make_reader_options(args)
+    unlock_inputs(paths, args, reader_options)
+    search_index = open_search_index(args) if args.index or args.command == "index" else None
+    if args.command == "index":
+        try:
+            return run_index(paths, args, search_index, reader_options)
+        finally:
+            search_index.close()
+    use_ocr = args.command in ("merge-ocr", "ocr") or getattr(args, "ocr", False)
+    cache = open_cache(args) if use_ocr else None
+    try:
+        if args.command == "ocr":
+            options = streaming_ocr_options(args, cache, search_index)
+            return core.ocr(paths, output_dir=args.output_dir, template=args.template, **options, **reader_options)
+        engine = create_engine(args, cache) if use_ocr else None
+        if args.command in ("merge", "merge-ocr") and args.incremental:
+            if args.sidecar:
+                raise ValueError("--incremental と --sidecar は同時に指定できません")
+            return merge_incremental(paths, args.output, page_ranges=args.pages, ocr=use_ocr, engine=engine,
+                                     skip_text=not args.no_skip_text, skip_blank=not args.no_skip_blank,
+                                     drop_blank=args.drop_blank, search_index=search_index, **reader_options)
+        if args.command in ("merge", "merge-ocr"):
+            return core.merge(paths, args.output, page_ranges=args.pages, ocr=use_ocr, engine=engine,
+                              skip_text=not args.no_skip_text, stream=args.stream, sidecar=args.sidecar,
+                              search_index=search_index, skip_blank=not args.no_skip_blank,
+                              drop_blank=args.drop_blank, **reader_options)
+        return core.split(paths, output_dir=args.output_dir, page_ranges=args.pages, template=args.template,
+                          ocr=use_ocr, engine=engine, skip_text=not args.no_skip_text,
+                          every=args.every, by_bookmark=args.by_bookmark,
+                          workers=args.split_workers, sidecar=args.sidecar,
+                          search_index=search_index, skip_blank=not args.no_skip_blank,
+                          drop_blank=args.drop_blank, **reader_options)
+    finally:
+        if cache is not None:
+            cache.close()
+        if search_index is not None:
+            search_index.close()
+
+
+def create_profiler(args):
+    if not any(getattr(args, name, None) for name in ("profile", "trace", "profile_memory", "cprofile")):
+        return None
+    from .profiling import Profiler
+    return Profiler(memory=args.profile_memory, cprofile=args.cprofile)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if getattr(args, "output_dir", None):
+        os.makedirs(args.output_dir, exist_ok=True)
+    profiler = create_profiler(args)
+    try:
+        if profiler is None:
+            summary = run(args)
+        else:
+            with profiler:
+                summary = run(args)
+        summary["status"] = "ok"
+        code = EXIT_OK
+    except core.InputNotFound as e:
+        summary, code = {"status": "error", "error": str(e)}, EXIT_NO_INPUT
+    except core.PasswordError as e:
+        summary, code = {"status": "error", "error": str(e)}, EXIT_PASSWORD
+    except Exception as e:
+        summary, code = {"status": "error", "error": str(e)}, EXIT_ERROR
+    summary["command"] = args.command
+    summary["exit_code"] = code
+    if profiler is not None:
+        # 途中で失敗した場合も，そこまでの計測結果を残す
+        summary["profile"] = profiler.summary()
+        if args.trace:
+            summary["trace"] = profiler.write(args.trace, args.trace_format)
+        print(profiler.table(), file=sys.stderr)
+
+    text = json.dumps(summary, ensure_ascii=False, indent=2)
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            f.write(text)
+    if args.json:
+        print(text)
+    elif code == EXIT_OK and args.command == "search":
+        for result in summary["results"]:
+            print(f"{result['path']}:{result['page']}: {result['snippet']}")
+        print(f"{len(summary['results'])}件（{summary['seconds'] * 1000:.0f}ミリ秒）", file=sys.stderr)
+    elif code == EXIT_OK and args.command == "index":
+        print(f"index: {len(summary['inputs'])}ファイル中 {len(summary['outputs'])}ファイルを登録（{summary['pages']}ページ, "
+              f"{summary['seconds']:.1f}秒）／索引全体 {summary['indexed_documents']}ファイル {summary['indexed_pages']}ページ")
+    elif code == EXIT_OK and args.command == "watch":
+        print(f"watch: 処理済み {summary['processed']}ファイル／失敗 {summary['failed']}ファイル／処理待ち {summary['queued']}ファイル")
+    elif code == EXIT_OK and "reused_files" in summary:
+        print(f"{args.command}: {len(summary['inputs'])}ファイル（再利用 {summary['reused_files']}, 処理 "
+              f"{summary['processed_files']}）→ {summary['outputs'][0]}（{summary['pages']}ページ, {summary['seconds']:.1f}秒）")
+    elif code == EXIT_OK:
+        print(f"{args.command}: {len(summary['inputs'])}ファイル → {len(summary['outputs'])}ファイル（{summary['pages']}ページ, {summary['seconds']:.1f}秒）")
+    else:
+        print(f"エラー: {summary['error']}", file=sys.stderr)
+    return code
@@ -0,0 +1,519 @@
+"""
+結合・分割・OCRの本体（Tkinterに依存しない）
+GUI（PDF_DC2.py / pdf_dc_ocr.py / ocr_pdf_gui.py）とコマンドライン（python -m pdf_dc）の共通処理
+"""
+import gc
+import os
+import time
+
+from PyPDF2 import PdfReader, PdfWriter
+
+from .classify import PageDecisionLog, BLANK, OCR
+from .profiling import stage
+from .search import page_text, words_text
+from .sidecar import WordIndex, pop_words
+from .splitter import PARALLEL_MIN_PAGES, page_groups, safe_filename, write_tasks, write_parallel
+
+# 分割・OCR出力のファイル名テンプレート（{stem}: 元ファイル名（拡張子なし）, {page}: 1始まりのページ番号）
+# Nページごと・しおりごとの分割では {page}〜{last} のページ，{index}: 1始まりの連番，{title}: しおりの題名 も使える
+DEFAULT_SPLIT_TEMPLATE = "{stem}_{page}.pdf"
+DEFAULT_CHUNK_TEMPLATE = "{stem}_{page}-{last}.pdf"
+DEFAULT_BOOKMARK_TEMPLATE = "{stem}_{index:02d}_{title}.pdf"
+DEFAULT_OCR_TEMPLATE = "{stem}_ocr.pdf"
+
+
+class PdfToolError(Exception):
+    """
+    処理を続けられないエラー（メッセージはそのまま利用者に表示する）
+    """
+
+
+class PasswordError(PdfToolError):
+    """
+    暗号化PDFのパスワードが無い・正しくない
+    """
+
+
+class InputNotFound(PdfToolError):
+    """
+    処理する入力PDF・監視するフォルダが見つからない
+    """
+
+
+class Cancelled(PdfToolError):
+    """
+    利用者の操作で処理を中止した
+    """
+
+
+def check_cancel(cancel):
+    # cancel: threading.Event など is_set() を持つもの（Noneなら中止しない）
+    if cancel is not None and cancel.is_set():
+        raise Cancelled("処理を中止しました")
+
+
+def parse_page_ranges(page_range_str, total_pages):
+    """
+    「1,3,5-7」形式のページ指定を0始まりのページ番号リストにする（範囲外・不正な指定は無視）
+    """
+    pages = set()
+    parts = page_range_str.split(",")
+    for part in parts:
+        part = part.strip()
+        if "-" in part:
+            try:
+                start, end = map(int, part.split("-"))
+                pages.update(range(max(1, start), min(total_pages, end)+1))
+            except:
+                continue
+        else:
+            try:
+                p = int(part)
+                if 1 <= p <= total_pages:
+                    pages.add(p)
+            except:
+                continue
+    return sorted(p - 1 for p in pages)  # 0-indexed
+
+
+def select_pages(page_range_str, total_pages):
+    # ページ指定が空なら全ページ
+    return parse_page_ranges(page_range_str, total_pages) if page_range_str else list(range(total_pages))
+
+
+def open_reader(path, passwords=(), password_cache=None, ask_password=None, credentials=None):
+    """
+    PdfReaderを開き，暗号化されていれば復号する
+    passwords: 順に試す候補パスワード
+    password_cache: {path: password} の辞書（成功したパスワードを記録する）
+    ask_password(path, retry): パスワードを問い合わせる関数（Noneを返したら中止）
+    credentials: credentials.CredentialStore（文書IDで記憶したパスワードを試し，成功したパスワードを記憶する）
+    （多数の入力は，処理の前に credentials.prescan でまとめて確認しておくと途中で問い合わせが出ない）
+    """
+    with stage("read", path=path, bytes_in=os.path.getsize(path)):
+        reader = PdfReader(path)
+    if not reader.is_encrypted:
+        return reader
+    name = os.path.basename(path)
+    candidates = list(passwords)
+    doc_id = None
+    if credentials is not None:
+        from .credentials import document_id
+        doc_id = document_id(reader)
+        if credentials.get(doc_id):
+            candidates.insert(0, credentials.get(doc_id))
+    if password_cache is not None and password_cache.get(path):
+        candidates.insert(0, password_cache[path])
+
+    def unlocked(pwd):
+        if password_cache is not None:
+            password_cache[path] = pwd
+        if credentials is not None:
+            credentials.set(doc_id, pwd)
+        return reader
+
+    for pwd in candidates:
+        if reader.decrypt(pwd) != 0:
+            return unlocked(pwd)
+    if ask_password is None:
+        raise PasswordError(f"{name} のパスワードが必要です")
+    retry = False
+    while True:
+        pwd = ask_password(path, retry)
+        if not pwd:
+            raise PasswordError(f"{name} の読み込みを中止しました")
+        if reader.decrypt(pwd) != 0:
+            return unlocked(pwd)
+        retry = True
+
+
+def format_output_path(template, input_path, output_dir=None, page=None, **fields):
+    """
+    出力ファイル名テンプレートを展開する（output_dir未指定なら入力ファイルと同じフォルダ）
+    """
+    stem = os.path.splitext(os.path.basename(input_path))[0]
+    name = template.format(stem=stem, page=page, **fields)
+    return os.path.join(output_dir or os.path.dirname(os.path.abspath(input_path)), name)
+
+
+def _ocr_summary(summary, engine, decisions):
+    if decisions.decisions:
+        summary["ocr_pages"] = decisions.count(OCR)
+        summary["seconds_saved"] = decisions.estimated_seconds_saved()
+        summary["decisions"] = decisions.as_dicts()
+    if engine is not None and engine.cache is not None:
+        summary.update(engine.cache.summary())
+    return summary
+
+
+def _classify_pages(decisions, path, reader, pages, ocr, skip_text, texts=None):
+    """
+    ページごとのOCR要否のリストを返す
+    texts: dictを渡すと，判定で抽出したテキストをOCRしないページについて (path, i) ごとに残す（全文検索索引用）
+    """
+    page_ocr = []
+    for i in pages:
+        if not ocr or not skip_text:
+            page_ocr.append(ocr)
+            continue
+        with stage("classify", path=path, page=i):
+            text = page_text(reader.pages[i]) if texts is not None else None
+            needs_ocr = decisions.classify(path, i, reader.pages[i], text=text) == OCR
+        if text is not None and not needs_ocr:
+            texts[(path, i)] = text
+        page_ocr.append(needs_ocr)
+    return page_ocr
+
+
+def _blank_detector(blank_detector, engine):
+    # 白紙の判定は描画にpdf2image・numpyを使うため，必要になったときに読み込む
+    if blank_detector is None:
+        from .blank import BlankDetector
+        blank_detector = BlankDetector(poppler_path=getattr(engine, "poppler_path", None))
+    return blank_detector
+
+
+def _find_blank(detector, decisions, path, reader, pages, password_cache):
+    """
+    pages のうち白紙のページ番号の集合を返す（判定結果に BLANK として記録する）
+    """
+    if not pages:
+        return set()
+    password = password_cache.get(path) if reader.is_encrypted else None
+    blank = detector.blank_pages(path, reader, pages, password)
+    for i in blank:
+        decisions.mark(path, i, BLANK)
+    return set(blank)
+
+
+def _skip_blank(detector, decisions, path, reader, pages, page_ocr, password_cache):
+    # OCR対象のページのうち，白紙のものはOCRせずにそのまま使う
+    candidates = [i for i, needs_ocr in zip(pages, page_ocr) if needs_ocr]
+    blank = _find_blank(detector, decisions, path, reader, candidates, password_cache)
+    return [needs_ocr and i not in blank for i, needs_ocr in zip(pages, page_ocr)]
+
+
+def _dropped_summary(summary, dropped):
+    if dropped:
+        summary["dropped_pages"] = [{"file": path, "page": i + 1} for path, i in dropped]
+    return summary
+
+
+def _take_words(page, index, page_number):
+    # OCRページが持つ単語の位置を取り出し（出力PDFには残さない），索引があれば記録する
+    words = pop_words(page)
+    if index is not None:
+        index.add(page_number, page, words)
+    return words
+
+
+def _release_ocr_page(writer, page):
+    """
+    写し終えたOCRページの reader を書き出し側の対応表から外す
+    OCRページの reader は1ページごとに作って捨てるため，PyPDF2が reader を id() で区別する対応表に残すと，
+    後のページの reader が同じ id になったときに前のページのオブジェクト（別のページの中身）が使われてしまう
+    """
+    if hasattr(writer, "release"):
+        writer.release(page.pdf)  # mergewriter.StreamingPdfWriter
+    else:
+        writer.reset_translation(page.pdf)
+
+
+def _pop_text(texts, path, page_index):
+    return texts.pop((path, page_index), None) if texts is not None else None
+
+
+def _index_page(search_index, output_path, page_number, page, words=None, text=None):
+    # 出力ページのテキストを全文検索索引に登録予約する（OCRしたページは認識結果，それ以外は抽出済みか抽出する）
+    if search_index is None:
+        return
+    if words is not None:
+        text = words_text(words)
+    elif text is None:
+        text = page_text(page)
+    search_index.add_page(output_path, page_number, text)
+
+
+def merge(paths, output_path, page_ranges="", ocr=False, engine=None, skip_text=True, stream=False,
+          sidecar=None, search_index=None, skip_blank=True, drop_blank=False, blank_detector=None,
+          progress=None, cancel=None, **reader_options):
+    """
+    paths のPDFをこの順で1つに結合し，処理結果の概要（dict）を返す
+    page_ranges: 各ファイルから使うページ（「1,3,5-7」形式，空なら全ページ）
+    ocr: Trueならページごとにサーチャブル化（engine: engine.OcrEngine，省略時は既定設定）
+    skip_text: OCR時，テキストレイヤーのあるページはそのまま使う
+    stream: Trueならファイルごとにページを出力へ書き出して読み込みを解放する
+            （必要なメモリが合計ページ数ではなく最大の入力ファイルで決まる．中断時は出力を削除する）
+    sidecar: "json" / "tsv" なら，OCRしたページの単語の位置を出力PDFの横に書き出す（sidecar.WordIndex）
+    search_index: search.SearchIndex を渡すと，出力の全ページのテキストを出力ファイル・ページごとに登録する
+    skip_blank: OCR時，白紙のページ（スキャンした裏面など）はOCRせずにそのまま使う
+    drop_blank: 白紙のページを出力から除く（page_ranges で選んだページのうち白紙でないものだけを使う）
+    blank_detector: 白紙の判定（blank.BlankDetector，省略時は既定のしきい値）
+    progress(done, total): 出力ページごとの進捗
+    cancel: is_set() が真になったら Cancelled を送出して中止する
+    reader_options: open_reader に渡すパスワード関係の引数
+    """
+    started = time.perf_counter()
+    decisions = PageDecisionLog()
+    password_cache = reader_options.setdefault("password_cache", {})
+    plan = []  # (元PDF, reader（streamなら書き出し時に開き直す）, ページ番号のリスト, ページごとのOCR要否)
+    ocr_pages = []
+    dropped = []
+    texts = {} if search_index is not None else None
+    for path in paths:
+        check_cancel(cancel)
+        reader = open_reader(path, **reader_options)
+        pages = select_pages(page_ranges, len(reader.pages))
+        if drop_blank:
+            blank_detector = _blank_detector(blank_detector, engine)
+            blank = _find_blank(blank_detector, decisions, path, reader, pages, password_cache)
+            dropped.extend((path, i) for i in pages if i in blank)
+            pages = [i for i in pages if i not in blank]
+        page_ocr = _classify_pages(decisions, path, reader, pages, ocr, skip_text, texts)
+        if ocr and skip_blank and not drop_blank and any(page_ocr):
+            blank_detector = _blank_detector(blank_detector, engine)
+            page_ocr = _skip_blank(blank_detector, decisions, path, reader, pages, page_ocr, password_cache)
+        ocr_pages.extend((path, i) for i, needs_ocr in zip(pages, page_ocr) if needs_ocr)
+        plan.append((path, None if stream else reader, pages, page_ocr))
+        if stream:
+            del reader
+            gc.collect()
+    total = sum(len(pages) for _, _, pages, _ in plan)
+
+    if ocr_pages and engine is None:
+        from .engine import OcrEngine
+        engine = OcrEngine()
+    # OCR対象ページ（サーチャブルPDFページを並列にメモリ上で生成）を元の順に差し込む
+    if ocr_pages:
+        from .ocr import read_page_pdf
+        ocr_results = engine.ocr_pages(ocr_pages, password_cache)
+    index = WordIndex(output_path, sidecar) if sidecar else None
+    if search_index is not None:
+        search_index.discard(output_path)
+
+    def write_file(writer, path, reader, pages, page_ocr, done):
+        if reader is None:
+            reader = open_reader(path, **reader_options)
+        for i, needs_ocr in zip(pages, page_ocr):
+            check_cancel(cancel)
+            if needs_ocr:
+                page = read_page_pdf(next(ocr_results))
+                words = _take_words(page, index, done + 1)
+                _index_page(search_index, output_path, done + 1, page, words=words)
+            else:
+                page = reader.pages[i]
+                _index_page(search_index, output_path, done + 1, page, text=_pop_text(texts, path, i))
+            writer.add_page(page)
+            if needs_ocr:
+                _release_ocr_page(writer, page)
+            done += 1
+            if progress is not None:
+                progress(done, total)
+        if stream:
+            writer.release(reader)
+        return done
+
+    def write_pages(writer):
+        done = 0
+        for path, reader, pages, page_ocr in plan:
+            done = write_file(writer, path, reader, pages, page_ocr, done)
+            if stream:
+                # PdfReaderは循環参照を持つため，明示的に回収しないと読み込んだファイルがメモリに残り続ける
+                gc.collect()
+
+    ocr_started = time.perf_counter()
+    if stream:
+        from .mergewriter import StreamingPdfWriter
+        try:
+            with open(output_path, "wb") as f:
+                writer = StreamingPdfWriter(f)
+                write_pages(writer)
+                writer.close()
+        except BaseException:
+            os.remove(output_path)
+            raise
+    else:
+        writer = PdfWriter()
+        write_pages(writer)
+    decisions.ocr_seconds = time.perf_counter() - ocr_started
+    if not stream:
+        with stage("write", path=output_path, pages=total) as event, open(output_path, "wb") as f:
+            writer.write(f)
+            event["bytes_out"] = f.tell()
+    if search_index is not None:
+        search_index.commit(output_path)
+
+    summary = {
+        "operation": "merge",
+        "inputs": list(paths),
+        "outputs": [output_path],
+        "pages": total,
+        "input_pages": [len(pages) for _, _, pages, _ in plan],
+        "ocr": ocr,
+    }
+    if index is not None:
+        summary["sidecars"] = [index.write()]
+    _dropped_summary(summary, dropped)
+    _ocr_summary(summary, engine, decisions)
+    summary["seconds"] = time.perf_counter() - started
+    return summary
+
+
+def split(paths, output_dir=None, page_ranges="", template=None, ocr=False, engine=None, skip_text=True,
+          every=None, by_bookmark=False, workers=1, sidecar=None, search_index=None, skip_blank=True,
+          drop_blank=False, blank_detector=None, progress=None, cancel=None, **reader_options):
+    """
+    paths の各PDFを分割し，処理結果の概要（dict）を返す
+    既定は1ページずつ，every=N でNページごと，by_bookmark=True で最上位のしおりごとに1ファイルにまとめる
+    （まとめたファイルではフォント・画像などの共有リソースが1回だけ書き出される）
+    出力先は output_dir（省略時は元ファイルと同じフォルダ）に template（省略時は分割方法ごとの既定）で決まる名前
+    workers: OCRしない分割で，出力ファイルの書き出しに使うプロセス数（1，または合計が splitter.PARALLEL_MIN_PAGES
+             ページ未満ならその場で書き出す．OCRの並列数は engine の workers）
+    sidecar: OCRしたページのある出力ごとに，単語の位置の索引を書き出す
+    search_index: 出力ファイルごとに全ページのテキストを全文検索索引へ登録する
+    drop_blank: 白紙のページを除いてから分割する（every=N は白紙を除いたNページごと，白紙だけのしおりは出力しない）
+    その他の引数は merge と同じ
+    """
+    started = time.perf_counter()
+    decisions = PageDecisionLog()
+    if template is None:
+        template = DEFAULT_BOOKMARK_TEMPLATE if by_bookmark else DEFAULT_CHUNK_TEMPLATE if every else DEFAULT_SPLIT_TEMPLATE
+    password_cache = reader_options.setdefault("password_cache", {})
+    # 先に全ファイルの出力ページを確定し，OCRは1つのプロセスプールでまとめて流す
+    split_jobs = []  # (元PDF, reader, ページ番号のリスト, ページごとのOCR要否, 出力先)
+    dropped = []
+    texts = {} if search_index is not None else None
+    for path in paths:
+        check_cancel(cancel)
+        reader = open_reader(path, **reader_options)
+        pages = select_pages(page_ranges, len(reader.pages))
+        if drop_blank:
+            blank_detector = _blank_detector(blank_detector, engine)
+            blank = _find_blank(blank_detector, decisions, path, reader, pages, password_cache)
+            dropped.extend((path, i) for i in pages if i in blank)
+            pages = [i for i in pages if i not in blank]
+        groups = page_groups(reader, pages, every=every, by_bookmark=by_bookmark)
+        for index, (pages, title) in enumerate(groups, start=1):
+            page_ocr = _classify_pages(decisions, path, reader, pages, ocr, skip_text, texts)
+            if ocr and skip_blank and not drop_blank and any(page_ocr):
+                blank_detector = _blank_detector(blank_detector, engine)
+                page_ocr = _skip_blank(blank_detector, decisions, path, reader, pages, page_ocr, password_cache)
+            out_path = format_output_path(template, path, output_dir, page=pages[0]+1, last=pages[-1]+1,
+                                          index=index, title=safe_filename(title))
+            split_jobs.append((path, reader, pages, page_ocr, out_path))
+
+    total = sum(len(pages) for _, _, pages, _, _ in split_jobs)
+    ocr_pages = [(path, i) for path, _, pages, page_ocr, _ in split_jobs for i, needs_ocr in zip(pages, page_ocr) if needs_ocr]
+    if ocr_pages and engine is None:
+        from .engine import OcrEngine
+        engine = OcrEngine()
+    if ocr_pages:
+        from .ocr import read_page_pdf
+        ocr_results = engine.ocr_pages(ocr_pages, password_cache)
+    ocr_started = time.perf_counter()
+    done = 0
+    sidecars = []
+    if workers > 1 and not ocr_pages and len(split_jobs) > 1 and total >= PARALLEL_MIN_PAGES:
+        # 元PDFを各プロセスで開き直して書き出す（暗号化PDFは復号に使ったパスワードを渡す）
+        jobs = [(path, password_cache.get(path) if reader.is_encrypted else None, pages, out_path)
+                for path, reader, pages, _, out_path in split_jobs]
+        results = write_parallel(write_tasks(jobs, workers), workers)
+        try:
+            for written in results:
+                check_cancel(cancel)
+                done += written
+                if progress is not None:
+                    progress(done, total)
+        finally:
+            results.close()
+        if search_index is not None:
+            # 書き出しは別プロセスのため，テキストはこのプロセスで開いている元PDFから登録する
+            for path, reader, pages, _, out_path in split_jobs:
+                search_index.discard(out_path)
+                for number, i in enumerate(pages, start=1):
+                    _index_page(search_index, out_path, number, reader.pages[i], text=_pop_text(texts, path, i))
+                search_index.commit(out_path)
+    else:
+        for path, reader, pages, page_ocr, out_path in split_jobs:
+            check_cancel(cancel)
+            writer = PdfWriter()
+            index = WordIndex(out_path, sidecar) if sidecar else None
+            if search_index is not None:
+                search_index.discard(out_path)
+            for number, (i, needs_ocr) in enumerate(zip(pages, page_ocr), start=1):
+                if needs_ocr:
+                    page = read_page_pdf(next(ocr_results))
+                    words = _take_words(page, index, number)
+                    _index_page(search_index, out_path, number, page, words=words)
+                else:
+                    page = reader.pages[i]
+                    _index_page(search_index, out_path, number, page, text=_pop_text(texts, path, i))
+                writer.add_page(page)
+                if needs_ocr:
+                    _release_ocr_page(writer, page)
+            with stage("write", path=out_path, pages=len(pages)) as event, open(out_path, "wb") as f:
+                writer.write(f)
+                event["bytes_out"] = f.tell()
+            if search_index is not None:
+                search_index.commit(out_path)
+            if index is not None and index.pages:
+                sidecars.append(index.write())
+            done += len(pages)
+            if progress is not None:
+                progress(done, total)
+    decisions.ocr_seconds = time.perf_counter() - ocr_started
+
+    summary = {
+        "operation": "split",
+        "inputs": list(paths),
+        "outputs": [out_path for _, _, _, _, out_path in split_jobs],
+        "pages": total,
+        "ocr": ocr,
+    }
+    if sidecar:
+        summary["sidecars"] = sidecars
+    _dropped_summary(summary, dropped)
+    _ocr_summary(summary, engine, decisions)
+    summary["seconds"] = time.perf_counter() - started
+    return summary
+
+
+def ocr(paths, output_dir=None, template=DEFAULT_OCR_TEMPLATE, progress=None, cancel=None, passwords=(),
+        password_cache=None, ask_password=None, credentials=None, **ocr_options):
+    """
+    paths の各PDFを丸ごとOCRしてサーチャブルPDFを出力し，処理結果の概要（dict）を返す
+    progress(done, total): ファイルごとのページ進捗
+    cancel: is_set() が真になったら Cancelled を送出して中止する
+    passwords, password_cache, ask_password, credentials: 暗号化PDFのパスワード（open_reader と同じ．
+        確かめたパスワードを画像化の pdftoppm に渡す）
+    ocr_options: streaming.ocr_pdf に渡す引数（lang, dpi, backend, cache など）
+    """
+    from .streaming import ocr_pdf
+    started = time.perf_counter()
+    password_cache = {} if password_cache is None else password_cache
+    outputs = []
+    sidecars = []
+    total_pages = 0
+    for path in paths:
+        check_cancel(cancel)
+        reader = open_reader(path, passwords, password_cache, ask_password, credentials)
+        password = password_cache.get(path) if reader.is_encrypted else None
+        del reader
+        out_path = format_output_path(template, path, output_dir)
+        result = ocr_pdf(path, out_path, progress=progress, cancel=cancel, password=password, **ocr_options)
+        outputs.append(out_path)
+        sidecars.extend(result.get("sidecars", []))
+        total_pages += result["pages"]
+    summary = {
+        "operation": "ocr",
+        "inputs": list(paths),
+        "outputs": outputs,
+        "pages": total_pages,
+        "ocr": True,
+    }
+    if ocr_options.get("sidecar"):
+        summary["sidecars"] = sidecars
+    if ocr_options.get("cache") is not None:
+        summary.update(ocr_options["cache"].summary())
+    summary["seconds"] = time.perf_counter() - started
+    return summary
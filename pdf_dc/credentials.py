@@ -0,0 +1,178 @@
+"""
+暗号化PDFのパスワードの事前確認と記憶
+結合・分割の前に全入力を並列に開いて暗号化の有無を調べ，候補のパスワードを各ファイルに並列に試す。
+分かったパスワードは {path: password}（core.open_reader の password_cache）に入れるため，処理中に問い合わせが出ない。
+成功したパスワードは，ファイル名の変更・移動に左右されないよう文書ID（トレーラーの /ID）をキーに
+keyring（OSの資格情報ストア）へ保存し，次回以降は入力しなくてよい（keyring が無ければ実行中だけ記憶する）
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from PyPDF2 import PdfReader
+
+try:
+    import keyring
+except ImportError:
+    keyring = None
+
+from .core import check_cancel
+
+# keyring に登録するサービス名
+KEYRING_SERVICE = "pdf_dc"
+
+
+def document_id(reader):
+    """
+    文書ID（トレーラーの /ID の1つ目の16進文字列，無ければNone）
+    暗号化PDFでは /ID が鍵の計算に使われるため必ずあり，パスやファイル名が変わっても同じ
+    """
+    try:
+        ids = reader.trailer.get("/ID")
+        first = ids[0].get_object() if ids else None
+    except Exception:
+        return None
+    if first is None:
+        return None
+    data = first.original_bytes if hasattr(first, "original_bytes") else str(first).encode("latin-1", "replace")
+    return data.hex() or None
+
+
+class CredentialStore:
+    """
+    文書IDごとのパスワード
+    persist: 真なら keyring に保存する（keyring が無い・偽なら実行中だけ記憶する）
+    プロセス間で受け渡せるよう，keyring のほかは記憶した辞書だけを持つ
+    """
+
+    def __init__(self, persist=True, service=KEYRING_SERVICE):
+        self.persist = persist and keyring is not None
+        self.service = service
+        self._memory = {}
+
+    def get(self, doc_id):
+        if not doc_id:
+            return None
+        if doc_id in self._memory:
+            return self._memory[doc_id]
+        if self.persist:
+            try:
+                return keyring.get_password(self.service, doc_id)
+            except Exception:
+                return None  # 資格情報ストアが使えない環境では記憶していないものとして扱う
+        return None
+
+    def set(self, doc_id, password):
+        if not doc_id:
+            return
+        self._memory[doc_id] = password
+        if self.persist:
+            try:
+                keyring.set_password(self.service, doc_id, password)
+            except Exception:
+                pass
+
+    def set_persist(self, persist):
+        # keyring に保存するかを切り替える（実行中に記憶したパスワードはそのまま使う）
+        self.persist = persist and keyring is not None
+
+    def forget(self, doc_id):
+        self._memory.pop(doc_id, None)
+        if self.persist:
+            try:
+                keyring.delete_password(self.service, doc_id)
+            except Exception:
+                pass
+
+
+def _try_passwords(reader, candidates):
+    for pwd in candidates:
+        try:
+            if reader.decrypt(pwd) != 0:
+                return pwd
+        except Exception:
+            return None  # 未対応の暗号方式（AESに必要なライブラリが無い場合など）
+    return None
+
+
+def _probe(task):
+    """
+    1ファイルを開き {"path", "encrypted", "doc_id", "password"} を返す（作業プロセスで実行）
+    記憶したパスワード，候補のパスワードの順に試す（どれも合わなければ password はNone）
+    """
+    path, passwords, credentials = task
+    try:
+        reader = PdfReader(path)
+        if not reader.is_encrypted:
+            return {"path": path, "encrypted": False, "doc_id": None, "password": None}
+    except Exception as e:
+        return {"path": path, "encrypted": False, "doc_id": None, "password": None, "error": str(e)}
+    doc_id = document_id(reader)
+    stored = credentials.get(doc_id) if credentials is not None else None
+    candidates = ([stored] if stored else []) + [pwd for pwd in passwords if pwd != stored]
+    password = _try_passwords(reader, candidates)
+    return {"path": path, "encrypted": True, "doc_id": doc_id, "password": password,
+            "remembered": password is not None and password == stored}
+
+
+def _run_probes(tasks, workers, cancel):
+    if workers == 1 or len(tasks) <= 1:
+        for task in tasks:
+            check_cancel(cancel)
+            yield _probe(task)
+        return
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+        futures = [executor.submit(_probe, task) for task in tasks]
+        try:
+            for future in futures:
+                check_cancel(cancel)
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def prescan(paths, passwords=(), credentials=None, password_cache=None, workers=None, cancel=None):
+    """
+    全入力の暗号化の有無を並列に調べ，記憶したパスワード・passwords を試し，結果の概要（dict）を返す
+    {"encrypted": 暗号化された入力, "unlocked": 開けた入力, "locked": パスワードの分からない入力,
+     "errors": {開けなかった入力: エラー}, "doc_ids": {暗号化された入力: 文書ID}, "seconds": 所要秒数}
+    password_cache: 開けた入力のパスワードを {path: password} で記録する（core.open_reader に渡す辞書）
+    credentials: CredentialStore（開けたパスワードを文書IDで記憶する）
+    """
+    started = time.perf_counter()
+    workers = max(1, workers or os.cpu_count() or 1)
+    password_cache = {} if password_cache is None else password_cache
+    summary = {"encrypted": [], "unlocked": [], "locked": [], "errors": {}, "doc_ids": {}}
+    tasks = []
+    for path in dict.fromkeys(paths):
+        known = password_cache.get(path)
+        tasks.append((path, ([known] if known else []) + list(passwords), credentials))
+    for result in _run_probes(tasks, workers, cancel):
+        path = result["path"]
+        if "error" in result:
+            summary["errors"][path] = result["error"]
+        if not result["encrypted"]:
+            continue
+        summary["encrypted"].append(path)
+        summary["doc_ids"][path] = result["doc_id"]
+        if result["password"] is None:
+            summary["locked"].append(path)
+            continue
+        summary["unlocked"].append(path)
+        password_cache[path] = result["password"]
+        if credentials is not None and not result["remembered"]:
+            credentials.set(result["doc_id"], result["password"])
+    summary["seconds"] = time.perf_counter() - started
+    return summary
+
+
+def try_password(paths, password, credentials=None, password_cache=None, workers=None, cancel=None):
+    """
+    1つのパスワードを paths（prescan の locked）に並列に試し，開けた入力のリストを返す
+    （同じ相手から届いた書類は同じパスワードのことが多いため，1回の入力でまとめて開く）
+    """
+    password_cache = {} if password_cache is None else password_cache
+    summary = prescan(paths, [password], credentials=credentials, password_cache=password_cache, workers=workers,
+                      cancel=cancel)
+    return summary["unlocked"]
@@ -0,0 +1,146 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from . import profiling
+from .cache import iter_cached_pages
+from .ocr import PAGE_BACKENDS, DEFAULT_PAGE_BACKEND, OCR_DPI, IMAGE_PROFILES, DEFAULT_IMAGE_PROFILE, make_ocr_page
+from .options import DEFAULT_WORKERS
+from .pool import submit_bounded
+from .preprocess import MIN_OCR_DPI, check_steps, ocr_variant, page_dpis
+from .recognizer import DEFAULT_RECOGNIZER, get_recognizer, resolve_kind, set_recognizer_kind
+from .raster import DocumentRasterizer, DEFAULT_BATCH_SIZE, iter_page_runs
+
+
+def _init_worker(tesseract_threads, recognizer="auto", lang=None, profile_options=None):
+    # tesseract内部のOpenMPスレッド数を制限（プロセス並列と二重に並列化しないため）
+    if tesseract_threads:
+        os.environ["OMP_THREAD_LIMIT"] = str(tesseract_threads)
+    # 親プロセスで計測中なら，このプロセスの処理も記録する（記録は結果と一緒に返す）
+    profiling.start_worker(profile_options)
+    # 言語データは起動時に1度だけ読み込み，以降のページで使い回す
+    set_recognizer_kind(recognizer)
+    if lang:
+        try:
+            get_recognizer(lang)
+        except Exception:
+            pass  # 読み込みの失敗は最初のページの処理でエラーとして報告される
+
+
+def _ocr_task(task):
+    # 連続したページ範囲を1回で画像化し，1ページずつOCRへ流す
+    # 解像度を自動調整する場合は，ページごとの解像度をワーカー側で求める
+    # (ページのPDFのリスト, 作業プロセスで計測した記録) を返す
+    pdf_path, password, page_indices, lang, poppler_path, dpi, backend, profile, adaptive, min_dpi, preprocess = task
+    dpis = page_dpis(pdf_path, page_indices, dpi, min_dpi, password) if adaptive else {}
+    rasterizer = DocumentRasterizer(pdf_path, dpi=dpi, batch_size=len(page_indices), poppler_path=poppler_path,
+                                    password=password)
+    pages = [make_ocr_page(backend, image, path=pdf_path, page=i, lang=lang, dpi=dpis.get(i, dpi), profile=profile,
+                           preprocess=preprocess)
+             for i, image in rasterizer.iter_pages(page_indices, dpis)]
+    return pages, profiling.drain_worker()
+
+
+def _task_pages(result):
+    # _ocr_task の結果からページを取り出し，作業プロセスの計測の記録を親の Profiler に加える
+    pages, events = result
+    if events and profiling.active():
+        profiling.current().add(events)
+    return pages
+
+
+def _group_by_file(pages):
+    # (pdf_path, page_index) の列を，同じファイルが続く区間ごとにまとめる
+    current_path, indices = None, []
+    for path, i in pages:
+        if indices and path != current_path:
+            yield current_path, indices
+            indices = []
+        current_path = path
+        indices.append(i)
+    if indices:
+        yield current_path, indices
+
+
+class OcrEngine:
+    """
+    ページ単位のOCRを複数プロセスに振り分け，結果をページ順に返す
+    workers=1 のときはプロセスを起動せず，従来通りその場で処理する
+    画像化はファイルごとの連続ページ範囲（最大batch_sizeページ）単位でまとめて行う
+    backend: OCRページの生成方式（ocr.PAGE_BACKENDS のキー）
+    profile: 埋め込む画像の圧縮方法（ocr.IMAGE_PROFILES のキー，認識の解像度dpiとは別に選べる）
+    cache: cache.OcrCache を渡すと，キャッシュ済みのページは画像化・OCRせずに返す
+    adaptive_dpi: 真なら埋め込み画像の解像度に合わせ，ページごとに min_dpi〜dpi の範囲で描画する
+    preprocess: OCR前の画像処理（preprocess.PREPROCESS_STEPS の組み合わせ）
+    recognizer: 文字認識エンジン（recognizer.RECOGNIZERS のいずれか，autoならtesserocrがあれば常駐させる．
+                backend が tesseract の場合は使わず，ページごとにtesseractを起動する）
+    """
+
+    def __init__(self, workers=None, tesseract_threads=1, lang='jpn+eng', poppler_path=None,
+                 dpi=OCR_DPI, batch_size=DEFAULT_BATCH_SIZE, backend=DEFAULT_PAGE_BACKEND,
+                 cache=None, profile=DEFAULT_IMAGE_PROFILE, adaptive_dpi=False, min_dpi=MIN_OCR_DPI,
+                 preprocess=(), recognizer=DEFAULT_RECOGNIZER):
+        if backend not in PAGE_BACKENDS:
+            raise ValueError(f"未対応のOCR出力方式です: {backend}")
+        if profile not in IMAGE_PROFILES:
+            raise ValueError(f"未対応の画像圧縮方法です: {profile}")
+        check_steps(preprocess)
+        resolve_kind(recognizer)
+        self.workers = max(1, workers or DEFAULT_WORKERS)
+        self.tesseract_threads = tesseract_threads
+        self.lang = lang
+        self.poppler_path = poppler_path
+        self.dpi = dpi
+        self.batch_size = max(1, batch_size)
+        self.backend = backend
+        self.cache = cache
+        self.profile = profile
+        self.adaptive_dpi = adaptive_dpi
+        self.min_dpi = min_dpi
+        self.preprocess = tuple(preprocess)
+        self.recognizer = recognizer
+
+    def _task(self, path, page_indices, passwords=None):
+        password = passwords.get(path) if passwords else None
+        return (path, password, page_indices, self.lang, self.poppler_path, self.dpi, self.backend, self.profile,
+                self.adaptive_dpi, self.min_dpi, self.preprocess)
+
+    def _tasks(self, pages, passwords=None):
+        for path, indices in _group_by_file(pages):
+            # ページ数の少ないファイルでも全ワーカーに仕事が行き渡るよう範囲を細かくする
+            batch_size = min(self.batch_size, max(1, math.ceil(len(indices) / self.workers)))
+            for run in iter_page_runs(indices, batch_size):
+                yield self._task(path, run, passwords)
+
+    def ocr_pages(self, pages, passwords=None):
+        """
+        pages: (pdf_path, page_index) の列
+        passwords: パスワード付きPDFの {pdf_path: password}（core.open_reader の password_cache）
+        各ページのサーチャブルPDF（bytes）を入力と同じ順に返すジェネレータ
+        """
+        # このプロセスで処理するページ（逐次処理・キャッシュから追い出されたページ）用
+        set_recognizer_kind(self.recognizer)
+        if self.cache is None:
+            return self._ocr_pages(pages, passwords)
+        return iter_cached_pages(
+            self.cache, list(pages),
+            key_for=lambda path, i: self.cache.page_key(path, i, self.dpi, self.lang, self.backend, self.profile,
+                                                        ocr_variant(self.adaptive_dpi, self.min_dpi, self.preprocess)),
+            ocr_misses=lambda misses: self._ocr_pages(misses, passwords),
+            ocr_one=lambda path, i: _task_pages(_ocr_task(self._task(path, [i], passwords)))[0],
+        )
+
+    def _ocr_pages(self, pages, passwords=None):
+        tasks = self._tasks(pages, passwords)
+        if self.workers == 1:
+            for task in tasks:
+                yield from _task_pages(_ocr_task(task))
+            return
+
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.tesseract_threads, self.recognizer, self.lang, profiling.worker_options()),
+        ) as executor:
+            for result in submit_bounded(executor, _ocr_task, tasks, self.workers):
+                yield from _task_pages(result)
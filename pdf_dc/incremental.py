@@ -0,0 +1,185 @@
+"""
+差分結合（フォルダの毎日の結合で，前回から変わっていないファイルは処理し直さない）
+出力PDFの横に入力の一覧（パス・サイズ・更新日時・内容のハッシュ・出力中のページ位置）を manifest として残し，
+次回は変わっていない入力のページを前回の出力からそのまま使い，新しい・変わった入力だけを結合（OCR）して差し込む
+"""
+import json
+import os
+import time
+
+from PyPDF2 import PdfReader, PdfWriter
+
+from .core import check_cancel, merge
+from .profiling import stage
+from .scratch import scratch_dir
+from .search import page_text
+
+MANIFEST_VERSION = 1
+
+
+def manifest_path(output_path):
+    return f"{output_path}.manifest.json"
+
+
+def _stat(path):
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def _options(page_ranges, ocr, skip_text, engine, skip_blank=True, drop_blank=False):
+    # 出力の内容に影響する設定（変わったら前回の出力は使わない）
+    options = {"page_ranges": page_ranges, "ocr": ocr, "skip_text": skip_text, "drop_blank": drop_blank}
+    if ocr:
+        options["skip_blank"] = skip_blank
+        for name in ("lang", "dpi", "backend", "profile", "adaptive_dpi", "min_dpi", "preprocess"):
+            value = getattr(engine, name, None)
+            options[name] = list(value) if isinstance(value, tuple) else value
+    return options
+
+
+def load_manifest(output_path, options):
+    """
+    前回の manifest を返す（無い・設定が違う・出力PDFが書き換えられている場合はNone）
+    """
+    try:
+        with open(manifest_path(output_path), encoding="utf-8") as f:
+            manifest = json.load(f)
+        if (manifest.get("version") != MANIFEST_VERSION or manifest.get("options") != options
+                or list(_stat(output_path)) != manifest["output"]):
+            return None
+        return manifest
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _write_manifest(output_path, options, entries):
+    manifest = {"version": MANIFEST_VERSION, "options": options, "output": list(_stat(output_path)), "inputs": entries}
+    tmp = manifest_path(output_path) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, manifest_path(output_path))
+
+
+def _find_previous(path, size, mtime_ns, previous):
+    """
+    前回の入力のうち path と同じ内容のもの（無ければNone）と，path のハッシュ（計算した場合）を返す
+    パス・サイズ・更新日時が同じならハッシュは計算しない．名前を変えただけのファイルもハッシュで見つける
+    """
+    from .cache import file_digest
+    entry = previous.get(os.path.abspath(path))
+    if entry and (entry["size"], entry["mtime_ns"]) == (size, mtime_ns):
+        return entry, entry["sha256"]
+    digest = file_digest(path)
+    for entry in previous.values():
+        if entry["sha256"] == digest and entry["size"] == size:
+            return entry, digest
+    return None, digest
+
+
+def merge_incremental(paths, output_path, page_ranges="", ocr=False, engine=None, skip_text=True,
+                      skip_blank=True, drop_blank=False, search_index=None, progress=None, cancel=None,
+                      **reader_options):
+    """
+    core.merge と同じ結果を，前回の出力（output_path とその manifest）を再利用して作り，処理結果の概要を返す
+    前回から変わっていない入力はページを前回の出力から写すだけで，開き直し・OCRをしない
+    入力の並び・増減は paths の通りに反映する（前回にあって今回無い入力は出力から消える）
+    progress(done, total): 新しい・変わった入力の結合の進捗
+    その他の引数は core.merge と同じ
+    """
+    started = time.perf_counter()
+    if ocr and engine is None:
+        from .engine import OcrEngine
+        engine = OcrEngine()
+    options = _options(page_ranges, ocr, skip_text, engine, skip_blank, drop_blank)
+    manifest = load_manifest(output_path, options) if os.path.exists(output_path) else None
+    previous = {entry["path"]: entry for entry in manifest["inputs"]} if manifest else {}
+
+    plan = []  # (入力, サイズ, 更新日時, ハッシュ, 前回のentry（変わっていれば None）)
+    for path in paths:
+        check_cancel(cancel)
+        size, mtime_ns = _stat(path)
+        entry, digest = _find_previous(path, size, mtime_ns, previous)
+        plan.append((path, size, mtime_ns, digest, entry))
+    changed = [path for path, _, _, _, entry in plan if entry is None]
+    reused = len(plan) - len(changed)
+
+    if manifest and not changed and [entry["start"] for *_, entry in plan] == [e["start"] for e in manifest["inputs"]]:
+        # 入力も並びも前回と同じなら出力はそのまま（名前の変更・更新日時だけの変更は manifest に反映する）
+        page_counts = [entry["pages"] for *_, entry in plan]
+        summary = {}
+    elif not reused:
+        summary = merge(paths, output_path, page_ranges=page_ranges, ocr=ocr, engine=engine, skip_text=skip_text,
+                        skip_blank=skip_blank, drop_blank=drop_blank, search_index=search_index, progress=progress,
+                        cancel=cancel, **reader_options)
+        page_counts = summary["input_pages"]
+    else:
+        with scratch_dir(prefix="pdf_dc_incremental_") as work_dir:
+            part_path = os.path.join(work_dir, "changed.pdf")
+            summary = {}
+            if changed:
+                summary = merge(changed, part_path, page_ranges=page_ranges, ocr=ocr, engine=engine,
+                                skip_text=skip_text, skip_blank=skip_blank, drop_blank=drop_blank,
+                                search_index=search_index, progress=progress, cancel=cancel, **reader_options)
+            page_counts = _splice(plan, output_path, part_path if changed else None, summary.get("input_pages", []),
+                                  search_index, cancel)
+
+    entries, start = [], 0
+    for (path, size, mtime_ns, digest, _), pages in zip(plan, page_counts):
+        entries.append({"path": os.path.abspath(path), "size": size, "mtime_ns": mtime_ns,
+                        "sha256": digest, "start": start, "pages": pages})
+        start += pages
+    _write_manifest(output_path, options, entries)
+
+    summary.pop("input_pages", None)
+    summary.update({
+        "operation": "merge",
+        "inputs": list(paths),
+        "outputs": [output_path],
+        "pages": sum(page_counts),
+        "ocr": ocr,
+        "reused_files": reused,
+        "processed_files": len(changed),
+    })
+    summary["seconds"] = time.perf_counter() - started
+    return summary
+
+
+def _splice(plan, output_path, part_path, part_counts, search_index, cancel):
+    """
+    前回の出力のページと，新しく結合した part_path のページを plan の順に並べて output_path を書き直す
+    入力ごとのページ数のリストを返す
+    """
+    previous = PdfReader(output_path)
+    part = PdfReader(part_path) if part_path else None
+    old_texts = new_texts = {}
+    if search_index is not None:
+        # 再利用するページのテキストは前回の登録から，新しいページは part の登録から写す
+        old_texts = search_index.page_texts(output_path)
+        if part_path:
+            new_texts = search_index.page_texts(part_path)
+            search_index.remove(part_path)
+        search_index.discard(output_path)
+    writer = PdfWriter()
+    counts, part_counts, part_start = [], iter(part_counts), 0
+    for _, _, _, _, entry in plan:
+        check_cancel(cancel)
+        if entry is not None:
+            source, first, count, texts = previous, entry["start"], entry["pages"], old_texts
+        else:
+            source, first, count, texts = part, part_start, next(part_counts), new_texts
+            part_start += count
+        for i in range(first, first + count):
+            page = source.pages[i]
+            writer.add_page(page)
+            if search_index is not None:
+                text = texts.get(i + 1)
+                search_index.add_page(output_path, len(writer.pages), page_text(page) if text is None else text)
+        counts.append(count)
+    tmp = output_path + ".tmp"
+    with stage("write", path=output_path, pages=len(writer.pages)) as event, open(tmp, "wb") as f:
+        writer.write(f)
+        event["bytes_out"] = f.tell()
+    os.replace(tmp, output_path)
+    if search_index is not None:
+        search_index.commit(output_path)
+    return counts
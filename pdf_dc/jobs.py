@@ -0,0 +1,132 @@
+import queue
+import threading
+import time
+
+from .core import Cancelled
+
+
+class ProgressTracker:
+    """
+    処理済みページ数から，1秒あたりのページ数と残り時間を求める
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+
+    def describe(self, done, total):
+        elapsed = time.perf_counter() - self.started
+        rate = done / elapsed if elapsed > 0 else 0.0
+        eta = (total - done) / rate if rate > 0 else None
+        return {"done": done, "total": total, "pages_per_second": rate, "eta_seconds": eta}
+
+
+def format_progress(info):
+    text = f"{info['done']}/{info['total']}ページ  {info['pages_per_second']:.1f}ページ/秒"
+    if info["eta_seconds"] is not None:
+        minutes, seconds = divmod(int(info["eta_seconds"]), 60)
+        text += f"  残り約{minutes}分{seconds:02d}秒"
+    return text
+
+
+class JobRunner:
+    """
+    時間のかかる処理を作業スレッドで実行し，進捗・結果をキュー経由でTkのメインスレッドに渡す
+    （Tkウィジェットやmessageboxには作業スレッドから触らない）
+
+    widget: after() を持つTkウィジェット（キューの監視に使う）
+    on_progress(info): 進捗（ProgressTracker.describe の辞書）
+    on_done(result) / on_error(exception) / on_cancel(): 終了時の処理（メインスレッドで呼ばれる）
+    """
+
+    def __init__(self, widget, on_progress=None, on_done=None, on_error=None, on_cancel=None, poll_ms=100):
+        self.widget = widget
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_cancel = on_cancel
+        self.poll_ms = poll_ms
+        self.cancel_event = threading.Event()
+        self._queue = queue.Queue()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, func, *args, **kwargs):
+        """
+        func(*args, progress=..., cancel=..., **kwargs) を作業スレッドで実行する
+        """
+        if self.running:
+            raise RuntimeError("前の処理が終わっていません")
+        self.cancel_event = threading.Event()
+        tracker = ProgressTracker()
+
+        def progress(done, total):
+            self._queue.put(("progress", tracker.describe(done, total)))
+
+        def work():
+            try:
+                result = func(*args, progress=progress, cancel=self.cancel_event, **kwargs)
+                self._queue.put(("done", result))
+            except Cancelled:
+                self._queue.put(("cancel", None))
+            except Exception as e:
+                self._queue.put(("error", e))
+
+        self._thread = threading.Thread(target=work, daemon=True)
+        self._thread.start()
+        self.widget.after(self.poll_ms, self._poll)
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def call_in_ui(self, func, *args):
+        """
+        作業スレッドから，メインスレッドで func(*args) を実行して結果を受け取る（ダイアログ表示用）
+        """
+        done = threading.Event()
+        box = {}
+
+        def call():
+            try:
+                box["result"] = func(*args)
+            except Exception as e:
+                box["error"] = e
+            finally:
+                done.set()
+
+        self._queue.put(("call", call))
+        done.wait()
+        if "error" in box:
+            raise box["error"]
+        return box.get("result")
+
+    def _poll(self):
+        finished = False
+        last_progress = None
+        try:
+            while True:
+                kind, payload = self._queue.get_nowait()
+                if kind == "progress":
+                    last_progress = payload  # 溜まった進捗は最新の1件だけ反映する
+                elif kind == "call":
+                    payload()
+                else:
+                    finished = True
+                    break
+        except queue.Empty:
+            pass
+        if last_progress is not None and self.on_progress:
+            self.on_progress(last_progress)
+        if not finished:
+            self.widget.after(self.poll_ms, self._poll)
+            return
+        # 終了の通知は作業スレッドの最後に届くため，終わるのを待ってから呼ぶ（on_done から次の処理を始められる）
+        self._thread.join()
+        if kind == "done" and self.on_done:
+            self.on_done(payload)
+        elif kind == "error" and self.on_error:
+            self.on_error(payload)
+        elif kind == "cancel" and self.on_cancel:
+            self.on_cancel()
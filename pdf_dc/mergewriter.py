@@ -0,0 +1,125 @@
+"""
+ページを追加するたびに出力ファイルへ直接書き出すPDFライター（大量ページの結合用）
+PdfWriter はすべてのページとリソースを保持したまま最後に書き出すが，
+こちらは追加したページと参照先のオブジェクトをその場で書き出し，元のPdfReaderを手放せるようにする
+"""
+from collections import deque
+
+from PyPDF2.generic import (
+    ArrayObject, DictionaryObject, IndirectObject, NameObject, NullObject, NumberObject, StreamObject,
+)
+
+PAGES_ROOT = 1  # ページツリーのルートのオブジェクト番号（最後に書き出す）
+
+
+class StreamingPdfWriter:
+    """
+    stream: 書き込み用に開いたバイナリファイル
+    同じPdfReaderのページ間で共有されるフォント・画像などは1回だけ書き出す
+    PdfReaderのページを追加し終えたら release(reader) を呼ぶ（対応表を捨てて読み込み側を解放できる）
+    ページ同士のリンクなど，出力に含まれないページ・ページツリーへの参照は null にする
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._offsets = [None, None]  # オブジェクト番号ごとの書き出し位置（0は未使用，1はページツリー）
+        self._kids = []
+        self._sources = {}  # id(reader) -> (reader, {(元の番号, 世代): 新しい番号})
+        self._pending = deque()
+        stream.write(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+
+    @property
+    def page_count(self):
+        return len(self._kids)
+
+    def _allocate(self):
+        self._offsets.append(None)
+        return len(self._offsets) - 1
+
+    def _refs(self, reader):
+        source = self._sources.get(id(reader))
+        if source is None:
+            source = self._sources[id(reader)] = (reader, {})
+        return source[1]
+
+    def _ref(self, indirect, refs):
+        key = (indirect.idnum, indirect.generation)
+        num = refs.get(key)
+        if num is None:
+            target = indirect.get_object()
+            if isinstance(target, DictionaryObject) and target.get("/Type") in ("/Page", "/Pages"):
+                return NullObject()
+            num = refs[key] = self._allocate()
+            self._pending.append((num, target))
+        return IndirectObject(num, 0, self)
+
+    def _translate(self, obj, refs):
+        # 間接参照を新しい番号に付け替えた複製を作る（数値・名前・文字列はそのまま）
+        if isinstance(obj, IndirectObject):
+            return self._ref(obj, refs)
+        if isinstance(obj, StreamObject):
+            copy = obj.__class__()
+            copy._data = obj._data
+            for key, value in dict.items(obj):
+                if key != "/Length":  # 書き出し時に実際の長さが入る
+                    copy[key] = self._translate(value, refs)
+            return copy
+        if isinstance(obj, DictionaryObject):
+            copy = DictionaryObject()
+            for key, value in dict.items(obj):
+                copy[key] = self._translate(value, refs)
+            return copy
+        if isinstance(obj, ArrayObject):
+            return ArrayObject(self._translate(value, refs) for value in obj)
+        return obj
+
+    def _write_object(self, num, obj):
+        self._offsets[num] = self._stream.tell()
+        self._stream.write(f"{num} 0 obj\n".encode())
+        obj.write_to_stream(self._stream, None)
+        self._stream.write(b"\nendobj\n")
+
+    def add_page(self, page):
+        """
+        PdfReaderのページ（PageObject）を追加し，ページと参照先のオブジェクトを書き出す
+        """
+        refs = self._refs(page.pdf)
+        ref = page.indirect_reference
+        num = self._allocate()
+        if ref is not None:
+            refs[(ref.idnum, ref.generation)] = num  # 注釈の /P などからの自ページへの参照
+        copy = DictionaryObject()
+        for key, value in dict.items(page):
+            if key != "/Parent":
+                copy[key] = self._translate(value, refs)
+        copy[NameObject("/Parent")] = IndirectObject(PAGES_ROOT, 0, self)
+        self._write_object(num, copy)
+        while self._pending:
+            pending_num, target = self._pending.popleft()
+            self._write_object(pending_num, self._translate(target, refs))
+        self._kids.append(IndirectObject(num, 0, self))
+
+    def release(self, reader):
+        self._sources.pop(id(reader), None)
+
+    def close(self):
+        """
+        ページツリー・カタログ・相互参照表を書き出して出力を完成させる（ファイルは閉じない）
+        """
+        self._sources.clear()
+        pages = DictionaryObject({
+            NameObject("/Type"): NameObject("/Pages"),
+            NameObject("/Kids"): ArrayObject(self._kids),
+            NameObject("/Count"): NumberObject(len(self._kids)),
+        })
+        self._write_object(PAGES_ROOT, pages)
+        catalog = self._allocate()
+        self._write_object(catalog, DictionaryObject({
+            NameObject("/Type"): NameObject("/Catalog"),
+            NameObject("/Pages"): IndirectObject(PAGES_ROOT, 0, self),
+        }))
+        xref = self._stream.tell()
+        lines = [f"xref\n0 {len(self._offsets)}\n", "0000000000 65535 f \n"]
+        lines.extend(f"{offset:010d} 00000 n \n" for offset in self._offsets[1:])
+        lines.append(f"trailer\n<< /Size {len(self._offsets)} /Root {catalog} 0 R >>\nstartxref\n{xref}\n%%EOF\n")
+        self._stream.write("".join(lines).encode())
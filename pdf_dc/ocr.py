@@ -0,0 +1,277 @@
+import contextlib
+import io
+
+from fpdf import FPDF
+from PIL import Image
+from PyPDF2 import PdfReader, PdfWriter, Transformation
+from pdf2image import convert_from_path
+from reportlab import rl_config
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+from reportlab.pdfgen import canvas
+from reportlab.lib.utils import ImageReader
+
+from . import recognizer
+from .options import DEFAULT_IMAGE_PROFILE, DEFAULT_PAGE_BACKEND, IMAGE_PROFILES, OCR_DPI, PAGE_BACKEND_NAMES
+from .profiling import stage
+from .preprocess import MIN_OCR_DPI, check_steps, ocr_variant, page_dpis, prepare_for_ocr, unwarp_words
+from .recognizer import tesseract_pdf_and_data
+from .sidecar import attach_words, page_pdf_text
+
+
+# --- Popplerパス（必要に応じて書き換えてください。Windowsのみ）---
+POPPLER_PATH = None  # 例: r"C:\tools\poppler-23.11.0\Library\bin"
+
+@contextlib.contextmanager
+def _binary_streams():
+    """
+    reportlabの既定ではストリームをASCII85で文字化して約25%大きくなるため，この間だけバイナリのまま書き出す
+    （設定はプロセス全体で共有のため，読み込んだだけで他のreportlabの利用者の出力を変えないよう，終わったら戻す）
+    """
+    saved = rl_config.useA85
+    rl_config.useA85 = 0
+    try:
+        yield
+    finally:
+        rl_config.useA85 = saved
+
+
+# 白黒2値化のしきい値（これより明るい画素を白にする）
+BILEVEL_THRESHOLD = 160
+# 見えないテキストに使う日本語フォント（reportlab付属のCIDフォント）
+TEXT_CID_FONT = "HeiseiKakuGo-W5"
+
+
+def encode_page_image(image, dpi=OCR_DPI, profile=DEFAULT_IMAGE_PROFILE):
+    """
+    埋め込み用のページ画像を返す（PIL画像，またはJPEGデータのBytesIO）
+    dpi: image の解像度（保存解像度への縮小率の計算に使う）
+    """
+    spec = IMAGE_PROFILES[profile]
+    if spec is None:
+        return image
+    mode, store_dpi, quality = spec
+    if store_dpi and store_dpi < dpi:
+        size = (max(1, round(image.width * store_dpi / dpi)), max(1, round(image.height * store_dpi / dpi)))
+        image = image.resize(size, Image.LANCZOS)
+    if mode == "1":
+        return image.convert("L").point(lambda x: 255 if x > BILEVEL_THRESHOLD else 0, mode="1")
+    buf = io.BytesIO()
+    image.convert(mode).save(buf, "JPEG", quality=quality, optimize=True)
+    buf.seek(0)
+    return buf
+
+
+def page_words(words, scale, page_height):
+    """
+    画像上の単語の位置（px，左上原点）を，ページの座標（pt，左下原点）の [[text, x0, y0, x1, y1, conf], ...] にする
+    scale: 画像1pxあたりのpt
+    """
+    return [[w["text"], round(w["left"] * scale, 2), round(page_height - (w["top"] + w["height"]) * scale, 2),
+             round((w["left"] + w["width"]) * scale, 2), round(page_height - w["top"] * scale, 2), w["conf"]]
+            for w in words]
+
+
+def _font_for(text):
+    # 標準フォントで表せない文字（日本語など）はreportlab付属のCIDフォントで書く（埋め込み不要）
+    try:
+        text.encode("latin-1")
+        return "Helvetica"
+    except UnicodeEncodeError:
+        if TEXT_CID_FONT not in pdfmetrics.getRegisteredFontNames():
+            pdfmetrics.registerFont(UnicodeCIDFont(TEXT_CID_FONT))
+        return TEXT_CID_FONT
+
+
+def draw_words(c, words):
+    """
+    page_words の単語を，見えないテキスト（描画モード3）として単語の枠に合わせて書く
+    """
+    for text, x0, y0, x1, y1, _ in words:
+        size = y1 - y0
+        if size <= 0 or x1 <= x0:
+            continue
+        font = _font_for(text)
+        t = c.beginText()
+        t.setTextRenderMode(3)
+        t.setFont(font, size)
+        t.setHorizScale(100 * (x1 - x0) / max(pdfmetrics.stringWidth(text, font, size), 1e-3))
+        # 枠の下端から文字の下がり分だけ上をベースラインにする
+        t.setTextOrigin(x0, y0 + size * 0.2)
+        t.textOut(text)
+        c.drawText(t)
+
+
+def text_layer_pdf(words, width, height):
+    """
+    見えないテキストだけのページ（PDFのbytes）を作る（他の方法で作った画像ページに重ねる用）
+    """
+    buf = io.BytesIO()
+    with _binary_streams():
+        c = canvas.Canvas(buf, pagesize=(width, height))
+        draw_words(c, words)
+        c.showPage()
+        c.save()
+    return buf.getvalue()
+
+
+def _finish_page(page, words):
+    # 単語の位置をページに持たせてから1ページのPDFとして書き出す（sidecar.pop_words で取り出す）
+    attach_words(page, words)
+    writer = PdfWriter()
+    writer.add_page(page)
+    buf = io.BytesIO()
+    writer.write(buf)
+    return buf.getvalue()
+
+
+def _prepare(image, preprocess, dpi):
+    if not preprocess:
+        return image, 0.0, None
+    with stage("preprocess", bytes_in=_image_bytes(image)):
+        return prepare_for_ocr(image, preprocess, dpi)
+
+
+def _image_bytes(image):
+    return image.width * image.height * len(image.getbands())
+
+
+def _recognize(image, lang, dpi, preprocess):
+    # 1回の認識で単語の位置を得て，前処理した画像上の位置を元の画像の座標に戻す
+    ocr_image, angle, box = _prepare(image, preprocess, dpi)
+    with stage("recognize", bytes_in=_image_bytes(ocr_image)):
+        words = recognizer.image_to_data(ocr_image, lang=lang, dpi=dpi)
+    return unwarp_words(words, angle, box, image.size)
+
+
+def image_to_searchable_pdf_page(image, lang='jpn+eng', dpi=OCR_DPI, profile=DEFAULT_IMAGE_PROFILE, preprocess=()):
+    """
+    ページ画像にOCRをかけ，サーチャブルPDF1ページをbytesで返す（reportlabで再描画）
+    テキストは認識した単語ごとに，画像上の位置へ見えない文字として置く
+    profile: 埋め込む画像の圧縮方法（IMAGE_PROFILES のキー）
+    preprocess: OCR前の画像処理（preprocess.PREPROCESS_STEPS の組み合わせ，埋め込む画像は元のまま）
+    """
+    width, height = image.size
+    words = page_words(_recognize(image, lang, dpi, preprocess), 1, height)
+    # 一時ファイルを使わずメモリ上に書き出す
+    buf = io.BytesIO()
+    with _binary_streams():
+        c = canvas.Canvas(buf, pagesize=(width, height))
+        # 背景画像（PDF元の見た目）
+        c.drawImage(ImageReader(encode_page_image(image, dpi, profile)), 0, 0, width=width, height=height)
+        # 透明テキスト（OCR結果）
+        draw_words(c, words)
+        c.showPage()
+        c.save()
+    return _finish_page(read_page_pdf(buf.getvalue()), words)
+
+
+def image_to_tesseract_pdf_page(image, lang='jpn+eng', dpi=OCR_DPI, profile=DEFAULT_IMAGE_PROFILE, preprocess=()):
+    """
+    ページ画像にOCRをかけ，tesseractが直接出力したサーチャブルPDF1ページをbytesで返す
+    認識と同じ1回の処理でPDFと単語の位置（tsv）が得られるため，画像の再エンコードや再認識が不要
+    profile・preprocess を指定した場合は，tesseractにはテキストだけを出力させ，
+    元の画像（profileで圧縮）のページに，傾き補正・切り出しを打ち消す位置で重ねる
+    PDFの出力にはtesseractのレンダラーが必要なため，常駐の認識器（recognizer）は使わずpytesseractで起動する
+    """
+    k = 72 / dpi
+    w, h = image.width * k, image.height * k
+    # --dpi を渡すとページサイズが元の用紙サイズ（pt）になる
+    if IMAGE_PROFILES[profile] is None and not preprocess:
+        with stage("recognize", bytes_in=_image_bytes(image)):
+            page_pdf, words = tesseract_pdf_and_data(image, lang=lang, config=f'--dpi {dpi}')
+        return _finish_page(read_page_pdf(page_pdf), page_words(words, k, h))
+    ocr_image, angle, box = _prepare(image, preprocess, dpi)
+    with stage("recognize", bytes_in=_image_bytes(ocr_image)):
+        text_pdf, words = tesseract_pdf_and_data(ocr_image, lang=lang, config=f'--dpi {dpi} -c textonly_pdf=1')
+    pdf = FPDF(unit='pt')
+    pdf.add_page(format=(w, h))
+    pdf.image(encode_page_image(image, dpi, profile), 0, 0, w, h)
+    page = read_page_pdf(bytes(pdf.output()))
+    text_page = read_page_pdf(text_pdf)
+    if box is not None or angle:
+        # 切り出した位置へ戻し，中心まわりに回転を打ち消す（PDFの座標は左下原点）
+        left, _, _, bottom = box or (0, 0, image.width, image.height)
+        transform = Transformation().translate(left * k, (image.height - bottom) * k)
+        if angle:
+            transform = transform.translate(-w / 2, -h / 2).rotate(-angle).translate(w / 2, h / 2)
+        text_page.add_transformation(transform)
+    page.merge_page(text_page)
+    return _finish_page(page, page_words(unwarp_words(words, angle, box, image.size), k, h))
+
+
+def image_to_fpdf_page(image, lang='jpn+eng', dpi=OCR_DPI, profile=DEFAULT_IMAGE_PROFILE, preprocess=()):
+    """
+    ページ画像にOCRをかけ，FPDFで画像を配置した1ページをbytesで返す（ocr_pdf_gui の従来の出力と同じ用紙）
+    テキストは下部にまとめず，認識した単語ごとに画像上の位置へ見えない文字として重ねる
+    """
+    pdf = FPDF(unit='pt')
+    w, h = image.size
+    pdf.add_page(orientation='P' if h >= w else 'L')
+    pdf.image(encode_page_image(image, dpi, profile), 0, 0, w, h)
+    words = page_words(_recognize(image, lang, dpi, preprocess), 1, pdf.h)
+    page = read_page_pdf(bytes(pdf.output()))
+    page.merge_page(read_page_pdf(text_layer_pdf(words, pdf.w, pdf.h)))
+    return _finish_page(page, words)
+
+
+def make_ocr_page(backend, image, path=None, page=None, **options):
+    """
+    PAGE_BACKENDS[backend] でOCRページを作る（profiling で計測中なら compose 段階として記録する）
+    compose の自身の時間が，画像の埋め込み・見えないテキストの描画・PDFへの書き出しにかかった時間になる
+    """
+    with stage("compose", path=path, page=page, bytes_in=_image_bytes(image)) as event:
+        page_pdf = PAGE_BACKENDS[backend](image, **options)
+        event["bytes_out"] = len(page_pdf)
+    return page_pdf
+
+
+# OCRページの生成方式（GUI・一括処理から名前で選択，名前の一覧は options.PAGE_BACKEND_NAMES）
+PAGE_BACKENDS = dict(zip(PAGE_BACKEND_NAMES, (image_to_searchable_pdf_page, image_to_fpdf_page,
+                                              image_to_tesseract_pdf_page)))
+
+
+def read_page_pdf(page_pdf):
+    """
+    OCRページ（PDFのbytes）をPyPDF2のページとして返す
+    """
+    return PdfReader(io.BytesIO(page_pdf)).pages[0]
+
+
+def pdf_page_to_searchable_pdf_page(pdf_path, page_index, lang='jpn+eng', poppler_path=None,
+                                    backend=DEFAULT_PAGE_BACKEND, dpi=OCR_DPI, cache=None,
+                                    profile=DEFAULT_IMAGE_PROFILE, adaptive_dpi=False, min_dpi=MIN_OCR_DPI,
+                                    preprocess=(), password=None):
+    """
+    1ページ単位で，画像からOCRをかけサーチャブルPDF1ページをbytesで返す
+    （複数ページをまとめて処理する場合は raster.DocumentRasterizer を使う）
+    cache: cache.OcrCache を渡すと，画像化の前にキャッシュを確認し，結果を保存する
+    profile: 埋め込む画像の圧縮方法（IMAGE_PROFILES のキー）
+    adaptive_dpi: 真なら埋め込み画像の解像度に合わせて min_dpi〜dpi の範囲で描画する
+    preprocess: OCR前の画像処理（preprocess.PREPROCESS_STEPS の組み合わせ）
+    password: パスワード付きPDFのパスワード（pdftoppm に渡す）
+    """
+    check_steps(preprocess)
+    if cache is not None:
+        key = cache.page_key(pdf_path, page_index, dpi, lang, backend, profile,
+                             ocr_variant(adaptive_dpi, min_dpi, preprocess))
+        if cache.contains(key):
+            entry = cache.get(key)
+            if entry is not None:
+                return entry[0]
+    if adaptive_dpi:
+        dpi = page_dpis(pdf_path, [page_index], dpi, min_dpi, password).get(page_index, dpi)
+    with stage("render", path=pdf_path, page=page_index, pages=1):
+        images = convert_from_path(
+            pdf_path,
+            first_page=page_index+1,
+            last_page=page_index+1,
+            poppler_path=poppler_path or POPPLER_PATH,
+            userpw=password,
+            dpi=dpi
+        )
+    page_pdf = make_ocr_page(backend, images[0], path=pdf_path, page=page_index, lang=lang, dpi=dpi, profile=profile,
+                             preprocess=preprocess)
+    if cache is not None:
+        cache.put(key, page_pdf, page_pdf_text(page_pdf))
+    return page_pdf
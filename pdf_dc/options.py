@@ -0,0 +1,34 @@
+"""
+GUI・コマンドラインの選択肢と既定値
+OCR・画像処理のライブラリ（PIL・numpy・reportlab・fpdf・pdf2image・pytesseract）を読み込まずに参照できるよう，
+ここには定数だけを置く（画面の表示を速くするため，OCRのモジュールはOCRの処理を始めるときに読み込む）
+"""
+import os
+
+# OCR用の描画解像度
+OCR_DPI = 300
+
+# 埋め込むページ画像の圧縮方法（認識は常にOCR用の解像度の画像で行い，保存する画像だけを変える）
+# 名前 -> (色モード, 保存解像度（Noneなら認識と同じ）, JPEG品質（Noneなら可逆圧縮）)
+IMAGE_PROFILES = {
+    "original": None,               # 認識した画像をそのまま埋め込む（従来通り）
+    "bilevel": ("1", None, None),   # 白黒2値（fpdf・tesseractではCCITT G4）：文字中心のスキャン向け
+    "gray-jpeg": ("L", 200, 60),    # グレースケールを200DPIに縮小してJPEG
+    "color-150": ("RGB", 150, 70),  # カラーを150DPIに縮小してJPEG
+}
+DEFAULT_IMAGE_PROFILE = "original"
+
+# OCRページの生成方式の名前（ocr.PAGE_BACKENDS のキー）
+PAGE_BACKEND_NAMES = ("reportlab", "fpdf", "tesseract")
+DEFAULT_PAGE_BACKEND = "reportlab"
+
+# 前処理の手順（指定順に関係なくこの順で行う）
+PREPROCESS_STEPS = ("deskew", "crop", "binarize")
+
+# 既定の並列数（CPUコア数）
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+# ページ単位のストリーム処理（streaming.ocr_pdf）の1チャンクのページ数と，1チャンクで保持してよい画像データ量の上限（MB）
+DEFAULT_CHUNK_PAGES = 16
+DEFAULT_MAX_MEMORY_MB = 256
+DEFAULT_STREAM_BACKEND = "fpdf"
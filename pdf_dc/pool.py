@@ -0,0 +1,25 @@
+"""
+作業プロセスへの仕事の渡し方（OCRのページ範囲・分割の出力ファイルで共通）
+"""
+from collections import deque
+
+# 先に渡しておくタスクは並列数のこの倍まで（結果の溜め込みでメモリを食わないように）
+LOOKAHEAD_PER_WORKER = 2
+
+
+def submit_bounded(executor, fn, tasks, workers):
+    """
+    tasks を1つずつ fn で executor に渡し，結果を tasks の順に返すジェネレータ
+    途中で閉じられた・例外で抜けた場合，未着手のタスクは実行しない
+    """
+    pending = deque()
+    try:
+        for task in tasks:
+            pending.append(executor.submit(fn, task))
+            if len(pending) >= workers * LOOKAHEAD_PER_WORKER:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
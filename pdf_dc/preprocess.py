@@ -0,0 +1,170 @@
+"""
+OCR前の画像処理（ページごとの描画解像度の決定と，2値化・傾き補正・余白除去）
+tesseractの処理時間は画素数にほぼ比例するため，元画像より高い解像度で描画しない・余白を渡さないことで短縮する
+"""
+import math
+
+import numpy as np
+from PIL import Image
+from PyPDF2 import PdfReader
+
+from .classify import page_images
+from .options import PREPROCESS_STEPS
+
+# 解像度の自動調整で下回らない解像度（これより粗いと認識精度が落ちる）
+MIN_OCR_DPI = 200
+
+# 傾き補正で探す角度の範囲と刻み（度）
+MAX_SKEW_ANGLE = 3.0
+SKEW_STEP = 0.25
+# 傾き推定に使う縮小画像の幅（px）
+SKEW_SAMPLE_WIDTH = 800
+
+
+def native_dpi(page):
+    """
+    ページで最も大きく描画されている画像の解像度（画像のないページ・解析できないページはNone）
+    """
+    best_area, best_dpi = 0.0, None
+    for xobj, (a, b, c, d, _, _) in page_images(page) or ():
+        width_in, height_in = math.hypot(a, b) / 72, math.hypot(c, d) / 72
+        area = abs(a*d - b*c)
+        if width_in <= 0 or height_in <= 0 or area <= best_area:
+            continue
+        best_area = area
+        best_dpi = min(float(xobj["/Width"]) / width_in, float(xobj["/Height"]) / height_in)
+    return best_dpi
+
+
+def choose_dpi(native, max_dpi, min_dpi=MIN_OCR_DPI):
+    """
+    元画像の解像度を超えない範囲で，min_dpi〜max_dpiの描画解像度を選ぶ
+    """
+    if native is None:
+        return max_dpi
+    return int(min(max_dpi, max(min_dpi, round(native))))
+
+
+def page_dpis(pdf_path, page_indices, max_dpi, min_dpi=MIN_OCR_DPI, password=None):
+    """
+    {page_index: 描画解像度} を返す（開けないPDFは空の辞書＝すべてmax_dpi）
+    password: パスワード付きPDFのパスワード
+    """
+    try:
+        reader = PdfReader(pdf_path)
+        if reader.is_encrypted and reader.decrypt(password or "") == 0:
+            return {}
+        return {i: choose_dpi(native_dpi(reader.pages[i]), max_dpi, min_dpi) for i in page_indices}
+    except Exception:
+        return {}
+
+
+def ocr_variant(adaptive_dpi=False, min_dpi=MIN_OCR_DPI, preprocess=()):
+    """
+    OCR結果に影響する設定をキャッシュキー用の文字列のタプルにする（既定の設定なら空）
+    """
+    variant = (f"auto{min_dpi}",) if adaptive_dpi else ()
+    return variant + tuple(step for step in PREPROCESS_STEPS if step in preprocess)
+
+
+def check_steps(preprocess):
+    unknown = [step for step in preprocess if step not in PREPROCESS_STEPS]
+    if unknown:
+        raise ValueError(f"未対応の前処理です: {', '.join(unknown)}")
+
+
+def otsu_threshold(gray):
+    """
+    大津の方法による2値化のしきい値（gray: uint8の2次元配列，一様な画像は-1＝すべて白）
+    """
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    omega = np.cumsum(hist) / gray.size
+    mu = np.cumsum(hist * np.arange(256)) / gray.size
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between = (mu[-1] * omega - mu) ** 2 / (omega * (1 - omega))
+    if np.all(np.isnan(between)):
+        return -1
+    return int(np.nanargmax(between))
+
+
+def estimate_skew(ink):
+    """
+    傾きを補正する回転角（度，反時計回りが正）
+    縮小した2値画像を少しずつ回転させ，行ごとの黒画素数のばらつきが最大になる角度を選ぶ
+    """
+    height, width = ink.shape
+    scale = min(1.0, SKEW_SAMPLE_WIDTH / width)
+    sample = Image.fromarray(ink.astype(np.uint8) * 255)
+    if scale < 1.0:
+        sample = sample.resize((max(1, int(width * scale)), max(1, int(height * scale))), Image.BOX)
+    best_angle, best_score = 0.0, -1.0
+    for angle in np.arange(-MAX_SKEW_ANGLE, MAX_SKEW_ANGLE + SKEW_STEP / 2, SKEW_STEP):
+        rows = np.asarray(sample.rotate(angle, resample=Image.NEAREST, fillcolor=0), dtype=np.float64).sum(axis=1)
+        score = rows.var()
+        if score > best_score:
+            best_angle, best_score = float(angle), score
+    return best_angle
+
+
+def content_box(ink, pad):
+    """
+    文字のある範囲 (left, top, right, bottom) を pad px 広げて返す（何もなければNone）
+    端の小さな汚れを拾わないよう，黒画素がわずかな行・列は無視する
+    """
+    height, width = ink.shape
+    rows = np.flatnonzero(ink.sum(axis=1) > max(2, width * 0.002))
+    cols = np.flatnonzero(ink.sum(axis=0) > max(2, height * 0.002))
+    if not len(rows) or not len(cols):
+        return None
+    return (max(0, int(cols[0]) - pad), max(0, int(rows[0]) - pad),
+            min(width, int(cols[-1]) + 1 + pad), min(height, int(rows[-1]) + 1 + pad))
+
+
+def prepare_for_ocr(image, preprocess=(), dpi=300):
+    """
+    tesseractに渡す画像を作り，(画像, 回転角, 切り出し範囲) を返す
+    preprocess: PREPROCESS_STEPS の組み合わせ（空なら image をそのまま返す）
+    回転角・切り出し範囲は元の画像との位置合わせ用（回転は中心まわり，切り出しは回転後の座標）
+    """
+    if not preprocess:
+        return image, 0.0, None
+    gray = np.asarray(image.convert("L"))
+    threshold = otsu_threshold(gray)
+    ink = gray <= threshold
+    angle = 0.0
+    if "deskew" in preprocess:
+        angle = estimate_skew(ink)
+        if angle:
+            image = image.rotate(angle, resample=Image.BICUBIC, fillcolor="white")
+            gray = np.asarray(image.convert("L"))
+            ink = gray <= threshold
+    box = content_box(ink, pad=dpi // 10) if "crop" in preprocess else None
+    if "binarize" in preprocess:
+        image = Image.fromarray(np.where(ink, 0, 255).astype(np.uint8))
+    if box is not None:
+        image = image.crop(box)
+    return image, angle, box
+
+
+def unwarp_words(words, angle, box, size):
+    """
+    prepare_for_ocr した画像上の単語の位置（recognizer.words_from_data の形式）を，元の画像の座標に戻す
+    傾き補正した単語は，回転を戻した四隅を囲む矩形にする
+    size: 元の画像の (幅, 高さ)
+    """
+    if not angle and box is None:
+        return words
+    dx, dy = (box[0], box[1]) if box is not None else (0, 0)
+    cx, cy = size[0] / 2, size[1] / 2
+    cos, sin = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+    result = []
+    for word in words:
+        left, top = word["left"] + dx, word["top"] + dy
+        right, bottom = left + word["width"], top + word["height"]
+        xs, ys = [], []
+        for x, y in ((left, top), (right, top), (left, bottom), (right, bottom)):
+            # PIL の rotate(angle)（画面上で反時計回り）の逆変換
+            xs.append(cx + (x - cx) * cos - (y - cy) * sin)
+            ys.append(cy + (x - cx) * sin + (y - cy) * cos)
+        result.append(dict(word, left=min(xs), top=min(ys), width=max(xs) - min(xs), height=max(ys) - min(ys)))
+    return result
@@ -0,0 +1,271 @@
+"""
+処理段階ごとの計測（どこに時間がかかっているかを調べる）
+画像化（render）・前処理（preprocess）・文字認識（recognize）・OCRページの組み立て（compose）・
+PDFの読み込み（read）・ページの判定（classify）・書き出し（write）を，ページごとに
+経過時間・CPU時間・入出力のバイト数・メモリの最大使用量（memory=True のとき）で記録する。
+OCRの作業プロセスで記録した分も，結果と一緒に受け取って1つにまとめる
+
+    profiler = Profiler(memory=True)
+    with profiler:
+        core.merge(...)
+    profiler.write("trace.json", "chrome")   （chrome://tracing・Perfettoで表示できる）
+    print(profiler.table())
+
+計測していないときの stage() は何もしない（処理速度に影響しない）
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+import unicodedata
+from contextlib import contextmanager
+
+TRACE_FORMATS = ("json", "chrome")
+
+_current = None  # 計測中の Profiler（このプロセスで1つ）
+
+
+def _pad(text, width, left=False):
+    # 全角文字を2桁として表の列をそろえる
+    space = " " * max(0, width - sum(2 if unicodedata.east_asian_width(ch) in "WF" else 1 for ch in text))
+    return text + space if left else space + text
+
+
+class Profiler:
+    """
+    stage() の記録を集める
+    memory: 真なら tracemalloc で段階ごとのメモリの最大使用量を記録する（処理は遅くなる）
+    cprofile: 真なら cProfile で関数ごとの時間も記録する（計測を始めたスレッドだけ）
+    """
+
+    def __init__(self, memory=False, cprofile=False):
+        self.memory = memory
+        self.cprofile = cprofile
+        self.events = []
+        self.started_ns = None
+        self.seconds = 0.0
+        self.stats = None
+        self.worker = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._cprofile = None
+        self._started_tracemalloc = False
+        self._previous = None
+
+    def start(self):
+        global _current
+        self._previous, _current = _current, self
+        self.started_ns = time.time_ns()
+        self._started = time.perf_counter()
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        if self.cprofile:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        return self
+
+    def stop(self):
+        global _current
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self.stats = pstats.Stats(self._cprofile)
+            self._cprofile = None
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        self.seconds = time.perf_counter() - self._started
+        _current = self._previous
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def add(self, events):
+        # 作業プロセスで記録した分を加える
+        with self._lock:
+            self.events.extend(events)
+
+    def summary(self):
+        """
+        段階ごとの集計 [{"stage", "count", "wall", "self", "cpu", "bytes_in", "bytes_out", "peak_memory"}]（経過時間の長い順）
+        self は内側の段階（compose の中の recognize など）を除いた時間
+        """
+        rows = {}
+        for event in self.events:
+            row = rows.setdefault(event["stage"], {"stage": event["stage"], "count": 0, "wall": 0.0, "self": 0.0,
+                                                   "cpu": 0.0, "bytes_in": 0, "bytes_out": 0, "peak_memory": None})
+            row["count"] += 1
+            row["wall"] += event["wall"]
+            row["self"] += event["wall"] - event["child_wall"]
+            row["cpu"] += event["cpu"]
+            row["bytes_in"] += event.get("bytes_in") or 0
+            row["bytes_out"] += event.get("bytes_out") or 0
+            if event.get("peak_memory") is not None:
+                row["peak_memory"] = max(row["peak_memory"] or 0, event["peak_memory"])
+        return sorted(rows.values(), key=lambda row: -row["wall"])
+
+    def table(self, top_functions=15):
+        """
+        集計の表（文字列）。cProfile の記録があれば時間のかかった関数も付ける
+        作業プロセスの時間も合計するため，並列処理では合計が全体の経過時間を超える
+        """
+        mb = 1024 * 1024
+        widths = (12, 7, 10, 10, 10, 10, 10, 16)
+        header = ("段階", "回数", "経過(秒)", "自身(秒)", "CPU(秒)", "入力(MB)", "出力(MB)", "最大メモリ(MB)")
+        lines = ["".join(_pad(text, width, left=i == 0) for i, (text, width) in enumerate(zip(header, widths)))]
+        for row in self.summary():
+            peak = f"{row['peak_memory'] / mb:.1f}" if row["peak_memory"] is not None else "-"
+            cells = (row["stage"], str(row["count"]), f"{row['wall']:.2f}", f"{row['self']:.2f}", f"{row['cpu']:.2f}",
+                     f"{row['bytes_in'] / mb:.1f}", f"{row['bytes_out'] / mb:.1f}", peak)
+            lines.append("".join(_pad(text, width, left=i == 0) for i, (text, width) in enumerate(zip(cells, widths))))
+        lines.append(f"全体 {self.seconds:.2f}秒")
+        if self.stats is not None:
+            buf = io.StringIO()
+            self.stats.stream = buf
+            self.stats.sort_stats("cumulative").print_stats(top_functions)
+            lines.append(buf.getvalue().rstrip())
+        return "\n".join(lines)
+
+    def trace(self, fmt="json"):
+        """
+        記録を辞書にする（json: 記録と集計そのまま，chrome: Chromeのトレース形式）
+        """
+        if fmt not in TRACE_FORMATS:
+            raise ValueError(f"未対応のトレース形式です: {fmt}")
+        if fmt == "json":
+            return {"started_ns": self.started_ns, "seconds": self.seconds, "events": self.events,
+                    "summary": self.summary()}
+        events = []
+        for event in self.events:
+            args = {key: value for key, value in event.items()
+                    if key not in ("stage", "start_ns", "wall", "child_wall", "pid", "tid") and value is not None}
+            events.append({"name": event["stage"], "cat": "pdf_dc", "ph": "X",
+                           "ts": (event["start_ns"] - self.started_ns) / 1000, "dur": event["wall"] * 1e6,
+                           "pid": event["pid"], "tid": event["tid"], "args": args})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write(self, path, fmt="json"):
+        """
+        トレースを path に書き出す（cProfile の記録は <path>.prof にも書き出す）
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.trace(fmt), f, ensure_ascii=False)
+        if self.stats is not None:
+            self.stats.dump_stats(path + ".prof")
+        return path
+
+
+@contextmanager
+def _record(profiler, name, fields):
+    stack = profiler._stack()
+    event = {"stage": name, "pid": os.getpid(), "tid": threading.get_ident(), "child_wall": 0.0,
+             "start_ns": time.time_ns()}
+    if stack:
+        # 内側の段階には外側のファイル名・ページ番号を引き継ぐ（ページごとに集計できるように）
+        event.update((key, stack[-1][key]) for key in ("path", "page") if key in stack[-1])
+    event.update((key, value) for key, value in fields.items() if value is not None)
+    if profiler.memory and tracemalloc.is_tracing():
+        # 段階の始めと終わりで最大値をリセットするため，それまでの最大値・内側の最大値を外側に引き継ぐ
+        current, peak = tracemalloc.get_traced_memory()
+        if stack and "peak_memory" in stack[-1]:
+            stack[-1]["peak_memory"] = max(stack[-1]["peak_memory"], peak)
+        event["peak_memory"] = current
+        tracemalloc.reset_peak()
+    stack.append(event)
+    started, cpu = time.perf_counter(), time.thread_time()
+    try:
+        yield event
+    finally:
+        event["wall"] = time.perf_counter() - started
+        event["cpu"] = time.thread_time() - cpu
+        stack.pop()
+        if "peak_memory" in event:
+            event["peak_memory"] = max(event["peak_memory"], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        if stack:
+            parent = stack[-1]
+            parent["child_wall"] += event["wall"]
+            if "peak_memory" in parent:
+                parent["peak_memory"] = max(parent["peak_memory"], event.get("peak_memory") or 0)
+        with profiler._lock:
+            profiler.events.append(event)
+
+
+@contextmanager
+def _nothing():
+    yield {}
+
+
+def stage(name, **fields):
+    """
+    with stage("render", path=..., page=...) as event: の範囲の時間を記録する
+    event["bytes_out"] = ... のように，入出力のバイト数などを記録に加えられる
+    """
+    if _current is None:
+        return _nothing()
+    return _record(_current, name, fields)
+
+
+def active():
+    return _current is not None
+
+
+def current():
+    return _current
+
+
+def worker_options():
+    """
+    OCRの作業プロセスでも記録するための設定（計測していなければNone，engine._init_worker に渡す）
+    """
+    return None if _current is None else {"memory": _current.memory}
+
+
+def start_worker(options):
+    # 作業プロセスの起動時に呼ぶ（記録は drain_worker で取り出して親プロセスへ返す）
+    if options is not None:
+        profiler = Profiler(memory=options["memory"])
+        profiler.worker = True
+        profiler.start()
+
+
+def drain_worker():
+    """
+    作業プロセスで記録した分を取り出す（作業プロセスでなければ空）
+    """
+    if _current is None or not _current.worker:
+        return []
+    with _current._lock:
+        events, _current.events = _current.events, []
+    return events
+
+
+def profiled(func, trace=None, trace_format="chrome", memory=False, cprofile=False):
+    """
+    func（core.merge など処理結果の概要を返す関数）を計測しながら実行する関数を返す
+    概要には "profile"（段階ごとの集計），"profile_table"（表），"trace"（書き出したトレース）を加える
+    trace: トレースの書き出し先（Noneなら書き出さない）
+    """
+    def run(*args, **kwargs):
+        profiler = Profiler(memory=memory, cprofile=cprofile)
+        with profiler:
+            summary = func(*args, **kwargs)
+        summary["profile"] = profiler.summary()
+        summary["profile_table"] = profiler.table()
+        if trace:
+            summary["trace"] = profiler.write(trace, trace_format)
+        return summary
+    return run
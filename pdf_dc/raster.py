@@ -0,0 +1,91 @@
+import os
+
+from pdf2image import convert_from_path
+from PIL import Image
+
+from .profiling import stage
+from .scratch import scratch_dir
+
+# 1回のpdftoppm呼び出しでまとめて描画するページ数
+DEFAULT_BATCH_SIZE = 8
+
+
+def iter_page_runs(page_indices, batch_size):
+    """
+    ページ番号の列を「連続したページ範囲」単位にまとめる（並び順は保持）
+    例: [0,1,2,5,6] -> [[0,1,2],[5,6]]（batch_size以下ごとに区切る）
+    """
+    run = []
+    for i in page_indices:
+        if run and (i != run[-1] + 1 or len(run) >= batch_size):
+            yield run
+            run = []
+        run.append(i)
+    if run:
+        yield run
+
+
+class DocumentRasterizer:
+    """
+    1つのPDFをページ範囲ごとにまとめて画像化する
+    ページごとにpdftoppmを起動してPDF全体を読み直す代わりに，
+    連続したページを1回の呼び出しで一時フォルダへ書き出し，1枚ずつ読み込んで返す
+    password: パスワード付きPDFのパスワード（pdftoppm に渡す）
+    """
+
+    def __init__(self, pdf_path, dpi=300, batch_size=DEFAULT_BATCH_SIZE, thread_count=1, poppler_path=None,
+                 password=None):
+        self.pdf_path = pdf_path
+        self.dpi = dpi
+        self.batch_size = max(1, batch_size)
+        self.thread_count = thread_count
+        self.poppler_path = poppler_path
+        self.password = password
+
+    def render_run(self, first_page_index, last_page_index, output_folder, dpi=None):
+        """
+        first〜last（0始まり，両端含む）をoutput_folderへ書き出し，画像ファイルのパスをページ順に返す
+        dpi: 省略時は self.dpi
+        """
+        return convert_from_path(
+            self.pdf_path,
+            dpi=dpi or self.dpi,
+            first_page=first_page_index+1,
+            last_page=last_page_index+1,
+            output_folder=output_folder,
+            paths_only=True,
+            thread_count=self.thread_count,
+            userpw=self.password,
+            poppler_path=self.poppler_path,
+        )
+
+    def _runs(self, page_indices, dpis):
+        # 解像度が変わるところでも範囲を区切る（pdftoppmの1回の呼び出しは1つの解像度のため）
+        for run in iter_page_runs(page_indices, self.batch_size):
+            if not dpis:
+                yield run
+                continue
+            part = [run[0]]
+            for i in run[1:]:
+                if dpis.get(i) != dpis.get(part[-1]):
+                    yield part
+                    part = []
+                part.append(i)
+            yield part
+
+    def iter_pages(self, page_indices, dpis=None):
+        """
+        (page_index, PIL.Image) を指定順に返すジェネレータ
+        一度にメモリへ載るのは1ページ分の画像だけ
+        dpis: {page_index: 解像度}（ページごとに変える場合，無いページは self.dpi）
+        """
+        with scratch_dir(prefix="pdf_dc_raster_") as output_folder:
+            for run in self._runs(page_indices, dpis):
+                with stage("render", path=self.pdf_path, page=run[0], pages=len(run)) as event:
+                    paths = self.render_run(run[0], run[-1], output_folder, dpi=dpis and dpis.get(run[0]))
+                    event["bytes_out"] = sum(os.path.getsize(path) for path in paths)
+                for page_index, image_path in zip(run, paths):
+                    image = Image.open(image_path)
+                    image.load()  # 読み込み完了時点でファイルは閉じられる
+                    os.remove(image_path)
+                    yield page_index, image
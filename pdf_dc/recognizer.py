@@ -0,0 +1,195 @@
+"""
+文字認識エンジンの常駐化
+pytesseractは1ページごとにtesseractを起動し，言語データ（jpn+engで数十MB）を読み直すため，
+認識前に1ページあたり数百ミリ秒かかる。tesserocr（tesseractのC API）があれば，言語ごとに
+1度だけ読み込んだ認識器をプロセス内に保持して使い回す（無ければ従来通りpytesseract）
+認識器はプロセスごとの登録表に置く（OcrEngineの並列処理では，ProcessPoolExecutor の各作業プロセスが起動時に読み込む）。
+常駐の認識器を使うのはOCRページの生成方式 reportlab・fpdf だけで，tesseract はPDFの出力にtesseractの
+レンダラーが必要なため，従来通りページごとにtesseractを起動する（tesseract_pdf_and_data）
+"""
+import threading
+
+import pytesseract
+from pytesseract.pytesseract import file_to_dict, run_tesseract, save
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+# 認識器の種類（auto: tesserocrがあれば使い，無ければpytesseract）
+RECOGNIZERS = ("auto", "tesserocr", "pytesseract")
+DEFAULT_RECOGNIZER = "auto"
+
+
+def words_from_data(data):
+    """
+    image_to_data（tsvの各列のdict）から，文字のある単語だけを
+    {"text", "left", "top", "width", "height", "conf", "block_num", "par_num", "line_num"} のリストにする
+    """
+    keys = ("left", "top", "width", "height", "conf", "block_num", "par_num", "line_num")
+    words = []
+    for row, text in enumerate(data.get("text", [])):
+        text = str(text).strip()
+        if data["level"][row] != 5 or not text:
+            continue
+        word = {key: data[key][row] for key in keys}
+        word["text"] = text
+        words.append(word)
+    return words
+
+
+def tesseract_pdf_and_data(image, lang='jpn+eng', config=''):
+    """
+    tesseractを1回だけ起動し，サーチャブルPDF（bytes）と単語の位置（words_from_data の形式）を返す
+    （pytesseractには複数の出力を1回で得る手段がないため，tsvの出力を設定で追加して読み込む）
+    """
+    with save(image) as (temp_name, input_filename):
+        run_tesseract(input_filename, temp_name, "pdf", lang, config=f"{config} -c tessedit_create_tsv=1")
+        with open(f"{temp_name}.pdf", "rb") as f:
+            pdf = f.read()
+        with open(f"{temp_name}.tsv", encoding="utf-8") as f:
+            data = file_to_dict(f.read(), "\t", -1)
+    return pdf, words_from_data(data)
+
+
+class PytesseractRecognizer:
+    """
+    呼び出しごとにtesseractを起動する従来の方式（言語データも毎回読み込まれる）
+    """
+    name = "pytesseract"
+
+    def __init__(self, lang):
+        self.lang = lang
+
+    def image_to_string(self, image, dpi=None):
+        config = f"--dpi {dpi}" if dpi else ""
+        return pytesseract.image_to_string(image, lang=self.lang, config=config)
+
+    def image_to_data(self, image, dpi=None):
+        config = f"--dpi {dpi}" if dpi else ""
+        return words_from_data(pytesseract.image_to_data(image, lang=self.lang, config=config,
+                                                         output_type=pytesseract.Output.DICT))
+
+    def close(self):
+        pass
+
+
+class TesserocrRecognizer:
+    """
+    tesseractのC API（tesserocr）で言語データを読み込んだまま使い回す認識器
+    1つのAPIオブジェクトは同時に1ページしか処理できないため，ロックで順番に使う
+    """
+    name = "tesserocr"
+
+    def __init__(self, lang):
+        if tesserocr is None:
+            raise RuntimeError("tesserocr がインストールされていません")
+        self.lang = lang
+        self._lock = threading.Lock()
+        self._api = tesserocr.PyTessBaseAPI(lang=lang)
+
+    def image_to_string(self, image, dpi=None):
+        with self._lock:
+            self._api.SetImage(image)
+            if dpi:
+                self._api.SetSourceResolution(dpi)
+            text = self._api.GetUTF8Text()
+            self._api.Clear()
+            return text
+
+    def image_to_data(self, image, dpi=None):
+        level = tesserocr.RIL.WORD
+        words = []
+        block = par = line = 0
+        with self._lock:
+            self._api.SetImage(image)
+            if dpi:
+                self._api.SetSourceResolution(dpi)
+            self._api.Recognize()
+            for it in tesserocr.iterate_level(self._api.GetIterator(), level):
+                # tsvと同じく，ブロック・段落・行の通し番号を振る
+                if it.IsAtBeginningOf(tesserocr.RIL.BLOCK):
+                    block, par, line = block + 1, 0, 0
+                if it.IsAtBeginningOf(tesserocr.RIL.PARA):
+                    par, line = par + 1, 0
+                if it.IsAtBeginningOf(tesserocr.RIL.TEXTLINE):
+                    line += 1
+                text = (it.GetUTF8Text(level) or "").strip()
+                box = it.BoundingBox(level)
+                if not text or box is None:
+                    continue
+                left, top, right, bottom = box
+                words.append({"text": text, "left": left, "top": top, "width": right - left, "height": bottom - top,
+                              "conf": it.Confidence(level), "block_num": block, "par_num": par, "line_num": line})
+            self._api.Clear()
+        return words
+
+    def close(self):
+        with self._lock:
+            self._api.End()
+
+
+_kind = DEFAULT_RECOGNIZER
+_recognizers = {}
+_recognizers_lock = threading.Lock()
+
+
+def resolve_kind(kind):
+    if kind not in RECOGNIZERS:
+        raise ValueError(f"未対応の認識エンジンです: {kind}")
+    if kind == "auto":
+        return "tesserocr" if tesserocr is not None else "pytesseract"
+    return kind
+
+
+def set_recognizer_kind(kind):
+    """
+    このプロセスで使う認識器の種類を切り替える（読み込み済みの認識器は破棄する）
+    """
+    global _kind
+    resolve_kind(kind)
+    with _recognizers_lock:
+        if kind != _kind:
+            _close_all()
+        _kind = kind
+
+
+def get_recognizer(lang):
+    """
+    言語ごとに1つの認識器を返す（初回だけ言語データを読み込む）
+    """
+    with _recognizers_lock:
+        recognizer = _recognizers.get(lang)
+        if recognizer is None:
+            if resolve_kind(_kind) == "tesserocr":
+                recognizer = TesserocrRecognizer(lang)
+            else:
+                recognizer = PytesseractRecognizer(lang)
+            _recognizers[lang] = recognizer
+        return recognizer
+
+
+def image_to_string(image, lang='jpn+eng', dpi=None):
+    """
+    pytesseract.image_to_string の代わり（認識器はプロセス内で使い回す）
+    """
+    return get_recognizer(lang).image_to_string(image, dpi=dpi)
+
+
+def image_to_data(image, lang='jpn+eng', dpi=None):
+    """
+    単語ごとの位置と確信度（words_from_data の形式）を1回の認識で返す
+    """
+    return get_recognizer(lang).image_to_data(image, dpi=dpi)
+
+
+def _close_all():
+    for recognizer in _recognizers.values():
+        recognizer.close()
+    _recognizers.clear()
+
+
+def close_recognizers():
+    with _recognizers_lock:
+        _close_all()
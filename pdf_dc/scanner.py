@@ -0,0 +1,245 @@
+"""
+入力フォルダの走査と，PDFの情報（ページ数・サイズ・暗号化の有無）の先読み
+数万ファイルのフォルダでも画面が止まらないよう，os.scandir で走査して自然順（2.pdf < 10.pdf）に並べ，
+ページ数などは作業プロセスで読み（ファイルの末尾の相互参照表とトレーラー・ページツリーの根だけを読む），
+パス・サイズ・更新日時をキーにディスク（SQLite）へ記憶して次回は読まずに済ませる
+"""
+import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from PyPDF2 import PdfReader
+
+from .core import check_cancel
+from .store import cache_dir, connect
+
+# 1つの作業プロセスにまとめて渡すファイル数（1件ずつ渡すとプロセス間の受け渡しが多くなる）
+PREFETCH_CHUNK = 32
+# 所要時間の見積もりに使う処理速度（ページ/秒，OCRは作業プロセス1つあたり．benchmarks.suite の結果の目安）
+DEFAULT_RATES = {"merge": 500.0, "ocr": 0.5}
+
+_NUMBER = re.compile(r"(\d+)")
+
+
+def default_info_cache_path():
+    # 環境変数 PDF_DC_INFO_CACHE で場所を変更できる（既定はOCRキャッシュと同じフォルダ）
+    return os.environ.get("PDF_DC_INFO_CACHE") or cache_dir("pdf_info.sqlite3")
+
+
+def natural_key(path):
+    """
+    数字の部分を数として比べる並べ替えのキー（scan_2.pdf < scan_10.pdf，大文字・小文字は区別しない）
+    """
+    return [int(part) if part.isdigit() else part.casefold() for part in _NUMBER.split(path)]
+
+
+def scan_folder(folder, recursive=False, cancel=None):
+    """
+    folder の中のPDFを [(パス, サイズ, 更新日時(ns))] で返す（folder からの相対パスの自然順）
+    recursive: 真ならサブフォルダも調べる（隠しフォルダ・読めないフォルダは飛ばす）
+    """
+    found = []
+    pending = [folder]
+    while pending:
+        check_cancel(cancel)
+        try:
+            entries = list(os.scandir(pending.pop()))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    if recursive and not entry.name.startswith("."):
+                        pending.append(entry.path)
+                elif entry.name.lower().endswith(".pdf") and entry.is_file():
+                    st = entry.stat()  # Windowsでは走査の結果に含まれるため，ファイルを開かない
+                    found.append((entry.path, st.st_size, st.st_mtime_ns))
+            except OSError:
+                continue
+    found.sort(key=lambda item: natural_key(os.path.relpath(item[0], folder)))
+    return found
+
+
+def read_pdf_info(path):
+    """
+    PDFの {"path", "size", "mtime_ns", "pages", "encrypted", "error"} を返す
+    ファイルを開いたまま PdfReader に渡し，トレーラーとページツリーの根（/Count）だけを読む（全体は読み込まない）
+    パスワードが必要なPDFは pages がNone（空のパスワードで開けるものは数える）
+    """
+    info = {"path": path, "size": None, "mtime_ns": None, "pages": None, "encrypted": False, "error": None}
+    try:
+        st = os.stat(path)
+        info["size"], info["mtime_ns"] = st.st_size, st.st_mtime_ns
+        with open(path, "rb") as f:
+            reader = PdfReader(f, strict=False)
+            info["encrypted"] = "/Encrypt" in reader.trailer
+            if info["encrypted"]:
+                try:
+                    if reader.decrypt("") == 0:
+                        return info
+                except Exception:
+                    return info  # 未対応の暗号方式（AESに必要なライブラリが無い場合など）
+            info["pages"] = int(reader.trailer["/Root"]["/Pages"]["/Count"])
+    except Exception as e:
+        info["error"] = str(e) or type(e).__name__
+    return info
+
+
+def _read_chunk(paths):
+    return [read_pdf_info(path) for path in paths]
+
+
+class InfoCache:
+    """
+    read_pdf_info の結果のディスクキャッシュ（パス・サイズ・更新日時が同じ間だけ使う）
+    """
+
+    def __init__(self, path=None):
+        self.path = path or default_info_cache_path()
+        self._conn, self._lock = connect(self.path)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    pages INTEGER,
+                    encrypted INTEGER NOT NULL,
+                    checked_at REAL NOT NULL
+                )""")
+
+    def get_many(self, items):
+        """
+        [(パス, サイズ, 更新日時)] のうち記憶しているものの {パス: 情報} を返す
+        """
+        found = {}
+        with self._lock:
+            for path, size, mtime_ns in items:
+                row = self._conn.execute("SELECT pages, encrypted FROM files WHERE path=? AND size=? AND mtime_ns=?",
+                                         (os.path.abspath(path), size, mtime_ns)).fetchone()
+                if row is not None:
+                    found[path] = {"path": path, "size": size, "mtime_ns": mtime_ns, "pages": row[0],
+                                   "encrypted": bool(row[1]), "error": None}
+        return found
+
+    def put_many(self, infos):
+        # 開けなかったファイルは記憶しない（コピー中だった場合などに次回読み直す）
+        rows = [(os.path.abspath(info["path"]), info["size"], info["mtime_ns"], info["pages"], int(info["encrypted"]),
+                 time.time()) for info in infos if info["error"] is None]
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class InfoPrefetcher:
+    """
+    items（scan_folder の結果）の情報をバックグラウンドで読み，poll() で少しずつ受け取る
+    キャッシュにあるものはすぐに，無いものは workers 個の作業プロセスで読む（GUIの after から poll する）
+    """
+
+    def __init__(self, items, cache=None, workers=None):
+        self.items = list(items)
+        self.cache = cache
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.cancel_event = threading.Event()
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self.finished = False
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        # 読み終えていない分は捨てる（別のフォルダを選び直したときなど）
+        self.cancel_event.set()
+
+    def _run(self):
+        try:
+            known = self.cache.get_many(self.items) if self.cache is not None else {}
+            if known:
+                self._queue.put(list(known.values()))
+            missing = [path for path, _, _ in self.items if path not in known]
+            chunks = [missing[i:i + PREFETCH_CHUNK] for i in range(0, len(missing), PREFETCH_CHUNK)]
+            if not chunks:
+                return
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(chunks))) as executor:
+                futures = [executor.submit(_read_chunk, chunk) for chunk in chunks]
+                try:
+                    for future in futures:
+                        if self.cancel_event.is_set():
+                            break
+                        infos = future.result()
+                        if self.cache is not None:
+                            self.cache.put_many(infos)
+                        self._queue.put(infos)
+                finally:
+                    for future in futures:
+                        future.cancel()
+        except Exception as e:
+            self._queue.put([{"path": None, "error": str(e)}])
+        finally:
+            self._queue.put(None)
+
+    def poll(self):
+        """
+        前回から読み終えた分の情報のリスト（すべて読み終えたら finished が真になる）
+        """
+        infos = []
+        while True:
+            try:
+                chunk = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if chunk is None:
+                self.finished = True
+                break
+            infos.extend(info for info in chunk if info["path"] is not None)
+        return infos
+
+
+def summarize_infos(infos, total_files):
+    """
+    読み終えた情報の合計 {"files", "checked", "pages", "bytes", "encrypted", "unknown_pages", "errors"}
+    """
+    summary = {"files": total_files, "checked": len(infos), "pages": 0, "bytes": 0, "encrypted": 0,
+               "unknown_pages": 0, "errors": 0}
+    for info in infos:
+        summary["bytes"] += info["size"] or 0
+        summary["encrypted"] += bool(info["encrypted"])
+        summary["errors"] += info["error"] is not None
+        if info["pages"] is None:
+            summary["unknown_pages"] += 1
+        else:
+            summary["pages"] += info["pages"]
+    return summary
+
+
+def estimate_seconds(pages, ocr=False, workers=1, rates=None):
+    """
+    pages ページの結合（ocr=True ならOCR結合）にかかる時間の見積もり（秒）
+    rates: {"merge": ページ/秒, "ocr": 作業プロセス1つあたりのページ/秒}（前回の処理の実測値など，省略時は DEFAULT_RATES）
+    """
+    rates = {**DEFAULT_RATES, **(rates or {})}
+    if ocr:
+        return pages / (rates["ocr"] * max(1, workers))
+    return pages / rates["merge"]
+
+
+def format_scan_summary(summary, ocr=False, workers=1, rates=None):
+    text = f"{summary['files']}ファイル  {summary['pages']}ページ  {summary['bytes'] / 1e6:.1f}MB"
+    if summary["checked"] < summary["files"]:
+        text += f"（確認中 {summary['checked']}/{summary['files']}）"
+    if summary["encrypted"]:
+        text += f"  暗号化{summary['encrypted']}件"
+    if summary["errors"]:
+        text += f"  読めない{summary['errors']}件"
+    minutes, seconds = divmod(int(estimate_seconds(summary["pages"], ocr, workers, rates)), 60)
+    text += f"  推定{'OCR' if ocr else ''}結合時間 約{minutes}分{seconds:02d}秒"
+    return text
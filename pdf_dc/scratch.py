@@ -0,0 +1,18 @@
+import contextlib
+import os
+import tempfile
+
+# 作業用一時フォルダの置き場所（未指定ならOS既定の一時フォルダ）
+# ネットワーク上の一時フォルダが遅い場合は環境変数 PDF_DC_SCRATCH でローカルディスクを指定する
+SCRATCH_ROOT = os.environ.get("PDF_DC_SCRATCH") or None
+
+
+@contextlib.contextmanager
+def scratch_dir(prefix="pdf_dc_"):
+    """
+    作業用の一時フォルダを作り，ブロックを抜けたら（例外時も）中身ごと削除する
+    """
+    if SCRATCH_ROOT:
+        os.makedirs(SCRATCH_ROOT, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix=prefix, dir=SCRATCH_ROOT, ignore_cleanup_errors=True) as path:
+        yield path
@@ -0,0 +1,194 @@
+"""
+出力PDFの全文検索索引（SQLite FTS5）
+結合・分割・OCRの途中で，出力ページのテキスト（OCRしたページは認識結果，元からテキストのあるページは抽出結果）を
+出力ファイル・ページ番号ごとに登録する。PDFを開き直して extract_text で探す代わりに，索引を引いて一瞬で探せる
+
+    python -m pdf_dc search "請求書 2024"
+    python -m pdf_dc index archive/            （索引にないPDF・更新されたPDFだけを追加する）
+"""
+import os
+import time
+
+from PyPDF2 import PdfReader
+
+from .store import cache_dir, connect
+
+# 日本語は単語の区切りがないため，3文字単位（trigram）で索引を作る（部分一致で検索できる）
+TOKENIZER = "trigram"
+# trigramで引けない短い語（2文字以下）は全文を走査して探す
+MIN_TOKEN_CHARS = 3
+DEFAULT_LIMIT = 50
+
+
+def default_index_path():
+    # 環境変数 PDF_DC_INDEX で場所を変更できる（既定はOCRキャッシュと同じフォルダ）
+    return os.environ.get("PDF_DC_INDEX") or cache_dir("search_index.sqlite3")
+
+
+def page_text(page):
+    """
+    ページのテキスト（抽出できなければ空文字）
+    """
+    try:
+        return page.extract_text() or ""
+    except Exception:
+        return ""
+
+
+def words_text(words):
+    """
+    sidecar.pop_words の単語を1つの文字列にする（日本語どうしは詰め，それ以外は空白で区切る）
+    """
+    parts = []
+    for text, *_ in words:
+        if parts and not (parts[-1][-1:].isascii() or text[:1].isascii()):
+            parts[-1] += text
+        else:
+            parts.append(text)
+    return " ".join(parts)
+
+
+class SearchIndex:
+    """
+    出力PDFのページテキストの索引
+    同じ出力ファイルを登録し直すと，そのファイルの古いページは置き換えられる
+    """
+
+    def __init__(self, path=None):
+        self.path = path or default_index_path()
+        self._conn, self._lock = connect(self.path)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS documents (
+                    id INTEGER PRIMARY KEY,
+                    path TEXT NOT NULL UNIQUE,
+                    size INTEGER,
+                    mtime_ns INTEGER,
+                    page_count INTEGER NOT NULL DEFAULT 0,
+                    indexed_at REAL NOT NULL
+                )""")
+            self._conn.execute(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS pages USING fts5(
+                    text, doc_id UNINDEXED, page UNINDEXED, tokenize='{TOKENIZER}'
+                )""")
+        self._pending = {}  # 出力パス -> [(ページ番号, テキスト)]
+
+    def add_page(self, output_path, page_number, text):
+        """
+        出力PDFのページ（1始まり）のテキストを登録予約する（commit で書き込む）
+        """
+        self._pending.setdefault(os.path.abspath(output_path), []).append((page_number, text))
+
+    def commit(self, output_path):
+        """
+        予約したページで output_path の索引を置き換える（出力ファイルを書き終えてから呼ぶ）
+        """
+        path = os.path.abspath(output_path)
+        pages = self._pending.pop(path, [])
+        try:
+            st = os.stat(path)
+            size, mtime_ns = st.st_size, st.st_mtime_ns
+        except OSError:
+            size = mtime_ns = None
+        with self._lock, self._conn:
+            self._delete(path)
+            doc_id = self._conn.execute(
+                "INSERT INTO documents (path, size, mtime_ns, page_count, indexed_at) VALUES (?, ?, ?, ?, ?)",
+                (path, size, mtime_ns, len(pages), time.time()),
+            ).lastrowid
+            self._conn.executemany("INSERT INTO pages (text, doc_id, page) VALUES (?, ?, ?)",
+                                   [(text, doc_id, number) for number, text in pages])
+
+    def discard(self, output_path):
+        # 中断などで書き出さなかった出力の予約を取り消す
+        self._pending.pop(os.path.abspath(output_path), None)
+
+    def page_texts(self, path):
+        """
+        登録済みの path の {ページ番号: テキスト}（未登録なら空）
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT p.page, p.text FROM pages p JOIN documents d ON d.id = p.doc_id WHERE d.path=?",
+                (os.path.abspath(path),),
+            ).fetchall()
+        return dict(rows)
+
+    def remove(self, path):
+        with self._lock, self._conn:
+            self._delete(os.path.abspath(path))
+
+    def _delete(self, path):
+        row = self._conn.execute("SELECT id FROM documents WHERE path=?", (path,)).fetchone()
+        if row:
+            self._conn.execute("DELETE FROM pages WHERE doc_id=?", row)
+            self._conn.execute("DELETE FROM documents WHERE id=?", row)
+
+    def is_current(self, path):
+        """
+        path が索引済みで，その後サイズ・更新日時が変わっていなければ真
+        """
+        st = os.stat(path)
+        with self._lock:
+            row = self._conn.execute("SELECT size, mtime_ns FROM documents WHERE path=?",
+                                     (os.path.abspath(path),)).fetchone()
+        return row is not None and tuple(row) == (st.st_size, st.st_mtime_ns)
+
+    def index_pdf(self, path, reader=None, force=False):
+        """
+        既存のPDFのテキストを抽出して登録し，登録したページ数を返す（変わっていないPDFは0）
+        reader: 開いたPdfReader（暗号化PDFは復号済みのものを渡す．省略時はここで開く）
+        """
+        if not force and self.is_current(path):
+            return 0
+        if reader is None:
+            reader = PdfReader(path)
+        self.discard(path)
+        for number, page in enumerate(reader.pages, start=1):
+            self.add_page(path, number, page_text(page))
+        self.commit(path)
+        return len(reader.pages)
+
+    def prune(self):
+        """
+        ファイルが無くなった出力を索引から消し，消した件数を返す
+        """
+        with self._lock, self._conn:
+            paths = [row[0] for row in self._conn.execute("SELECT path FROM documents")]
+            missing = [path for path in paths if not os.path.exists(path)]
+            for path in missing:
+                self._delete(path)
+        return len(missing)
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        """
+        query を含むページを [{"path", "page", "snippet"}] で返す（関連度順）
+        空白で区切った語はすべて含むページ（AND）を探す
+        """
+        terms = query.split()
+        if not terms:
+            return []
+        if all(len(term) >= MIN_TOKEN_CHARS for term in terms):
+            match = " AND ".join('"' + term.replace('"', '""') + '"' for term in terms)
+            sql = ("SELECT d.path, p.page, snippet(pages, 0, '[', ']', '…', 16) FROM pages p "
+                   "JOIN documents d ON d.id = p.doc_id WHERE pages MATCH ? ORDER BY rank LIMIT ?")
+            params = (match, limit)
+        else:
+            # 短い語はtrigramの索引で引けないため，全ページを走査する
+            # （LIKEはtrigramの索引に回され，3バイト以上の2文字以下の語（日本語など）が見つからないため instr を使う）
+            contains = " AND ".join("instr(lower(p.text), lower(?)) > 0" for _ in terms)
+            sql = ("SELECT d.path, p.page, substr(p.text, 1, 80) FROM pages p "
+                   f"JOIN documents d ON d.id = p.doc_id WHERE {contains} ORDER BY d.path, p.page LIMIT ?")
+            params = (*terms, limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [{"path": path, "page": page, "snippet": " ".join(snippet.split())} for path, page, snippet in rows]
+
+    def stats(self):
+        with self._lock:
+            documents, pages = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(page_count), 0) FROM documents").fetchone()
+        return {"indexed_documents": documents, "indexed_pages": pages}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,90 @@
+"""
+OCRした単語の位置の索引（サイドカーファイル）
+OCRページ（PDFのbytes）は，単語の位置をページ辞書の独自キーに持ったまま
+キャッシュ・並列処理を通り，出力へ書き込む直前に取り出される（出力PDFには残さない）
+取り出した位置は <出力PDF名>.words.json / .words.tsv に書き出し，検索結果の強調表示にOCRなしで使える
+"""
+import csv
+import io
+import json
+import os
+
+from PyPDF2 import PdfReader
+from PyPDF2.generic import NameObject, TextStringObject
+
+from .search import words_text
+
+WORDS_KEY = "/PdfDcWords"
+SIDECAR_FORMATS = ("json", "tsv")
+
+
+def attach_words(page, words):
+    """
+    page（PyPDF2のページ）に単語の位置 [[text, x0, y0, x1, y1, conf], ...]（PDFの座標，pt）を持たせる
+    """
+    page[NameObject(WORDS_KEY)] = TextStringObject(json.dumps(words, separators=(",", ":")))
+
+
+def pop_words(page):
+    """
+    attach_words した単語の位置を取り出してページから消す（無ければNone）
+    """
+    value = page.get(WORDS_KEY)
+    if value is None:
+        return None
+    del page[WORDS_KEY]
+    return json.loads(value)
+
+
+def page_pdf_text(page_pdf):
+    """
+    OCRページ（PDFのbytes）に持たせた単語の位置から，ページのテキストを作る（無ければ空文字）
+    """
+    value = PdfReader(io.BytesIO(page_pdf)).pages[0].get(WORDS_KEY)
+    return words_text(json.loads(value)) if value is not None else ""
+
+
+def sidecar_path(output_pdf, fmt):
+    return f"{os.path.splitext(output_pdf)[0]}.words.{fmt}"
+
+
+class WordIndex:
+    """
+    1つの出力PDFの単語の位置を集めて書き出す
+    fmt: SIDECAR_FORMATS のいずれか
+    """
+
+    def __init__(self, output_pdf, fmt):
+        if fmt not in SIDECAR_FORMATS:
+            raise ValueError(f"未対応の索引形式です: {fmt}")
+        self.output_pdf = output_pdf
+        self.fmt = fmt
+        self.pages = []
+
+    def add(self, page_number, page, words):
+        """
+        page_number: 出力PDFでのページ番号（1始まり），words: pop_words の結果（Noneなら何もしない）
+        """
+        if words is None:
+            return
+        box = page.mediabox
+        self.pages.append({"page": page_number, "width": float(box.width), "height": float(box.height),
+                           "words": [{"text": text, "bbox": [x0, y0, x1, y1], "conf": conf}
+                                     for text, x0, y0, x1, y1, conf in words]})
+
+    def write(self):
+        """
+        索引ファイルを書き出してそのパスを返す
+        """
+        path = sidecar_path(self.output_pdf, self.fmt)
+        if self.fmt == "json":
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"pdf": os.path.basename(self.output_pdf), "pages": self.pages}, f, ensure_ascii=False)
+        else:
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                out = csv.writer(f, delimiter="\t", lineterminator="\n")
+                out.writerow(["page", "x0", "y0", "x1", "y1", "conf", "text"])
+                for page in self.pages:
+                    for word in page["words"]:
+                        out.writerow([page["page"], *word["bbox"], word["conf"], word["text"]])
+        return path
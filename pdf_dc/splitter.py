@@ -0,0 +1,98 @@
+"""
+分割の出力単位（1ページずつ・Nページごと・しおりごと）の決定と，出力ファイルの並列書き出し
+"""
+import math
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from PyPDF2 import PdfReader, PdfWriter
+
+from .pool import submit_bounded
+
+# 並列に書き出す最小の合計ページ数（テキストのページの書き出しは1ページ1ミリ秒ほどで，
+# これより少ないと作業プロセスの起動・元PDFの読み直しの方が時間がかかる）
+PARALLEL_MIN_PAGES = 200
+
+
+def bookmark_starts(reader):
+    """
+    最上位のしおりの (開始ページ（0始まり）, 題名) をページ順に返す（同じページのしおりは先のものを使う）
+    """
+    starts = {}
+    for item in reader.outline:
+        if isinstance(item, list):  # 下位のしおり
+            continue
+        try:
+            page = reader.get_destination_page_number(item)
+        except Exception:
+            continue
+        if page is not None and page >= 0:
+            starts.setdefault(page, str(item.title or ""))
+    return sorted(starts.items())
+
+
+def page_groups(reader, page_indices, every=None, by_bookmark=False):
+    """
+    出力ファイルごとのページのまとまり [(ページ番号のリスト, 題名), ...] を返す
+    page_indices: 出力するページ（0始まり，昇順）
+    every: Nページごとにまとめる（省略時は1ページずつ）
+    by_bookmark: 最上位のしおりの区切りでまとめる（最初のしおりより前のページは題名なし）
+    """
+    if by_bookmark:
+        starts = bookmark_starts(reader)
+        if not starts or starts[0][0] != 0:
+            starts.insert(0, (0, ""))
+        ends = [start for start, _ in starts[1:]] + [len(reader.pages)]
+        selected = set(page_indices)
+        groups = []
+        for (start, title), end in zip(starts, ends):
+            pages = [i for i in range(start, end) if i in selected]
+            if pages:
+                groups.append((pages, title))
+        return groups
+    size = max(1, every or 1)
+    return [(page_indices[k:k+size], "") for k in range(0, len(page_indices), size)]
+
+
+def safe_filename(title, default="untitled"):
+    # ファイル名に使えない文字・空白を _ にする
+    name = re.sub(r'[\\/:*?"<>|\s]+', "_", title).strip("._")
+    return name or default
+
+
+def _write_task(task):
+    # 1プロセスで元PDFを一度だけ開き，割り当てられた出力ファイルを順に書き出す
+    path, password, groups = task
+    reader = PdfReader(path)
+    if password is not None:
+        reader.decrypt(password)
+    for pages, out_path in groups:
+        writer = PdfWriter()
+        for i in pages:
+            writer.add_page(reader.pages[i])
+        with open(out_path, "wb") as f:
+            writer.write(f)
+    return sum(len(pages) for pages, _ in groups)
+
+
+def write_tasks(jobs, workers):
+    """
+    jobs: (元PDF, パスワード, ページ番号のリスト, 出力先) の列
+    元PDFごとに，出力ファイルを並列数と同じ数のタスクにまとめる
+    （各タスクで元PDFのページツリーを読み直すため，タスクを細かくすると読み込みの重複が増える）
+    """
+    by_file = {}
+    for path, password, pages, out_path in jobs:
+        by_file.setdefault((path, password), []).append((pages, out_path))
+    for (path, password), groups in by_file.items():
+        size = max(1, math.ceil(len(groups) / workers))
+        for k in range(0, len(groups), size):
+            yield (path, password, groups[k:k+size])
+
+
+def write_parallel(tasks, workers):
+    """
+    write_tasks のタスクを複数プロセスで書き出し，タスクごとの書き出しページ数を順に返すジェネレータ
+    """
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from submit_bounded(executor, _write_task, tasks, workers)
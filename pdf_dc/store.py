@@ -0,0 +1,44 @@
+"""
+ディスク（SQLite）に置くキャッシュ・索引の共通処理
+OCRキャッシュ・全文検索索引・PDFの情報・サムネイルは，同じフォルダに別々のファイルとして置く
+"""
+import os
+import sqlite3
+import threading
+
+# 上限を超えたら，上限のこの割合まで減らす（追加のたびに削除が起きないように）
+EVICT_RATIO = 0.9
+
+
+def cache_dir(name=""):
+    """
+    キャッシュのフォルダ（Windowsは LOCALAPPDATA，それ以外は XDG_CACHE_HOME か ~/.cache の下の pdf_dc）の name のパス
+    """
+    base = os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "pdf_dc", name)
+
+
+def connect(path):
+    """
+    path のSQLiteに接続し (接続, ロック) を返す（フォルダが無ければ作る）
+    GUIの作業スレッドや先読み・描画のスレッドからも使うため，接続はスレッド間で共有し，使う間はロックを取る
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    return sqlite3.connect(path, check_same_thread=False), threading.Lock()
+
+
+def evict_lru(conn, table, total, max_bytes):
+    """
+    table（size・last_used 列を持つ）の行を，最後に使われたのが古いものから合計が max_bytes の EVICT_RATIO 以下に
+    なるまで削除し，削除後の合計サイズを返す（total: 削除前の合計．ロックを取ったトランザクションの中で呼ぶ）
+    """
+    target = max_bytes * EVICT_RATIO
+    rows = conn.execute(f"SELECT rowid, size FROM {table} ORDER BY last_used").fetchall()
+    doomed = []
+    for rowid, size in rows:
+        if total <= target:
+            break
+        doomed.append((rowid,))
+        total -= size
+    conn.executemany(f"DELETE FROM {table} WHERE rowid=?", doomed)
+    return total
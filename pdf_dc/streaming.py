@@ -0,0 +1,172 @@
+import gc
+import os
+
+from pdf2image import pdfinfo_from_path
+from PyPDF2 import PdfReader, PdfWriter
+
+from .cache import iter_cached_pages
+from .core import check_cancel
+from .mergewriter import StreamingPdfWriter
+from .ocr import (PAGE_BACKENDS, IMAGE_PROFILES, DEFAULT_IMAGE_PROFILE, make_ocr_page, pdf_page_to_searchable_pdf_page,
+                  read_page_pdf)
+from .options import DEFAULT_CHUNK_PAGES, DEFAULT_MAX_MEMORY_MB, DEFAULT_STREAM_BACKEND
+from .profiling import stage
+from .preprocess import MIN_OCR_DPI, check_steps, ocr_variant, page_dpis
+from .raster import DocumentRasterizer
+from .recognizer import DEFAULT_RECOGNIZER, set_recognizer_kind
+from .scratch import scratch_dir
+from .search import page_text, words_text
+from .sidecar import WordIndex, pop_words
+
+# 既定のOCRページの生成方式（GUIの従来の出力と同じ用紙）
+DEFAULT_BACKEND = DEFAULT_STREAM_BACKEND
+
+
+class _ChunkWriter:
+    """
+    OCRページ（PDFのbytes）を追加し，ページ数かデータ量が上限に達したら
+    部分PDFとして一時フォルダへ書き出してチャンクを作り直す
+    index: sidecar.WordIndex を渡すと，各ページの単語の位置を記録する
+    on_text(page_number, text): 各ページのテキストを受け取る（全文検索索引への登録用）
+    """
+
+    def __init__(self, work_dir, chunk_pages, max_memory_bytes, index=None, on_text=None):
+        self.work_dir = work_dir
+        self.chunk_pages = chunk_pages
+        self.max_memory_bytes = max_memory_bytes
+        self.index = index
+        self.on_text = on_text
+        self.parts = []
+        self.total_pages = 0
+        self._start_chunk()
+
+    def _start_chunk(self):
+        self.writer = PdfWriter()
+        self.pages = 0
+        self.chunk_bytes = 0
+
+    def add_page(self, page_pdf):
+        page = read_page_pdf(page_pdf)
+        words = pop_words(page)
+        self.total_pages += 1
+        if self.index is not None:
+            self.index.add(self.total_pages, page, words)
+        if self.on_text is not None:
+            self.on_text(self.total_pages, words_text(words) if words is not None else page_text(page))
+        self.writer.add_page(page)
+        # ページごとの reader は id() が使い回されるため，対応表から外す（core._release_ocr_page と同じ理由）
+        self.writer.reset_translation(page.pdf)
+        self.pages += 1
+        self.chunk_bytes += len(page_pdf)
+        if self.pages >= self.chunk_pages or self.chunk_bytes >= self.max_memory_bytes:
+            self.flush()
+
+    def flush(self):
+        if self.pages == 0:
+            return
+        part_path = os.path.join(self.work_dir, f"part_{len(self.parts):05d}.pdf")
+        with stage("write", path=part_path, pages=self.pages) as event, open(part_path, "wb") as f:
+            self.writer.write(f)
+            event["bytes_out"] = f.tell()
+        self.parts.append(part_path)
+        self._start_chunk()
+
+
+def _concat_parts(parts, output_pdf):
+    # 部分PDFを1つずつ開いてページを出力へ直接書き出し，写し終えたら手放す
+    # （最後の連結でも，メモリに載るのは部分PDF1つ分だけ．中断時は出力を削除する）
+    try:
+        with stage("write", path=output_pdf) as event, open(output_pdf, "wb") as f:
+            writer = StreamingPdfWriter(f)
+            for part in parts:
+                with stage("read", path=part, bytes_in=os.path.getsize(part)), open(part, "rb") as src:
+                    reader = PdfReader(src)
+                    for page in reader.pages:
+                        writer.add_page(page)
+                    writer.release(reader)
+                    del reader
+                # PdfReaderは循環参照を持つため，明示的に回収しないと読み込んだ部分PDFがメモリに残り続ける
+                gc.collect()
+            writer.close()
+            event["bytes_out"] = f.tell()
+    except BaseException:
+        if os.path.exists(output_pdf):
+            os.remove(output_pdf)
+        raise
+
+
+def ocr_pdf(input_pdf, output_pdf, lang='jpn+eng', progress=None, dpi=200,
+            chunk_pages=DEFAULT_CHUNK_PAGES, max_memory_mb=DEFAULT_MAX_MEMORY_MB, poppler_path=None,
+            backend=DEFAULT_BACKEND, cache=None, cancel=None, profile=DEFAULT_IMAGE_PROFILE,
+            adaptive_dpi=False, min_dpi=MIN_OCR_DPI, preprocess=(), recognizer=DEFAULT_RECOGNIZER, sidecar=None,
+            search_index=None, password=None):
+    """
+    PDF全体をOCRしてサーチャブルPDFを出力し，処理結果の概要（dict）を返す
+    ページは1枚ずつ画像化→OCR→追加し，chunk_pagesページ（またはmax_memory_mb）ごとに
+    部分PDFへ書き出すため，ページ数が増えても展開済み画像がメモリに溜まらない
+    progress: progress(done, total) を呼び出すコールバック
+    backend: OCRページの生成方式（ocr.PAGE_BACKENDS のキー，既定は従来と同じfpdf）
+    cache: cache.OcrCache を渡すと，キャッシュ済みのページは画像化・OCRしない
+    cancel: is_set() が真になったら core.Cancelled を送出して中止する（出力ファイルは作らない）
+    profile: 埋め込む画像の圧縮方法（ocr.IMAGE_PROFILES のキー，OCRはdpiの画像で行う）
+    adaptive_dpi: 真なら埋め込み画像の解像度に合わせ，ページごとに min_dpi〜dpi の範囲で描画する
+    preprocess: OCR前の画像処理（preprocess.PREPROCESS_STEPS の組み合わせ）
+    recognizer: 文字認識エンジン（recognizer.RECOGNIZERS のいずれか，言語データは1度だけ読み込む）
+    sidecar: "json" / "tsv" なら，単語の位置の索引を出力PDFの横に書き出す（sidecar.WordIndex）
+    search_index: search.SearchIndex を渡すと，出力の各ページの認識結果を全文検索索引に登録する
+    password: パスワード付きPDFのパスワード（pdftoppm に渡す．core.ocr では open_reader で確かめたもの）
+    """
+    if backend not in PAGE_BACKENDS:
+        raise ValueError(f"未対応のOCR出力方式です: {backend}")
+    if profile not in IMAGE_PROFILES:
+        raise ValueError(f"未対応の画像圧縮方法です: {profile}")
+    check_steps(preprocess)
+    set_recognizer_kind(recognizer)
+    total_pages = pdfinfo_from_path(input_pdf, userpw=password, poppler_path=poppler_path)["Pages"]
+    rasterizer = DocumentRasterizer(input_pdf, dpi=dpi, batch_size=chunk_pages, poppler_path=poppler_path,
+                                    password=password)
+
+    def ocr_pages(pages):
+        indices = [i for _, i in pages]
+        dpis = page_dpis(input_pdf, indices, dpi, min_dpi, password) if adaptive_dpi else {}
+        for i, image in rasterizer.iter_pages(indices, dpis):
+            yield make_ocr_page(backend, image, path=input_pdf, page=i, lang=lang, dpi=dpis.get(i, dpi), profile=profile,
+                                preprocess=preprocess)
+            image.close()
+
+    pages = [(input_pdf, i) for i in range(total_pages)]
+    if cache is None:
+        page_pdfs = ocr_pages(pages)
+    else:
+        page_pdfs = iter_cached_pages(
+            cache, pages,
+            key_for=lambda path, i: cache.page_key(path, i, dpi, lang, backend, profile,
+                                                   ocr_variant(adaptive_dpi, min_dpi, preprocess)),
+            ocr_misses=ocr_pages,
+            ocr_one=lambda path, i: pdf_page_to_searchable_pdf_page(path, i, lang=lang, poppler_path=poppler_path,
+                                                                    backend=backend, dpi=dpi, profile=profile,
+                                                                    adaptive_dpi=adaptive_dpi, min_dpi=min_dpi,
+                                                                    preprocess=preprocess, password=password),
+        )
+    with scratch_dir(prefix="pdf_dc_ocr_") as work_dir:
+        index = WordIndex(output_pdf, sidecar) if sidecar else None
+        on_text = None
+        if search_index is not None:
+            search_index.discard(output_pdf)
+            on_text = lambda number, text: search_index.add_page(output_pdf, number, text)
+        chunks = _ChunkWriter(work_dir, chunk_pages, max_memory_mb * 1024 * 1024, index, on_text)
+        for done, page_pdf in enumerate(page_pdfs, start=1):
+            check_cancel(cancel)
+            chunks.add_page(page_pdf)
+            if progress is not None:
+                progress(done, total_pages)
+        chunks.flush()
+        _concat_parts(chunks.parts, output_pdf)
+    if search_index is not None:
+        search_index.commit(output_pdf)
+    summary = {"pages": total_pages}
+    if index is not None:
+        summary["sidecars"] = [index.write()]
+    if cache is not None:
+        summary.update(cache.summary())
+    return summary
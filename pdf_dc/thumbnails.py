@@ -0,0 +1,251 @@
+"""
+結合の並べ替えリスト用のサムネイル（各ファイルの先頭ページを低解像度で描画したPNG）
+描画は作業プロセスで行い，ファイル内容のハッシュをキーにディスク（SQLite）へ記憶する。
+合計サイズが上限を超えたら，最後に使われたのが古い順に削除する（LRU）。
+パス・サイズ・更新日時が同じ間はハッシュも記憶したものを使うため，フォルダを開き直すとすぐに表示できる
+"""
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from .cache import file_digest
+from .store import cache_dir, connect, evict_lru
+
+# サムネイルの描画解像度（A4で約100×140ピクセル）と，描画する先頭のページ数
+THUMBNAIL_DPI = 12
+THUMBNAIL_PAGES = 2
+DEFAULT_MAX_MB = 128
+# 作業プロセスに同時に渡しておく件数（作業プロセス1つあたり．残りは新しい要求を先に描画するため手元で待たせる）
+IN_FLIGHT_PER_WORKER = 2
+# 描画中に新しい要求を確かめる間隔（秒）
+WAIT_SECONDS = 0.2
+
+
+def default_thumbnail_cache_path():
+    # 環境変数 PDF_DC_THUMBNAILS で場所を変更できる（既定はOCRキャッシュと同じフォルダ）
+    return os.environ.get("PDF_DC_THUMBNAILS") or cache_dir("thumbnails.sqlite3")
+
+
+def render_thumbnails(path, pages=THUMBNAIL_PAGES, dpi=THUMBNAIL_DPI, password=None, poppler_path=None):
+    """
+    path の先頭 pages ページを dpi で描画し，PNGのbytesのリストで返す（作業プロセスで実行）
+    password: パスワード付きPDFのパスワード（pdftoppm に渡す）
+    """
+    import io
+    from pdf2image import convert_from_path
+    images = convert_from_path(path, dpi=dpi, first_page=1, last_page=pages, userpw=password,
+                               poppler_path=poppler_path)
+    pngs = []
+    for image in images:
+        buf = io.BytesIO()
+        image.save(buf, format="PNG", optimize=True)
+        pngs.append(buf.getvalue())
+    return pngs
+
+
+class ThumbnailCache:
+    """
+    サムネイルのディスクキャッシュ（SQLite）
+    キーは ファイル内容のハッシュ・描画解像度（ファイル名を変えても，別のフォルダにコピーしても使える）
+    """
+
+    def __init__(self, path=None, max_mb=DEFAULT_MAX_MB):
+        self.path = path or default_thumbnail_cache_path()
+        self.max_bytes = max_mb * 1024 * 1024
+        self._conn, self._lock = connect(self.path)
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS thumbnails (
+                    file_hash TEXT NOT NULL,
+                    dpi INTEGER NOT NULL,
+                    page_index INTEGER NOT NULL,
+                    png BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (file_hash, dpi, page_index)
+                )""")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS thumbnails_last_used ON thumbnails (last_used)")
+            # ハッシュの計算（ファイル全体の読み込み）を省くため，パス・サイズ・更新日時ごとのハッシュを記憶する
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    file_hash TEXT NOT NULL
+                )""")
+        self._total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM thumbnails").fetchone()[0]
+
+    def file_hash(self, path):
+        """
+        path の内容のハッシュ（サイズ・更新日時が前回と同じなら記憶したものを返す）
+        """
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        with self._lock:
+            row = self._conn.execute("SELECT file_hash FROM files WHERE path=? AND size=? AND mtime_ns=?",
+                                     (path, st.st_size, st.st_mtime_ns)).fetchone()
+        if row:
+            return row[0]
+        digest = file_digest(path)
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                               (path, st.st_size, st.st_mtime_ns, digest))
+        return digest
+
+    def get(self, file_hash, dpi=THUMBNAIL_DPI):
+        """
+        PNGのbytesのリストを返す（無ければNone）
+        """
+        with self._lock, self._conn:
+            rows = self._conn.execute("SELECT png FROM thumbnails WHERE file_hash=? AND dpi=? ORDER BY page_index",
+                                      (file_hash, dpi)).fetchall()
+            if rows:
+                self._conn.execute("UPDATE thumbnails SET last_used=? WHERE file_hash=? AND dpi=?",
+                                   (time.time(), file_hash, dpi))
+        return [bytes(row[0]) for row in rows] if rows else None
+
+    def put(self, file_hash, pngs, dpi=THUMBNAIL_DPI):
+        now = time.time()
+        with self._lock, self._conn:
+            old = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM thumbnails WHERE file_hash=? AND dpi=?",
+                                     (file_hash, dpi)).fetchone()[0]
+            self._conn.execute("DELETE FROM thumbnails WHERE file_hash=? AND dpi=?", (file_hash, dpi))
+            self._conn.executemany("INSERT INTO thumbnails VALUES (?, ?, ?, ?, ?, ?)",
+                                   [(file_hash, dpi, i, png, len(png), now) for i, png in enumerate(pngs)])
+            self._total += sum(len(png) for png in pngs) - old
+            if self._total > self.max_bytes:
+                self._total = evict_lru(self._conn, "thumbnails", self._total, self.max_bytes)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ThumbnailLoader:
+    """
+    request(path) されたファイルのサムネイルをバックグラウンドで用意し，poll() で受け取る
+    キャッシュにあればすぐに，無ければ workers 個の作業プロセスで描画する。
+    後から要求されたもの（いま画面に見えている行）を先に描画し，作業プロセスには少しずつ渡す
+    memory_items: 描画済みのPNGをメモリにも置いておく件数（同じファイルを何度も選んでもキャッシュを引かない）
+    """
+
+    def __init__(self, cache=None, workers=1, dpi=THUMBNAIL_DPI, pages=THUMBNAIL_PAGES, poppler_path=None,
+                 memory_items=256):
+        self.cache = cache
+        self.workers = max(1, workers)
+        self.dpi = dpi
+        self.pages = pages
+        self.poppler_path = poppler_path
+        self.memory_items = memory_items
+        self._memory = OrderedDict()  # パス -> PNGのリスト（空なら描画できなかった）
+        self._pending = OrderedDict()  # パス -> パスワード（後ろほど新しい要求）
+        self._requested = set()
+        self._results = queue.Queue()
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = None
+
+    def get(self, path):
+        """
+        描画済みならPNGのリスト（描画できなかったファイルは空のリスト），まだならNone
+        """
+        pngs = self._memory.get(path)
+        if pngs is not None:
+            self._memory.move_to_end(path)
+        return pngs
+
+    def request(self, path, password=None):
+        # 描画済み・要求済みなら何もしない（まだ描画を待っていれば順番だけ先頭にする）
+        if path in self._memory:
+            return
+        with self._cond:
+            if path in self._pending:
+                self._pending.move_to_end(path)
+                return
+            if path in self._requested:
+                return
+            self._pending[path] = password
+            self._requested.add(path)
+            self._cond.notify()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def poll(self):
+        """
+        前回から用意できたファイルのパスのリスト（get で受け取る）
+        """
+        ready = []
+        while True:
+            try:
+                path, pngs = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._memory[path] = pngs
+            self._memory.move_to_end(path)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+            with self._cond:
+                self._requested.discard(path)
+            ready.append(path)
+        return ready
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._pending.clear()
+            self._cond.notify()
+
+    def _next(self, in_flight):
+        # 新しい要求を取り出す（作業プロセスが埋まっている・要求が無い間は待つ）
+        with self._cond:
+            while not self._stopped and (not self._pending or in_flight >= self.workers * IN_FLIGHT_PER_WORKER):
+                if in_flight:
+                    return None  # 描画の終わったものを先に受け取る
+                self._cond.wait()
+            if self._stopped:
+                return False
+            return self._pending.popitem(last=True)
+
+    def _cached(self, path):
+        if self.cache is None:
+            return None, None
+        try:
+            file_hash = self.cache.file_hash(path)
+        except OSError:
+            return None, None
+        return file_hash, self.cache.get(file_hash, self.dpi)
+
+    def _run(self):
+        # with 文で閉じると描画中・待ち中の作業をすべて待つため，止めたら待たずに取り消して作業プロセスを終わらせる
+        executor = ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            running = {}  # future -> (パス, ハッシュ)
+            while True:
+                item = self._next(len(running))
+                if item is False:
+                    break
+                if item is not None:
+                    path, password = item
+                    file_hash, pngs = self._cached(path)
+                    if pngs is not None:
+                        self._results.put((path, pngs))
+                        continue
+                    future = executor.submit(render_thumbnails, path, self.pages, self.dpi, password, self.poppler_path)
+                    running[future] = (path, file_hash)
+                    continue
+                done, _ = wait(running, timeout=WAIT_SECONDS, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path, file_hash = running.pop(future)
+                    try:
+                        pngs = future.result()
+                    except Exception:
+                        pngs = []  # 壊れたPDF・パスワードの分からないPDF・popplerが無い場合は表示しない
+                    if pngs and self.cache is not None and file_hash is not None:
+                        self.cache.put(file_hash, pngs, self.dpi)
+                    self._results.put((path, pngs))
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,291 @@
+"""
+監視フォルダ（スキャナーが共有フォルダに置いたPDFを，届いた順に自動でOCR・結合する常駐処理）
+
+    python -m pdf_dc watch inbox/ --output-dir searchable/
+    python -m pdf_dc watch inbox/ --merge-into daily.pdf --ocr
+
+フォルダは一定間隔で走査する（watchdog があれば変更の通知で走査を早める）。
+書き込み中のファイルを拾わないよう，サイズ・更新日時が settle_seconds 秒変わらず，
+末尾に %%EOF のあるファイルだけを処理待ちの列（上限 queue_size 件）に入れ，workers 個の作業スレッドで処理する。
+処理済み・処理待ち・失敗したファイルは状態ファイル（JSON）に保存し，再起動後は続きから処理する
+"""
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    Observer = None
+
+from .core import InputNotFound, merge, ocr
+from .incremental import merge_incremental
+
+STATE_VERSION = 1
+# サイズ・更新日時がこの秒数変わらなければ書き込みが終わったとみなす
+DEFAULT_SETTLE_SECONDS = 5.0
+# フォルダを走査する間隔（秒）
+DEFAULT_POLL_INTERVAL = 2.0
+DEFAULT_QUEUE_SIZE = 64
+# PDFの末尾を確かめる範囲（%%EOF の後ろに改行や空白が付くことがある）
+EOF_TAIL_BYTES = 1024
+
+
+def default_state_path(folder):
+    return os.path.join(folder, ".pdf_dc_watch.json")
+
+
+def _signature(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def is_complete_pdf(path):
+    """
+    末尾に %%EOF があれば真（書き込み中・他のプロセスが開いたままで読めないファイルは偽）
+    """
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - EOF_TAIL_BYTES))
+            return b"%%EOF" in f.read()
+    except OSError:
+        return False
+
+
+def ocr_action(output_dir=None, template=None, **ocr_options):
+    """
+    届いたPDFを1ファイルずつ core.ocr でサーチャブルPDFにする処理を返す
+    """
+    def action(path, processed):
+        options = dict(ocr_options)
+        if template:
+            options["template"] = template
+        return ocr([path], output_dir=output_dir, **options)
+    return action
+
+
+def merge_action(output_path, incremental=True, **merge_options):
+    """
+    届いたPDFを含め，これまでに処理したPDFをすべて（名前順に）output_path へ結合し直す処理を返す
+    （1つの出力に書き込むため，WatchService の workers は1にする）
+    incremental: 真なら前回の結合結果を再利用して，新しいファイルだけを結合（OCR）する
+    """
+    def action(path, processed):
+        paths = sorted(set(processed) | {path})
+        if incremental:
+            return merge_incremental(paths, output_path, **merge_options)
+        return merge(paths, output_path, **merge_options)
+    return action
+
+
+class WatchService:
+    """
+    folders を監視し，書き込みの終わったPDFごとに action(path, processed) を作業スレッドで呼ぶ
+    action: ocr_action / merge_action の結果など（processed はそれまでに処理し終えた入力のリスト）
+    outputs: 監視対象から除くファイル（出力先が監視フォルダの中にある場合など）
+    log(message): 処理の記録（既定は標準エラー出力）
+    """
+
+    def __init__(self, folders, action, state_path=None, settle_seconds=DEFAULT_SETTLE_SECONDS,
+                 poll_interval=DEFAULT_POLL_INTERVAL, queue_size=DEFAULT_QUEUE_SIZE, workers=1,
+                 outputs=(), log=None):
+        self.folders = [os.path.abspath(folder) for folder in folders]
+        for folder in self.folders:
+            if not os.path.isdir(folder):
+                raise InputNotFound(f"監視するフォルダが見つかりません: {folder}")
+        self.action = action
+        self.state_path = state_path or default_state_path(self.folders[0])
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.workers = max(1, workers)
+        self.ignored = {os.path.abspath(path) for path in outputs} | {os.path.abspath(self.state_path)}
+        self.log = log or (lambda message: print(message, file=sys.stderr))
+        self.stop_event = threading.Event()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max(1, queue_size))
+        self._observed = {}     # パス -> (サイズと更新日時, 最後に変化を見た時刻)
+        self._ready = deque()   # 書き込みが終わったが，処理待ちの列が一杯で入れられないファイル
+        self._active = set()    # 処理待ち・処理中のファイル
+        self.processed = {}     # パス -> 処理したときのサイズと更新日時
+        self.failed = {}        # パス -> {"signature", "error"}
+        self._load_state()
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        if state.get("version") != STATE_VERSION:
+            return
+        self.processed = state.get("processed", {})
+        self.failed = state.get("failed", {})
+        # 前回処理待ち・処理中だったファイルは，書き込みの終了を待たずに処理し直す
+        for path in state.get("queued", []):
+            if os.path.isfile(path) and path not in self._active:
+                self._ready.append(path)
+                self._active.add(path)
+
+    def _save_state(self):
+        # 処理待ちの順番を保ったまま書き出す（書き込み途中で止まっても壊れないよう，一時ファイルから置き換える）
+        with self._lock:
+            queued = list(self._queue.queue) + list(self._ready)
+            queued += sorted(self._active - set(queued))
+            state = {"version": STATE_VERSION, "processed": dict(self.processed), "failed": dict(self.failed),
+                     "queued": queued}
+        tmp = self.state_path + ".tmp"
+        with self._save_lock:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(state, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, self.state_path)
+
+    def _candidates(self):
+        for folder in self.folders:
+            try:
+                entries = list(os.scandir(folder))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.name.lower().endswith(".pdf") and entry.is_file():
+                    path = os.path.abspath(entry.path)
+                    if path not in self.ignored:
+                        st = entry.stat()
+                        yield path, [st.st_size, st.st_mtime_ns]
+
+    def scan(self):
+        """
+        フォルダを1回走査し，書き込みの終わった新しい・変わったPDFを処理待ちの列に入れる
+        処理待ちに入れたファイル数を返す
+        """
+        now = time.monotonic()
+        seen = set()
+        with self._lock:
+            for path, signature in self._candidates():
+                seen.add(path)
+                if path in self._active or self.processed.get(path) == signature:
+                    continue
+                if self.failed.get(path, {}).get("signature") == signature:
+                    continue  # 失敗したファイルは，置き直される（変わる）まで処理しない
+                previous = self._observed.get(path)
+                if previous is None or previous[0] != signature:
+                    self._observed[path] = (signature, now)
+                    continue
+                if now - previous[1] < self.settle_seconds or not is_complete_pdf(path):
+                    continue
+                del self._observed[path]
+                self._ready.append(path)
+                self._active.add(path)
+            for path in set(self._observed) - seen:
+                del self._observed[path]
+            added = 0
+            while self._ready:
+                try:
+                    self._queue.put_nowait(self._ready[0])
+                except queue.Full:
+                    break  # 作業が追いつくまで残りはフォルダに置いたままにする
+                self._ready.popleft()
+                added += 1
+        if added:
+            self._save_state()
+        return added
+
+    def _work(self):
+        while not self.stop_event.is_set():
+            try:
+                path = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                self._process(path)
+            finally:
+                self._queue.task_done()
+                self._wake.set()  # 空いた処理待ちの列を埋める
+
+    def _process(self, path):
+        started = time.perf_counter()
+        with self._lock:
+            processed = sorted(p for p in self.processed if os.path.exists(p))
+        if not os.path.isfile(path):
+            # 処理待ちの間に消されたファイル
+            with self._lock:
+                self._active.discard(path)
+            self.log(f"watch: 見つかりません {path}")
+            self._save_state()
+            return
+        signature = _signature(path)
+        try:
+            summary = self.action(path, processed)
+        except Exception as e:
+            with self._lock:
+                self.failed[path] = {"signature": signature, "error": str(e)}
+                self._active.discard(path)
+            self.log(f"watch: 失敗 {path}: {e}")
+        else:
+            with self._lock:
+                self.processed[path] = signature
+                self.failed.pop(path, None)
+                self._active.discard(path)
+                self.ignored.update(os.path.abspath(out) for out in summary.get("outputs", []))
+            self.log(f"watch: {os.path.basename(path)} → {', '.join(summary.get('outputs', []))}"
+                     f"（{summary.get('pages', 0)}ページ, {time.perf_counter() - started:.1f}秒）")
+        self._save_state()
+
+    def _start_observer(self):
+        # watchdog があればファイルの変更を通知で受け取り，次の走査を待たずに調べる
+        if Observer is None:
+            return None
+        wake = self._wake
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                wake.set()
+
+        observer = Observer()
+        for folder in self.folders:
+            observer.schedule(Handler(), folder, recursive=False)
+        observer.daemon = True
+        observer.start()
+        return observer
+
+    def run(self):
+        """
+        stop() が呼ばれるか Ctrl+C で止めるまで監視を続ける（処理中のファイルは終わるまで待つ）
+        """
+        threads = [threading.Thread(target=self._work, daemon=True) for _ in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        observer = self._start_observer()
+        self.log(f"watch: {', '.join(self.folders)} を監視しています（Ctrl+Cで終了）")
+        try:
+            while not self.stop_event.is_set():
+                self.scan()
+                # 通知があってもすぐには走査せず，書き込みが続いているか見るため少し待つ
+                if self._wake.wait(self.poll_interval):
+                    self._wake.clear()
+                    self.stop_event.wait(min(self.poll_interval, 0.2))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop_event.set()
+            if observer is not None:
+                observer.stop()
+            for thread in threads:
+                thread.join()
+            self._save_state()
+        return self.stats()
+
+    def stop(self):
+        self.stop_event.set()
+        self._wake.set()
+
+    def stats(self):
+        with self._lock:
+            return {"processed": len(self.processed), "failed": len(self.failed), "queued": len(self._active)}
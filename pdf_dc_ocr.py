@@ -1,67 +1,81 @@
+import base64
 import os
 import tkinter as tk
 from tkinter import (
     Tk, Frame, Button, Label, Listbox, SINGLE, END,
-    filedialog, messagebox, simpledialog, Checkbutton, IntVar
+    filedialog, messagebox, simpledialog, Checkbutton, IntVar, StringVar, OptionMenu, ttk
 )
-from PyPDF2 import PdfReader, PdfWriter
-import tempfile
-import shutil
-
-# --- OCR系ライブラリ ---
-from pdf2image import convert_from_path
-from PIL import Image
-import pytesseract
-from reportlab.pdfgen import canvas
-from reportlab.lib.utils import ImageReader
+import multiprocessing
+
+# --- 結合/分割/OCR処理（pdf_dc パッケージ）---
+from pdf_dc import core
+from pdf_dc.incremental import merge_incremental
+from pdf_dc.classify import summarize_decisions
+from pdf_dc.credentials import CredentialStore, prescan, try_password
+from pdf_dc.options import (DEFAULT_IMAGE_PROFILE, DEFAULT_PAGE_BACKEND, DEFAULT_WORKERS, IMAGE_PROFILES,
+                            PAGE_BACKEND_NAMES, PREPROCESS_STEPS)
+from pdf_dc.profiling import profiled
+from pdf_dc.scanner import InfoCache, InfoPrefetcher, format_scan_summary, scan_folder, summarize_infos
+from pdf_dc.thumbnails import THUMBNAIL_PAGES, ThumbnailCache, ThumbnailLoader
+from pdf_dc.search import SearchIndex
+from pdf_dc.jobs import JobRunner, format_progress
+
+# フォルダの一覧をリストに入れる件数（1回の after でまとめて入れ，数万件でも画面を止めない）
+LISTBOX_BATCH = 500
+# 先読みしたPDFの情報を画面に反映する間隔（ミリ秒）
+PREFETCH_POLL_MS = 200
+# サムネイルを描画する作業プロセス数（OCRの処理を妨げないよう少なくする）
+THUMBNAIL_WORKERS = 2
+
+# 分割単位の選択肢（表示順）
+SPLIT_MODES = ("1ページずつ", "Nページごと", "しおりごと")
 
 # --- Popplerパス（必要に応じて書き換えてください。Windowsのみ）---
 POPPLER_PATH = None  # 例: r"C:\tools\poppler-23.11.0\Library\bin"
 
 
-def pdf_page_to_searchable_pdf_page(pdf_path, page_index, lang='jpn+eng'):
-    """
-    1ページ単位で，画像からOCRをかけサーチャブルPDF1ページを一時ファイルとして返す
-    """
-    images = convert_from_path(
-        pdf_path,
-        first_page=page_index+1,
-        last_page=page_index+1,
-        poppler_path=POPPLER_PATH,
-        dpi=300
-    )
-    image = images[0]
-    ocr_text = pytesseract.image_to_string(image, lang=lang)
-    # 一時PDF
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_pdf:
-        width, height = image.size
-        c = canvas.Canvas(tmp_pdf.name, pagesize=(width, height))
-        # 背景画像（PDF元の見た目）
-        c.drawImage(ImageReader(image), 0, 0, width=width, height=height)
-        # 透明テキスト（OCR結果）
-        c.setFont("Helvetica", 10)
-        c.setFillColorRGB(0, 0, 0, alpha=0)  # 透明フォント（不可視でサーチャブルになる）
-        # OCRテキストを下部に一括埋め込み
-        lines = ocr_text.split('\n')
-        y = 30
-        for line in lines:
-            c.drawString(10, y, line)
-            y += 12
-            if y > height - 20: break
-        c.showPage()
-        c.save()
-    return tmp_pdf.name
-
 class PDFToolGUI:
     def __init__(self, root):
         self.root = root
         self.ocr_var_merge = IntVar()
         self.ocr_var_split = IntVar()
+        self.ocr_workers = IntVar(value=DEFAULT_WORKERS)
+        self.ocr_backend = StringVar(value=DEFAULT_PAGE_BACKEND)
+        self.ocr_profile = StringVar(value=DEFAULT_IMAGE_PROFILE)
+        self.ocr_use_cache = IntVar(value=1)
+        self.ocr_skip_text = IntVar(value=1)
+        self.drop_blank = IntVar()
+        self.remember_passwords = IntVar()
+        self.ocr_adaptive_dpi = IntVar()
+        self.ocr_preprocess = IntVar()
+        self.ocr_sidecar = IntVar()
+        self.use_search_index = IntVar()
+        self.profile_jobs = IntVar()
+        self.merge_stream = IntVar()
+        self.merge_incremental = IntVar()
+        self.scan_recursive = IntVar()
+        self.split_mode = StringVar(value=SPLIT_MODES[0])
+        self.split_every = IntVar(value=10)
+        # OCRしない分割の書き出しの並列数（小さなファイルで作業プロセスを起動しないよう既定は1）
+        self.split_workers = IntVar(value=1)
         self.root.title("PDF結合/分割＋OCRツール")
-        self.root.geometry("520x480")
+        self.root.geometry("640x665")
         self.root.configure(bg="#fff")
 
         self.password_cache = {}
+        # 開けたパスワードは文書ごとに実行中だけ記憶する（「パスワードを記憶する」を選んだ場合だけ，
+        # keyring があればOSの資格情報ストアに保存して次回も使う）
+        self.credentials = CredentialStore(persist=False)
+        self.runner = None
+        self.scan_runner = None
+        self.prefetcher = None
+        self.info_cache = None
+        self.pdf_infos = {}      # パス -> scanner.read_pdf_info の結果
+        self.thumbnail_loader = None
+        self.preview_path = None
+        self.preview_images = []  # 表示中のサムネイル（参照を持たないとTkの画像が消える）
+        self.observed_rates = {}  # 前回の処理の実測速度（所要時間の見積もりに使う）
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
         self.mode_frame = Frame(root, bg="#fff")
         self.mode_frame.pack(pady=5)
@@ -70,10 +84,12 @@ class PDFToolGUI:
         self.split_btn = Button(self.mode_frame, text="✂ PDF分割", font=("Meiryo", 10, "bold"), width=20, command=self.show_split_mode)
         self.merge_btn.grid(row=0, column=0, padx=5)
         self.split_btn.grid(row=0, column=1, padx=5)
+        Button(self.mode_frame, text="🔍 検索", font=("Meiryo", 10, "bold"), command=self.search_pages).grid(row=0, column=2, padx=5)
 
         self.merge_frame = Frame(root, bg="#fff")
         self.split_frame = Frame(root, bg="#fff")
 
+        self.setup_progress_frame()
         self.setup_merge_frame()
         self.setup_split_frame()
 
@@ -81,9 +97,6 @@ class PDFToolGUI:
         self.drag_data = {"widget": None, "index": None}
         self.current_mode = None
 
-        self.ocr_var_merge = IntVar()
-        self.ocr_var_split = IntVar()
-
         self.show_merge_mode()
 
     def update_mode_buttons(self, active):
@@ -111,30 +124,155 @@ class PDFToolGUI:
     def setup_merge_frame(self):
         Label(self.merge_frame, text="① PDFが入ったフォルダを選択", font=("Meiryo", 10, "bold"), bg="#fff").pack(pady=10)
         Button(self.merge_frame, text="📂 フォルダ選択", font=("Meiryo", 8, "bold"), command=self.select_folder).pack()
-
-        self.listbox = Listbox(self.merge_frame, selectmode=SINGLE, width=60)
-        self.listbox.pack(pady=10)
+        Checkbutton(self.merge_frame, text="サブフォルダも含める", variable=self.scan_recursive, bg="#fff").pack()
+
+        list_frame = Frame(self.merge_frame, bg="#fff")
+        list_frame.pack(pady=10)
+        self.listbox = Listbox(list_frame, selectmode=SINGLE, width=48)
+        self.listbox.pack(side="left")
+        # 選んだファイルの先頭ページのサムネイル（作業プロセスで描画し，届いたら表示する）
+        preview_frame = Frame(list_frame, bg="#fff")
+        preview_frame.pack(side="left", padx=5)
+        self.preview_labels = [Label(preview_frame, bg="#fff") for _ in range(THUMBNAIL_PAGES)]
+        for label in self.preview_labels:
+            label.pack(side="left", padx=2)
+        self.listbox.bind("<<ListboxSelect>>", lambda e: self.show_preview())
         self.listbox.bind("<Enter>", lambda e: self.listbox.config(cursor="hand2"))
         self.listbox.bind("<Leave>", lambda e: self.listbox.config(cursor=""))
         self.listbox.bind("<ButtonPress-1>", self.on_drag_start)
         self.listbox.bind("<B1-Motion>", self.on_drag_motion)
         self.listbox.bind("<ButtonRelease-1>", self.on_drag_drop)
+        self.scan_label = Label(self.merge_frame, text="", font=("Meiryo", 8), bg="#fff")
+        self.scan_label.pack()
 
         Label(self.merge_frame, text="② 並び順をドラッグで調整 → 結合", font=("Meiryo", 10, "bold"), bg="#fff").pack(pady=10)
 
-        c1 = Checkbutton(self.merge_frame, text="OCR(文字認識)してサーチャブルPDF化", variable=self.ocr_var_merge, bg="#fff")
+        c1 = Checkbutton(self.merge_frame, text="OCR(文字認識)してサーチャブルPDF化", variable=self.ocr_var_merge, bg="#fff",
+                         command=self.show_scan_summary)
         c1.pack()
+        self.setup_ocr_options(self.merge_frame)
+        Checkbutton(self.merge_frame, text="省メモリで結合（ページ数が多い場合）", variable=self.merge_stream, bg="#fff").pack()
+        Checkbutton(self.merge_frame, text="差分結合（前回の結合結果を再利用）", variable=self.merge_incremental, bg="#fff").pack()
         Button(self.merge_frame, text="▶ この順で結合", font=("Meiryo", 8, "bold"), command=self.merge_pdfs, bg="#4CAF50", fg="white").pack(pady=5)
 
     def select_folder(self):
+        """
+        フォルダの走査は作業スレッドで行い，終わったら自然順の一覧を少しずつリストに入れて，
+        ページ数・サイズ・暗号化の有無を作業プロセスで先読みする
+        """
         folder = filedialog.askdirectory(title="PDFが入ったフォルダを選択")
         if not folder: return
-        files = [f for f in os.listdir(folder) if f.lower().endswith(".pdf")]
-        files.sort()
-        self.pdf_paths = [os.path.join(folder, f) for f in files]
+        self.stop_scan()
+        self.pdf_paths = []
+        self.pdf_infos = {}
         self.listbox.delete(0, END)
-        for f in files:
-            self.listbox.insert(END, f)
+        self.show_preview()
+        self.scan_label.config(text="フォルダを調べています…")
+
+        def done(items):
+            if runner is self.scan_runner:
+                self.pdf_paths = [path for path, _, _ in items]
+                self.fill_listbox(runner, folder, items, 0)
+
+        def error(e):
+            if runner is self.scan_runner:
+                self.scan_label.config(text="")
+                messagebox.showerror("エラー", str(e))
+
+        runner = self.scan_runner = JobRunner(self.root, on_done=done, on_error=error)
+        runner.start(lambda folder, recursive, progress, cancel: scan_folder(folder, recursive, cancel),
+                     folder, self.scan_recursive.get() == 1)
+
+    def fill_listbox(self, runner, folder, items, start):
+        # 一度に全件を入れると数万件で画面が止まるため，LISTBOX_BATCH 件ずつ入れて描画の機会を作る
+        if runner is not self.scan_runner:
+            return  # 別のフォルダを選び直した
+        batch = items[start:start + LISTBOX_BATCH]
+        self.listbox.insert(END, *[os.path.relpath(path, folder) for path, _, _ in batch])
+        if start + LISTBOX_BATCH < len(items):
+            self.scan_label.config(text=f"一覧を表示しています… {start + len(batch)}/{len(items)}")
+            self.root.after(1, self.fill_listbox, runner, folder, items, start + LISTBOX_BATCH)
+            return
+        self.show_scan_summary()
+        if items:
+            if self.info_cache is None:
+                self.info_cache = InfoCache()
+            self.prefetcher = InfoPrefetcher(items, cache=self.info_cache, workers=self.ocr_workers.get()).start()
+            self.root.after(PREFETCH_POLL_MS, self.poll_prefetch, self.prefetcher)
+            if self.thumbnail_loader is None:
+                self.thumbnail_loader = ThumbnailLoader(ThumbnailCache(), workers=THUMBNAIL_WORKERS,
+                                                        poppler_path=POPPLER_PATH)
+                self.root.after(PREFETCH_POLL_MS, self.poll_thumbnails)
+
+    def poll_prefetch(self, prefetcher):
+        if prefetcher is not self.prefetcher:
+            return  # 別のフォルダを選び直した
+        infos = prefetcher.poll()
+        if infos:
+            index = {path: i for i, path in enumerate(self.pdf_paths)}
+            for info in infos:
+                self.pdf_infos[info["path"]] = info
+                i = index.get(info["path"])
+                if i is not None and (info["encrypted"] or info["error"]):
+                    # パスワード付きは青，読めないファイルは赤で示す
+                    self.listbox.itemconfig(i, fg="#c00" if info["error"] else "#06c")
+            self.show_scan_summary()
+        if not prefetcher.finished:
+            self.root.after(PREFETCH_POLL_MS, self.poll_prefetch, prefetcher)
+
+    def poll_thumbnails(self):
+        """
+        リストに見えている行のサムネイルを要求し，届いたものを表示する（描画はすべて作業プロセスで行い，
+        ここではPNGをTkの画像にするだけのため，ドラッグでの並べ替えを妨げない）
+        """
+        if self.thumbnail_loader is None:
+            return
+        if self.pdf_paths:
+            first = self.listbox.nearest(0)
+            last = self.listbox.nearest(self.listbox.winfo_height())
+            # 後から要求したものが先に描画されるため，下の行から要求する（選んだ行が最優先）
+            for path in reversed(self.pdf_paths[first:last + 1]):
+                self.thumbnail_loader.request(path, self.password_cache.get(path))
+            if self.preview_path is not None:
+                self.thumbnail_loader.request(self.preview_path, self.password_cache.get(self.preview_path))
+        if self.preview_path in self.thumbnail_loader.poll():
+            self.show_preview()
+        self.root.after(PREFETCH_POLL_MS, self.poll_thumbnails)
+
+    def show_preview(self):
+        selection = self.listbox.curselection()
+        path = self.pdf_paths[selection[0]] if selection and selection[0] < len(self.pdf_paths) else None
+        pngs = self.thumbnail_loader.get(path) if path and self.thumbnail_loader is not None else None
+        self.preview_path = path
+        self.preview_images = [tk.PhotoImage(data=base64.b64encode(png)) for png in pngs or ()]
+        message = "" if path is None else "読み込み中…" if pngs is None else "表示できません" if not pngs else ""
+        for i, label in enumerate(self.preview_labels):
+            if i < len(self.preview_images):
+                label.config(image=self.preview_images[i], text="")
+            else:
+                label.config(image="", text=message if i == 0 else "")
+
+    def show_scan_summary(self):
+        if self.scan_runner is None:
+            return  # フォルダを選ぶ前
+        summary = summarize_infos([self.pdf_infos[path] for path in self.pdf_paths if path in self.pdf_infos],
+                                  len(self.pdf_paths))
+        self.scan_label.config(text=format_scan_summary(summary, ocr=self.ocr_var_merge.get() == 1,
+                                                        workers=self.ocr_workers.get(), rates=self.observed_rates))
+
+    def on_close(self):
+        # 先読みの作業プロセスが残りのファイルを読み終えるのを待たずに終了する
+        self.stop_scan()
+        if self.thumbnail_loader is not None:
+            self.thumbnail_loader.stop()
+        self.root.destroy()
+
+    def stop_scan(self):
+        if self.scan_runner is not None and self.scan_runner.running:
+            self.scan_runner.cancel()
+        if self.prefetcher is not None:
+            self.prefetcher.stop()
+            self.prefetcher = None
 
     def on_drag_start(self, event):
         index = self.listbox.nearest(event.y)
@@ -150,96 +288,303 @@ class PDFToolGUI:
         to_index = widget.nearest(event.y)
         if from_index is None or to_index is None or from_index == to_index: return
         text = widget.get(from_index)
+        color = widget.itemcget(from_index, "fg")
         widget.delete(from_index)
         widget.insert(to_index, text)
+        if color:
+            widget.itemconfig(to_index, fg=color)
         widget.select_set(to_index)
-        self.pdf_paths[from_index], self.pdf_paths[to_index] = self.pdf_paths[to_index], self.pdf_paths[from_index]
+        # リストと同じく，移動した1件だけを差し込む（入れ替えにするとリストの表示と結合順がずれる）
+        self.pdf_paths.insert(to_index, self.pdf_paths.pop(from_index))
         self.drag_data = {"widget": None, "index": None}
 
-    def get_pdf_reader(self, path):
-        reader = PdfReader(path)
-        if reader.is_encrypted:
-            cached = self.password_cache.get(path)
-            if cached and reader.decrypt(cached) != 0:
-                return reader
-            while True:
-                pwd = simpledialog.askstring("パスワード要求", f"{os.path.basename(path)} のパスワードを入力：", show="*")
+    def ask_password(self, path, retry, others=0):
+        if retry:
+            messagebox.showerror("パスワードエラー", f"パスワードが正しくありません: {os.path.basename(path)}")
+        prompt = f"{os.path.basename(path)} のパスワードを入力："
+        if others:
+            prompt += f"\n（パスワードの分からない残り{others}ファイルにも試します）"
+        return simpledialog.askstring("パスワード要求", prompt, show="*")
+
+    def unlock_inputs(self, paths, on_unlocked):
+        """
+        処理の前に暗号化された入力をまとめて調べ，分からないパスワードだけを先に尋ねる（処理中には尋ねない）
+        調べるのは作業スレッドで行い（数の多い暗号化PDFでも画面を止めない），パスワードの入力欄だけをメインスレッドで出す。
+        入力したパスワードは，まだ開けていない全ファイルに並列に試す。すべて開けたら on_unlocked() をメインスレッドで呼ぶ
+        """
+        if self.runner is not None and self.runner.running:
+            messagebox.showwarning("実行中", "前の処理が終わるまでお待ちください")
+            return
+        workers = self.ocr_workers.get()
+
+        def unlock(paths, progress, cancel):
+            locked = prescan(paths, credentials=self.credentials, password_cache=self.password_cache,
+                             workers=workers, cancel=cancel)["locked"]
+            retry = False
+            while locked:
+                pwd = runner.call_in_ui(self.ask_password, locked[0], retry, len(locked) - 1)
                 if not pwd:
-                    raise Exception(f"{os.path.basename(path)} の読み込みを中止しました")
-                if reader.decrypt(pwd) != 0:
-                    self.password_cache[path] = pwd
-                    return reader
-                else:
-                    messagebox.showerror("パスワードエラー", f"パスワードが正しくありません: {os.path.basename(path)}")
-        return reader
+                    return False
+                opened = try_password(locked, pwd, credentials=self.credentials, password_cache=self.password_cache,
+                                      workers=workers, cancel=cancel)
+                retry = locked[0] not in opened
+                locked = [path for path in locked if path not in opened]
+            return True
+
+        def done(unlocked):
+            self.set_busy(False)
+            if unlocked:
+                on_unlocked()
+
+        def error(e):
+            self.set_busy(False)
+            messagebox.showerror("エラー", str(e))
+
+        runner = self.runner = JobRunner(self.root, on_done=done, on_error=error,
+                                         on_cancel=lambda: self.set_busy(False))
+        self.set_busy(True)
+        self.progress_label.config(text="パスワード付きのファイルを調べています…")
+        runner.start(unlock, list(paths))
+
+    def reader_options(self):
+        return {"password_cache": self.password_cache, "ask_password": self.ask_password, "credentials": self.credentials}
+
+    def job_reader_options(self):
+        # 作業スレッドからのパスワード問い合わせはメインスレッドでダイアログを出す
+        ask = lambda path, retry: self.runner.call_in_ui(self.ask_password, path, retry)
+        return {"password_cache": self.password_cache, "ask_password": ask, "credentials": self.credentials}
+
+    def get_pdf_reader(self, path):
+        return core.open_reader(path, **self.reader_options())
 
     def merge_pdfs(self):
         if not self.pdf_paths:
             messagebox.showwarning("警告", "まずPDFを含むフォルダを選択してください")
             return
+        if self.merge_incremental.get() == 1 and self.sidecar_format():
+            # 差分結合は単語の位置の索引（サイドカー）を作れない（CLIの --incremental と --sidecar も同時に指定できない）
+            messagebox.showwarning("警告", "差分結合と単語の位置の書き出しは同時に使えません。どちらかのチェックを外してください")
+            return
 
         save_path = filedialog.asksaveasfilename(defaultextension=".pdf", filetypes=[("PDF files", "*.pdf")], title="結合後のPDFファイルを保存")
         if not save_path: return
 
         ocr = self.ocr_var_merge.get() == 1
+        paths = list(self.pdf_paths)
 
-        try:
-            writer = PdfWriter()
-            tempfiles = []
-            for path in self.pdf_paths:
-                reader = self.get_pdf_reader(path)
-                for i, page in enumerate(reader.pages):
-                    if ocr:
-                        # 各ページOCR化（サーチャブルPDFページを一時生成してPyPDF2で読込）
-                        temp_pdf = pdf_page_to_searchable_pdf_page(path, i)
-                        tempfiles.append(temp_pdf)
-                        ocr_reader = PdfReader(temp_pdf)
-                        writer.add_page(ocr_reader.pages[0])
-                    else:
-                        writer.add_page(page)
-            with open(save_path, "wb") as f:
-                writer.write(f)
-            for tf in tempfiles:
-                try:
-                    os.unlink(tf)
-                except:
-                    pass
+        def done(summary):
+            reused = f"\n（前回から変わっていない{summary['reused_files']}ファイルを再利用）" if summary.get("reused_files") else ""
+            reused += self.dropped_text(summary)
             if ocr:
-                messagebox.showinfo("完了", f"{len(self.pdf_paths)}ファイルをOCRサーチャブル結合しました。")
+                messagebox.showinfo("完了", f"{len(paths)}ファイルをOCRサーチャブル結合しました。" + reused + self.ocr_summary(summary))
             else:
-                messagebox.showinfo("完了", f"{len(self.pdf_paths)}ファイルを結合しました。")
-        except Exception as e:
-            messagebox.showerror("エラー", str(e))
+                messagebox.showinfo("完了", f"{len(paths)}ファイルを結合しました。" + reused)
+
+        def start():
+            engine = self.create_ocr_engine() if ocr else None
+            if self.merge_incremental.get() == 1:
+                self.run_job(merge_incremental, paths, save_path, ocr=ocr, engine=engine, on_done=done,
+                             trace=save_path + ".trace.json",
+                             skip_text=self.ocr_skip_text.get() == 1, drop_blank=self.drop_blank.get() == 1,
+                             search_index=self.open_search_index(), **self.job_reader_options())
+                return
+            self.run_job(core.merge, paths, save_path, ocr=ocr, engine=engine, on_done=done, trace=save_path + ".trace.json",
+                         skip_text=self.ocr_skip_text.get() == 1, stream=self.merge_stream.get() == 1,
+                         drop_blank=self.drop_blank.get() == 1, sidecar=self.sidecar_format(), search_index=self.open_search_index(), **self.job_reader_options())
+
+        self.unlock_inputs(paths, start)
 
     def setup_split_frame(self):
         Label(self.split_frame, text="分割したいページ範囲（例：1,3,5-7）", font=("Meiryo", 8), bg="#fff").pack(pady=5)
         self.page_range_entry = tk.Entry(self.split_frame, width=30)
         self.page_range_entry.pack(pady=5)
 
+        mode_frame = Frame(self.split_frame, bg="#fff")
+        mode_frame.pack()
+        Label(mode_frame, text="分割単位", font=("Meiryo", 8), bg="#fff").pack(side="left")
+        OptionMenu(mode_frame, self.split_mode, *SPLIT_MODES).pack(side="left")
+        Label(mode_frame, text="N =", font=("Meiryo", 8), bg="#fff").pack(side="left")
+        tk.Spinbox(mode_frame, from_=1, to=10000, width=6, textvariable=self.split_every).pack(side="left", padx=5)
+        Label(mode_frame, text="書き出しの並列数", font=("Meiryo", 8), bg="#fff").pack(side="left")
+        tk.Spinbox(mode_frame, from_=1, to=max(64, DEFAULT_WORKERS), width=4, textvariable=self.split_workers).pack(side="left", padx=5)
+
         Label(self.split_frame, text="分割したいPDFを選択", font=("Meiryo", 10, "bold"), bg="#fff").pack(pady=10)
         Button(self.split_frame, text="📄 PDF選択（複数可）", font=("Meiryo", 8, "bold"), command=self.split_pdfs).pack(pady=5)
         c2 = Checkbutton(self.split_frame, text="分割時ページごとにOCR(サーチャブルPDF化)", variable=self.ocr_var_split, bg="#fff")
         c2.pack()
+        self.setup_ocr_options(self.split_frame)
+
+    def setup_ocr_options(self, parent):
+        frame = Frame(parent, bg="#fff")
+        frame.pack()
+        Label(frame, text="並列数（1で逐次処理）", font=("Meiryo", 8), bg="#fff").pack(side="left")
+        tk.Spinbox(frame, from_=1, to=max(64, DEFAULT_WORKERS), width=4, textvariable=self.ocr_workers).pack(side="left", padx=5)
+        Label(frame, text="出力方式", font=("Meiryo", 8), bg="#fff").pack(side="left")
+        OptionMenu(frame, self.ocr_backend, *PAGE_BACKEND_NAMES).pack(side="left")
+        Checkbutton(frame, text="キャッシュ", variable=self.ocr_use_cache, bg="#fff").pack(side="left")
+        frame2 = Frame(parent, bg="#fff")
+        frame2.pack()
+        Label(frame2, text="画像の圧縮", font=("Meiryo", 8), bg="#fff").pack(side="left")
+        OptionMenu(frame2, self.ocr_profile, *IMAGE_PROFILES).pack(side="left")
+        Checkbutton(frame2, text="テキストのあるページはOCRせずそのまま使う", variable=self.ocr_skip_text, bg="#fff").pack(side="left")
+        frame3 = Frame(parent, bg="#fff")
+        frame3.pack()
+        Checkbutton(frame3, text="解像度を自動調整", variable=self.ocr_adaptive_dpi, bg="#fff").pack(side="left")
+        Checkbutton(frame3, text="傾き補正・余白除去・2値化してOCR", variable=self.ocr_preprocess, bg="#fff").pack(side="left")
+        Checkbutton(frame3, text="単語の位置をJSONで保存", variable=self.ocr_sidecar, bg="#fff").pack(side="left")
+        Checkbutton(frame3, text="検索索引に登録", variable=self.use_search_index, bg="#fff").pack(side="left")
+        frame4 = Frame(parent, bg="#fff")
+        frame4.pack()
+        Checkbutton(frame4, text="白紙のページを除く", variable=self.drop_blank, bg="#fff").pack(side="left")
+        Checkbutton(frame4, text="パスワードを記憶する", variable=self.remember_passwords, bg="#fff",
+                    command=lambda: self.credentials.set_persist(self.remember_passwords.get() == 1)).pack(side="left")
+        Checkbutton(frame4, text="処理時間を段階ごとに計測（トレースを出力）", variable=self.profile_jobs, bg="#fff").pack(side="left")
+
+    def setup_progress_frame(self):
+        # 両モード共通の進捗表示（ウィンドウ下端）
+        frame = Frame(self.root, bg="#fff")
+        frame.pack(side="bottom", fill="x", padx=10, pady=5)
+        self.progressbar = ttk.Progressbar(frame, maximum=100)
+        self.progressbar.pack(fill="x")
+        row = Frame(frame, bg="#fff")
+        row.pack(fill="x")
+        self.progress_label = Label(row, text="", font=("Meiryo", 8), bg="#fff")
+        self.progress_label.pack(side="left")
+        self.cancel_btn = Button(row, text="キャンセル", font=("Meiryo", 8), state="disabled", command=self.cancel_job)
+        self.cancel_btn.pack(side="right")
+
+    def show_progress(self, info):
+        self.progressbar["value"] = info["done"] / info["total"] * 100 if info["total"] else 0
+        self.progress_label.config(text=format_progress(info))
+
+    def set_busy(self, busy):
+        state = "disabled" if busy else "normal"
+        self.merge_btn.config(state=state)
+        self.split_btn.config(state=state)
+        self.cancel_btn.config(state="normal" if busy else "disabled")
+        if not busy:
+            self.progressbar["value"] = 0
+            self.progress_label.config(text="")
+
+    def cancel_job(self):
+        if self.runner is not None and self.runner.running:
+            self.cancel_btn.config(state="disabled")
+            self.progress_label.config(text="中止しています…")
+            self.runner.cancel()
+
+    def run_job(self, func, *args, engine=None, on_done=None, trace=None, **kwargs):
+        """
+        func（core.merge / core.split）を作業スレッドで実行し，終わったら on_done(summary) をメインスレッドで呼ぶ
+        trace: 計測する場合のトレース（Chromeの形式）の書き出し先
+        """
+        search_index = kwargs.get("search_index")
+        if self.profile_jobs.get() == 1:
+            func = profiled(func, trace=trace, trace_format="chrome")
+
+        def close_cache():
+            if engine is not None and engine.cache is not None:
+                engine.cache.close()
+            if search_index is not None:
+                search_index.close()
+
+        if self.runner is not None and self.runner.running:
+            close_cache()
+            messagebox.showwarning("実行中", "前の処理が終わるまでお待ちください")
+            return
+
+        def finish():
+            close_cache()
+            self.set_busy(False)
+
+        def done(summary):
+            finish()
+            self.remember_rate(summary, engine)
+            on_done(summary)
+            if "profile_table" in summary:
+                self.show_profile(summary)
+
+        def error(e):
+            finish()
+            messagebox.showerror("エラー", str(e))
+
+        def cancelled():
+            finish()
+            messagebox.showinfo("中止", "処理を中止しました。")
+
+        self.runner = JobRunner(self.root, on_progress=self.show_progress, on_done=done, on_error=error, on_cancel=cancelled)
+        self.set_busy(True)
+        self.runner.start(func, *args, engine=engine, **kwargs)
+
+    def remember_rate(self, summary, engine):
+        # 実測の処理速度を次の見積もりに使う（OCRは作業プロセス1つあたり）
+        pages, seconds = summary.get("pages"), summary.get("seconds")
+        if not pages or not seconds or summary.get("reused_files"):
+            return
+        if engine is None:
+            self.observed_rates["merge"] = pages / seconds
+        else:
+            self.observed_rates["ocr"] = pages / seconds / max(1, engine.workers)
+
+    def create_ocr_engine(self):
+        # OCR・画像処理のライブラリは読み込みに時間がかかるため，OCRを使う処理を始めるときに読み込む
+        from pdf_dc.cache import OcrCache
+        from pdf_dc.engine import OcrEngine
+        cache = OcrCache() if self.ocr_use_cache.get() == 1 else None
+        return OcrEngine(workers=self.ocr_workers.get(), poppler_path=POPPLER_PATH, backend=self.ocr_backend.get(),
+                         cache=cache, profile=self.ocr_profile.get(), adaptive_dpi=self.ocr_adaptive_dpi.get() == 1,
+                         preprocess=PREPROCESS_STEPS if self.ocr_preprocess.get() == 1 else ())
+
+    def open_search_index(self):
+        # 出力ページのテキストを全文検索索引に登録する（処理の終了時に run_job が閉じる）
+        return SearchIndex() if self.use_search_index.get() == 1 else None
+
+    def show_profile(self, summary):
+        # 段階ごとの計測結果の表（等幅フォントで表示）
+        window = tk.Toplevel(self.root)
+        window.title("処理時間の計測結果")
+        text = tk.Text(window, width=100, height=16, font=("MS Gothic", 9))
+        text.pack(fill="both", expand=True)
+        text.insert("1.0", summary["profile_table"])
+        if summary.get("trace"):
+            text.insert("end", f"\n\nトレース: {summary['trace']}（chrome://tracing・Perfettoで表示できます）")
+        text.config(state="disabled")
+
+    def search_pages(self):
+        query = simpledialog.askstring("検索", "探す語（空白区切りですべてを含むページ）", parent=self.root)
+        if not query:
+            return
+        search_index = SearchIndex()
+        try:
+            results = search_index.search(query, limit=20)
+        finally:
+            search_index.close()
+        if not results:
+            messagebox.showinfo("検索", f"「{query}」を含むページは見つかりませんでした。")
+            return
+        lines = [f"{os.path.basename(r['path'])} {r['page']}ページ: {r['snippet']}" for r in results]
+        messagebox.showinfo("検索", "\n".join(lines))
+
+    def sidecar_format(self):
+        # OCRしたページの単語の位置を，出力PDFと同じ名前の .words.json に書き出す
+        return "json" if self.ocr_sidecar.get() == 1 else None
+
+    def ocr_summary(self, summary):
+        # 完了メッセージに付けるページ判定結果とキャッシュの利用状況
+        text = ""
+        if summary.get("decisions"):
+            text += "\n" + summarize_decisions(summary["decisions"], summary["seconds_saved"], basename=os.path.basename)
+        if "cache_hits" in summary:
+            text += f"\n（キャッシュ: ヒット{summary['cache_hits']}ページ / ミス{summary['cache_misses']}ページ）"
+        return text
+
+    def dropped_text(self, summary):
+        # 除いた白紙のページ数（白紙を除いた場合のみ）
+        if not summary.get("dropped_pages"):
+            return ""
+        return f"\n（白紙の{len(summary['dropped_pages'])}ページを除きました）"
 
     def parse_page_ranges(self, page_range_str, total_pages):
-        pages = set()
-        parts = page_range_str.split(",")
-        for part in parts:
-            part = part.strip()
-            if "-" in part:
-                try:
-                    start, end = map(int, part.split("-"))
-                    pages.update(range(max(1, start), min(total_pages, end)+1))
-                except:
-                    continue
-            else:
-                try:
-                    p = int(part)
-                    if 1 <= p <= total_pages:
-                        pages.add(p)
-                except:
-                    continue
-        return sorted(p - 1 for p in pages)  # 0-indexed
+        return core.parse_page_ranges(page_range_str, total_pages)
 
     def split_pdfs(self):
         input_files = filedialog.askopenfilenames(filetypes=[("PDF files", "*.pdf")], title="分割したいPDFファイルを選択")
@@ -249,41 +594,27 @@ class PDFToolGUI:
         page_range_str = self.page_range_entry.get().strip()
         ocr = self.ocr_var_split.get() == 1
 
-        try:
-            total_split_files = 0
-            tempfiles = []
-            for path in input_files:
-                base_name = os.path.splitext(os.path.basename(path))[0]
-                reader = self.get_pdf_reader(path)
-                total_pages = len(reader.pages)
-                pages = self.parse_page_ranges(page_range_str, total_pages) if page_range_str else list(range(total_pages))
-                for i in pages:
-                    writer = PdfWriter()
-                    if ocr:
-                        temp_pdf = pdf_page_to_searchable_pdf_page(path, i)
-                        tempfiles.append(temp_pdf)
-                        ocr_reader = PdfReader(temp_pdf)
-                        writer.add_page(ocr_reader.pages[0])
-                    else:
-                        writer.add_page(reader.pages[i])
-                    out_path = os.path.join(output_dir, f"{base_name}_{i+1}.pdf")
-                    with open(out_path, "wb") as f:
-                        writer.write(f)
-                total_split_files += len(pages)
-            for tf in tempfiles:
-                try:
-                    os.unlink(tf)
-                except:
-                    pass
+        def done(summary):
+            total_split_files = summary["pages"]
             if ocr:
-                messagebox.showinfo("完了", f"{len(input_files)}ファイル、合計{total_split_files}ページをOCRサーチャブルPDFとして分割しました。")
+                messagebox.showinfo("完了", f"{len(input_files)}ファイル、合計{total_split_files}ページをOCRサーチャブルPDFとして{len(summary['outputs'])}ファイルに分割しました。" + self.dropped_text(summary) + self.ocr_summary(summary))
             else:
-                messagebox.showinfo("完了", f"{len(input_files)}ファイル、合計{total_split_files}ページに分割しました。")
-        except Exception as e:
-            messagebox.showerror("エラー", str(e))
+                messagebox.showinfo("完了", f"{len(input_files)}ファイル、合計{total_split_files}ページを{len(summary['outputs'])}ファイルに分割しました。" + self.dropped_text(summary))
+
+        def start():
+            engine = self.create_ocr_engine() if ocr else None
+            mode = SPLIT_MODES.index(self.split_mode.get())
+            self.run_job(core.split, input_files, output_dir, page_ranges=page_range_str, ocr=ocr, engine=engine,
+                         on_done=done, trace=os.path.join(output_dir, "pdf_dc_trace.json"), skip_text=self.ocr_skip_text.get() == 1,
+                         every=self.split_every.get() if mode == 1 else None, by_bookmark=mode == 2,
+                         drop_blank=self.drop_blank.get() == 1, workers=self.split_workers.get(), sidecar=self.sidecar_format(), search_index=self.open_search_index(),
+                         **self.job_reader_options())
+
+        self.unlock_inputs(input_files, start)
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # PyInstaller --onefile でのプロセス並列用
     root = Tk()
     app = PDFToolGUI(root)
     root.mainloop()
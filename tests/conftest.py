@@ -0,0 +1,108 @@
+"""
+テスト用のPDFの作成（reportlabで文字・画像を描いたPDFを一時フォルダに作る）と，
+pdftoppm・tesseract を使わずにOCRの流れを通すための差し替え
+"""
+import io
+import os
+
+import pytest
+from PIL import Image
+from PyPDF2 import PdfReader, PdfWriter
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+
+@pytest.fixture
+def make_pdf(tmp_path):
+    """
+    make_pdf(name, texts, password=None, image=False) -> パス
+    texts: ページごとの文字列（1ページに1行），image: 真なら全ページに同じ画像（共有リソース）を描く
+    """
+    logo = Image.new("RGB", (64, 64), (200, 30, 30))
+
+    def make(name, texts, password=None, image=False):
+        path = os.path.join(tmp_path, name)
+        c = canvas.Canvas(path)
+        for text in texts:
+            c.drawString(72, 720, text)
+            if image:
+                c.drawImage(ImageReader(logo), 72, 600, 64, 64)
+            c.showPage()
+        c.save()
+        if password:
+            reader = PdfReader(path)
+            writer = PdfWriter()
+            for page in reader.pages:
+                writer.add_page(page)
+            writer.encrypt(password)
+            with open(path, "wb") as f:
+                writer.write(f)
+        return path
+
+    return make
+
+
+@pytest.fixture
+def page_texts():
+    """
+    page_texts(path, password=None) -> ページごとの文字列のリスト
+    """
+    def texts(path, password=None):
+        reader = PdfReader(path)
+        if password:
+            reader.decrypt(password)
+        return [page.extract_text().strip() for page in reader.pages]
+
+    return texts
+
+
+def fake_ocr_page(backend, image, path=None, page=None, **options):
+    # 「ファイル名:ページ番号」を書いたページ（invariant で作成日時などを入れず，同じ入力なら同じbytesになる）
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=image.size, invariant=1)
+    c.drawString(10, 10, f"{os.path.basename(path)}:{page + 1}")
+    c.showPage()
+    c.save()
+    return buf.getvalue()
+
+
+def _open_with(pdf_path, userpw):
+    # pdftoppm と同じく，パスワードが合わなければ失敗する
+    reader = PdfReader(pdf_path)
+    if reader.is_encrypted and reader.decrypt(userpw or "") == 0:
+        raise RuntimeError(f"{os.path.basename(pdf_path)}: Incorrect password")
+    return reader
+
+
+@pytest.fixture
+def fake_ocr(monkeypatch):
+    """
+    画像化（convert_from_path・pdfinfo_from_path）とOCRページの作成（make_ocr_page）を差し替える
+    画像化の呼び出しを (ファイル名, 最初のページ, 最後のページ, パスワード) のリストで返す
+    （作業プロセスは fork で起動するため，差し替えはそのまま引き継がれる）
+    """
+    from pdf_dc import engine, raster, streaming
+    renders = []
+
+    def convert_from_path(pdf_path, dpi=200, first_page=1, last_page=None, output_folder=None, paths_only=False,
+                          userpw=None, **_):
+        reader = _open_with(pdf_path, userpw)
+        last_page = last_page or len(reader.pages)
+        renders.append((os.path.basename(pdf_path), first_page, last_page, userpw))
+        images = [Image.new("L", (60, 80), 255) for _ in range(first_page, last_page + 1)]
+        if not paths_only:
+            return images
+        paths = []
+        for number, image in zip(range(first_page, last_page + 1), images):
+            paths.append(os.path.join(output_folder, f"page-{number:05d}.png"))
+            image.save(paths[-1])
+        return paths
+
+    def pdfinfo_from_path(pdf_path, userpw=None, **_):
+        return {"Pages": len(_open_with(pdf_path, userpw).pages)}
+
+    monkeypatch.setattr(raster, "convert_from_path", convert_from_path)
+    monkeypatch.setattr(streaming, "pdfinfo_from_path", pdfinfo_from_path)
+    monkeypatch.setattr(engine, "make_ocr_page", fake_ocr_page)
+    monkeypatch.setattr(streaming, "make_ocr_page", fake_ocr_page)
+    return renders
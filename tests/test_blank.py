@@ -0,0 +1,28 @@
+from PIL import Image, ImageDraw
+
+from pdf_dc.blank import BLANK_DPI, ink_stats, is_blank_image, is_blank_stats
+
+
+def _page(dpi=BLANK_DPI, color=255):
+    return Image.new("L", (int(8.27 * dpi), int(11.69 * dpi)), color)
+
+
+def test_plain_and_tinted_paper_are_blank():
+    assert is_blank_image(_page())
+    assert is_blank_image(_page(color=200))
+
+
+def test_text_is_not_blank():
+    image = _page()
+    ImageDraw.Draw(image).rectangle((100, 100, 300, 120), fill=0)
+    coverage, stddev = ink_stats(image)
+    assert coverage > 0
+    assert not is_blank_stats(coverage, stddev)
+    assert not is_blank_image(image)
+
+
+def test_high_dpi_image_is_reduced():
+    image = _page(dpi=BLANK_DPI * 4)
+    ImageDraw.Draw(image).rectangle((400, 400, 1200, 480), fill=0)
+    assert not is_blank_image(image, dpi=BLANK_DPI * 4)
+    assert is_blank_image(_page(dpi=BLANK_DPI * 4), dpi=BLANK_DPI * 4)
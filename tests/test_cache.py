@@ -0,0 +1,53 @@
+from pdf_dc import cache as cache_module
+from pdf_dc.cache import OcrCache, file_digest, iter_cached_pages
+from pdf_dc.ocr import _finish_page, read_page_pdf, text_layer_pdf
+from pdf_dc.sidecar import page_pdf_text
+
+
+def _ocr_page(words):
+    # 見えないテキスト（日本語はCIDフォント）と単語の位置を持つOCRページ
+    return _finish_page(read_page_pdf(text_layer_pdf(words, 200, 200)), words)
+
+
+def test_page_pdf_text_uses_recognized_words():
+    page_pdf = _ocr_page([["請求", 10, 10, 40, 22, 90], ["書", 40, 10, 52, 22, 90], ["No.1", 60, 10, 90, 22, 90]])
+    assert page_pdf_text(page_pdf) == "請求書 No.1"
+
+
+def test_iter_cached_pages_counts_each_page_once(tmp_path, make_pdf):
+    path = make_pdf("a.pdf", ["1", "2"])
+    cache = OcrCache(str(tmp_path / "cache.sqlite3"))
+    key_for = lambda p, i: cache.page_key(p, i, 300, "jpn", "fpdf")
+    pages = [(path, 0), (path, 1)]
+    ocr_misses = lambda misses: (_ocr_page([["見積", 0, 0, 10, 10, 90]]) for _ in misses)
+    ocr_one = lambda p, i: _ocr_page([["見積", 0, 0, 10, 10, 90]])
+
+    assert len(list(iter_cached_pages(cache, pages, key_for, ocr_misses, ocr_one))) == 2
+    assert cache.summary() == {"cache_hits": 0, "cache_misses": 2}
+    assert cache.get(key_for(path, 0))[1] == "見積"
+
+    cache = OcrCache(cache.path)
+    list(iter_cached_pages(cache, pages, key_for, ocr_misses, ocr_one))
+    assert cache.summary() == {"cache_hits": 2, "cache_misses": 0}
+    cache.close()
+
+
+def test_evicted_after_contains_is_a_miss(tmp_path, make_pdf):
+    path = make_pdf("a.pdf", ["1"])
+    cache = OcrCache(str(tmp_path / "cache.sqlite3"))
+    key = cache.page_key(path, 0, 300, "jpn", "fpdf")
+    cache.put(key, _ocr_page([]), "")
+    assert cache.contains(key)
+    with cache._conn:
+        cache._conn.execute("DELETE FROM pages")
+    assert cache.get(key) is None
+    assert cache.summary() == {"cache_hits": 0, "cache_misses": 1}
+    cache.close()
+
+
+def test_file_digest_memo_is_bounded(make_pdf):
+    path = make_pdf("a.pdf", ["1"])
+    digest = file_digest(path)
+    make_pdf("a.pdf", ["2"])
+    assert file_digest(path) != digest
+    assert cache_module._digest.cache_info().maxsize == cache_module.DIGEST_MEMO_SIZE
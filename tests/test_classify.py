@@ -0,0 +1,41 @@
+from PyPDF2 import PdfReader
+
+from pdf_dc.classify import BLANK, EMPTY, OCR, TEXT, PageDecisionLog, classify_page, format_page_list
+
+
+def test_classify_text_image_and_empty_pages(make_pdf):
+    text = make_pdf("text.pdf", ["この行は二十文字以上のテキストレイヤーを持つページです"])
+    image = make_pdf("image.pdf", [""], image=True)
+    empty = make_pdf("empty.pdf", [""])
+    decision, chars, coverage = classify_page(PdfReader(text).pages[0])
+    assert decision == TEXT and chars >= 20 and coverage == 0
+    decision, chars, coverage = classify_page(PdfReader(image).pages[0])
+    assert decision == OCR and chars == 0 and 0 < coverage < 1
+    assert classify_page(PdfReader(empty).pages[0])[0] == EMPTY
+
+
+def test_short_text_over_an_image_is_ocr(make_pdf):
+    # 画像の上の数文字（スキャンのページ番号など）だけでは「テキストあり」にしない
+    page = PdfReader(make_pdf("scan.pdf", ["p.1"], image=True)).pages[0]
+    assert classify_page(page)[0] == OCR
+    assert classify_page(page, min_chars=3)[0] == TEXT
+
+
+def test_format_page_list():
+    assert format_page_list([0, 1, 2, 4, 6, 7]) == "1-3,5,7-8"
+    assert format_page_list([]) == ""
+
+
+def test_decision_log_summary(make_pdf):
+    path = make_pdf("mixed.pdf", ["この行は二十文字以上のテキストレイヤーを持つページです", "", ""], image=True)
+    log = PageDecisionLog()
+    for i, page in enumerate(PdfReader(path).pages):
+        log.classify(path, i, page)
+    assert [d["decision"] for d in log.as_dicts()] == [TEXT, OCR, OCR]
+    log.mark(path, 2, BLANK)
+    assert (log.count(OCR), log.count(BLANK)) == (1, 1)
+    log.ocr_seconds = 4.0
+    assert log.estimated_seconds_saved() == 8.0
+    text = log.summary_text(basename=lambda p: "mixed.pdf")
+    assert text.splitlines()[0] == "OCR 1ページ / テキストあり 1ページ / 空白 0ページ / 白紙 1ページ"
+    assert "mixed.pdf: text 1 / ocr 2 / blank 3" in text
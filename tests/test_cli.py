@@ -0,0 +1,31 @@
+import os
+
+from pdf_dc.cli import EXIT_ERROR, EXIT_NO_INPUT, EXIT_OK, EXIT_PASSWORD, expand_inputs, main
+
+
+def test_expand_inputs_natural_order(make_pdf, tmp_path):
+    for name in ("scan_10.pdf", "scan_2.pdf", "scan_1.pdf"):
+        make_pdf(name, ["x"])
+    (tmp_path / "note.txt").write_text("x")
+    names = [os.path.basename(path) for path in expand_inputs([str(tmp_path)])]
+    assert names == ["scan_1.pdf", "scan_2.pdf", "scan_10.pdf"]
+    names = [os.path.basename(path) for path in expand_inputs([str(tmp_path / "scan_*.pdf"), str(tmp_path)])]
+    assert names == ["scan_1.pdf", "scan_2.pdf", "scan_10.pdf"]
+
+
+def test_ocr_command_uses_password(make_pdf, page_texts, fake_ocr, tmp_path):
+    locked = make_pdf("locked.pdf", ["a"], password="pw")
+    out_dir = str(tmp_path / "out")
+    assert main(["ocr", locked, "--output-dir", out_dir, "--no-cache"]) == EXIT_PASSWORD
+    assert main(["ocr", locked, "--output-dir", out_dir, "--no-cache", "--password", "pw"]) == EXIT_OK
+    assert page_texts(os.path.join(out_dir, "locked_ocr.pdf")) == ["locked.pdf:1"]
+
+
+def test_missing_input_exit_codes(make_pdf, tmp_path):
+    out = str(tmp_path / "out.pdf")
+    assert main(["merge", "-o", out, str(tmp_path / "none_*.pdf")]) == EXIT_NO_INPUT
+    assert main(["watch", str(tmp_path / "no_folder"), "--merge-into", out]) == EXIT_NO_INPUT
+    # 入力以外のファイル（パスワードファイルなど）が無いのは処理中のエラー
+    plain = make_pdf("plain.pdf", ["a"])
+    missing = str(tmp_path / "no_passwords.txt")
+    assert main(["merge", "-o", out, plain, "--password-file", missing]) == EXIT_ERROR
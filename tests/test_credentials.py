@@ -0,0 +1,102 @@
+import shutil
+
+from PyPDF2 import PdfReader
+
+from pdf_dc import core, credentials
+from pdf_dc.credentials import KEYRING_SERVICE, CredentialStore, document_id, prescan, try_password
+from pdf_dc.engine import OcrEngine
+
+
+def test_ocr_passes_password_to_rasterizer(make_pdf, page_texts, fake_ocr, tmp_path):
+    plain = make_pdf("plain.pdf", ["a", "b"])
+    locked = make_pdf("locked.pdf", ["c", "d"], password="pw")
+    out = str(tmp_path / "out.pdf")
+    core.merge([plain, locked], out, ocr=True, engine=OcrEngine(workers=1), skip_text=False, skip_blank=False,
+               passwords=["pw"])
+    assert page_texts(out) == ["plain.pdf:1", "plain.pdf:2", "locked.pdf:1", "locked.pdf:2"]
+    assert [(name, password) for name, _, _, password in fake_ocr] == [("plain.pdf", None), ("locked.pdf", "pw")]
+
+    out_dir = tmp_path / "split"
+    out_dir.mkdir()
+    summary = core.split([locked], str(out_dir), ocr=True, engine=OcrEngine(workers=1), skip_text=False,
+                         skip_blank=False, passwords=["pw"])
+    assert [page_texts(path) for path in summary["outputs"]] == [["locked.pdf:1"], ["locked.pdf:2"]]
+
+    summary = core.ocr([locked], output_dir=str(out_dir), passwords=["pw"])
+    assert page_texts(summary["outputs"][0]) == ["locked.pdf:1", "locked.pdf:2"]
+    assert fake_ocr[-1][-1] == "pw"
+
+
+class FakeKeyring:
+    # keyring と同じ関数だけを持つ，辞書に保存する資格情報ストア
+    def __init__(self):
+        self.saved = {}
+
+    def get_password(self, service, name):
+        return self.saved.get((service, name))
+
+    def set_password(self, service, name, password):
+        self.saved[(service, name)] = password
+
+    def delete_password(self, service, name):
+        del self.saved[(service, name)]
+
+
+class BrokenKeyring(FakeKeyring):
+    # 資格情報ストアが使えない環境（ロックされている・バックエンドが無いなど）
+    def get_password(self, service, name):
+        raise RuntimeError("no backend")
+
+    set_password = delete_password = get_password
+
+
+def test_prescan_in_parallel(make_pdf):
+    paths = [make_pdf("plain.pdf", ["a"]), make_pdf("a.pdf", ["b"], password="pw"),
+             make_pdf("b.pdf", ["c"], password="pw"), make_pdf("c.pdf", ["d"], password="other")]
+    cache = {}
+    result = prescan(paths, ["wrong", "pw"], password_cache=cache, workers=2)
+    assert result["encrypted"] == paths[1:]
+    assert result["unlocked"] == paths[1:3]
+    assert result["locked"] == paths[3:]
+    assert cache == {paths[1]: "pw", paths[2]: "pw"}
+    assert try_password(result["locked"], "other", password_cache=cache, workers=2) == paths[3:]
+    assert cache[paths[3]] == "other"
+
+
+def test_remembers_by_document_id(make_pdf, tmp_path, monkeypatch):
+    monkeypatch.setattr(credentials, "keyring", FakeKeyring())
+    path = make_pdf("scan.pdf", ["a"], password="pw")
+    store = CredentialStore()
+    result = prescan([path], ["pw"], credentials=store, workers=1)
+    doc_id = result["doc_ids"][path]
+    assert doc_id and credentials.keyring.saved == {(KEYRING_SERVICE, doc_id): "pw"}
+
+    # 名前を変えて別のフォルダに移しても，次の実行（新しい CredentialStore）で keyring から見つかる
+    moved = tmp_path / "moved"
+    moved.mkdir()
+    renamed = str(moved / "renamed.pdf")
+    shutil.copy(path, renamed)
+    cache = {}
+    result = prescan([renamed], credentials=CredentialStore(), password_cache=cache, workers=1)
+    assert result["unlocked"] == [renamed]
+    assert cache == {renamed: "pw"}
+    assert document_id(PdfReader(renamed)) == doc_id
+
+
+def test_memory_only_without_keyring(make_pdf, monkeypatch):
+    path = make_pdf("scan.pdf", ["a"], password="pw")
+    for backend in (None, BrokenKeyring()):
+        monkeypatch.setattr(credentials, "keyring", backend)
+        store = CredentialStore(persist=True)
+        assert prescan([path], ["pw"], credentials=store, workers=1)["unlocked"] == [path]
+        # 同じ実行の中では記憶したパスワードで開ける
+        assert prescan([path], credentials=store, workers=1)["unlocked"] == [path]
+        assert prescan([path], credentials=CredentialStore(persist=True), workers=1)["locked"] == [path]
+
+    monkeypatch.setattr(credentials, "keyring", FakeKeyring())
+    store = CredentialStore(persist=False)
+    prescan([path], ["pw"], credentials=store, workers=1)
+    assert credentials.keyring.saved == {}
+    store.set_persist(True)
+    store.set("doc", "secret")
+    assert credentials.keyring.saved == {(KEYRING_SERVICE, "doc"): "secret"}
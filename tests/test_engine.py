@@ -0,0 +1,20 @@
+import multiprocessing
+import os
+
+import pytest
+
+from pdf_dc.engine import OcrEngine
+from pdf_dc.ocr import read_page_pdf
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork",
+                    reason="差し替えた画像化・OCRを作業プロセスに引き継ぐには fork が必要")
+def test_parallel_output_matches_serial(make_pdf, fake_ocr):
+    a = make_pdf("a.pdf", [str(i) for i in range(7)])
+    b = make_pdf("b.pdf", [str(i) for i in range(5)])
+    pages = [(a, i) for i in range(7)] + [(b, 4), (b, 0), (b, 1)] + [(a, 2)]
+    serial = list(OcrEngine(workers=1, batch_size=3).ocr_pages(pages))
+    parallel = list(OcrEngine(workers=2, batch_size=3).ocr_pages(pages))
+    assert [read_page_pdf(page).extract_text().strip() for page in serial] == [
+        f"{os.path.basename(path)}:{i + 1}" for path, i in pages]
+    assert parallel == serial
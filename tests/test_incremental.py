@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+from pdf_dc.core import merge
+from pdf_dc.incremental import manifest_path, merge_incremental
+
+
+@pytest.fixture
+def inputs(make_pdf):
+    return [make_pdf("a.pdf", ["a1", "a2", "a3"]), make_pdf("b.pdf", ["b1", "b2"]), make_pdf("c.pdf", ["c1"])]
+
+
+def _check(paths, out, page_texts, tmp_path, **options):
+    summary = merge_incremental(paths, str(out), **options)
+    full = tmp_path / "full.pdf"
+    merge(paths, str(full), **options)
+    assert page_texts(out) == page_texts(full)
+    return summary
+
+
+def test_first_run_writes_manifest(inputs, page_texts, tmp_path):
+    out = tmp_path / "out.pdf"
+    summary = _check(inputs, out, page_texts, tmp_path)
+    assert summary["reused_files"] == 0 and summary["processed_files"] == 3
+    assert os.path.exists(manifest_path(str(out)))
+
+
+def test_unchanged_inputs_keep_output(inputs, page_texts, tmp_path):
+    out = tmp_path / "out.pdf"
+    merge_incremental(inputs, str(out))
+    before = os.stat(out).st_mtime_ns
+    summary = _check(inputs, out, page_texts, tmp_path)
+    assert summary["reused_files"] == 3 and summary["processed_files"] == 0
+    assert os.stat(out).st_mtime_ns == before
+
+
+def test_added_input(inputs, make_pdf, page_texts, tmp_path):
+    out = tmp_path / "out.pdf"
+    merge_incremental(inputs[:2], str(out))
+    summary = _check(inputs, out, page_texts, tmp_path)
+    assert summary["reused_files"] == 2 and summary["processed_files"] == 1
+
+
+def test_changed_input(inputs, make_pdf, page_texts, tmp_path):
+    out = tmp_path / "out.pdf"
+    merge_incremental(inputs, str(out))
+    make_pdf("b.pdf", ["B1", "B2", "B3"])
+    summary = _check(inputs, out, page_texts, tmp_path)
+    assert summary["reused_files"] == 2 and summary["processed_files"] == 1
+    assert page_texts(out) == ["a1", "a2", "a3", "B1", "B2", "B3", "c1"]
+
+
+def test_reordered_and_removed_inputs(inputs, page_texts, tmp_path):
+    out = tmp_path / "out.pdf"
+    merge_incremental(inputs, str(out))
+    summary = _check([inputs[2], inputs[0]], out, page_texts, tmp_path)
+    assert summary["reused_files"] == 2 and summary["processed_files"] == 0
+    assert page_texts(out) == ["c1", "a1", "a2", "a3"]
+
+
+def test_page_ranges(inputs, make_pdf, page_texts, tmp_path):
+    out = tmp_path / "out.pdf"
+    merge_incremental(inputs[:2], str(out), page_ranges="1,3")
+    summary = _check(inputs, out, page_texts, tmp_path, page_ranges="1,3")
+    assert summary["reused_files"] == 2
+    assert page_texts(out) == ["a1", "a3", "b1", "c1"]
+
+
+def test_changed_options_rebuild(inputs, page_texts, tmp_path):
+    out = tmp_path / "out.pdf"
+    merge_incremental(inputs, str(out))
+    summary = _check(inputs, out, page_texts, tmp_path, page_ranges="2")
+    assert summary["reused_files"] == 0
+
+
+def test_renamed_input_is_reused(inputs, page_texts, tmp_path):
+    out = tmp_path / "out.pdf"
+    merge_incremental(inputs, str(out))
+    renamed = str(tmp_path / "renamed.pdf")
+    os.rename(inputs[1], renamed)
+    summary = _check([inputs[0], renamed, inputs[2]], out, page_texts, tmp_path)
+    assert summary["reused_files"] == 3
+
+
+def test_encrypted_input(make_pdf, page_texts, tmp_path):
+    paths = [make_pdf("a.pdf", ["a1"]), make_pdf("s.pdf", ["s1", "s2"], password="pw")]
+    out = tmp_path / "out.pdf"
+    merge_incremental(paths[:1], str(out))
+    summary = _check(paths, out, page_texts, tmp_path, passwords=["pw"])
+    assert summary["processed_files"] == 1
+    assert page_texts(out) == ["a1", "s1", "s2"]
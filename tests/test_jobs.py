@@ -0,0 +1,125 @@
+import threading
+import time
+
+import pytest
+
+from pdf_dc.core import Cancelled, check_cancel
+from pdf_dc.jobs import JobRunner, ProgressTracker, format_progress
+
+
+class FakeWidget:
+    """
+    Tkの after() の代わりに呼び出しを溜め，pump() でメインスレッドとして順に実行する
+    """
+
+    def __init__(self):
+        self.pending = []
+
+    def after(self, ms, func, *args):
+        self.pending.append((func, args))
+
+    def pump(self, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while self.pending:
+            assert time.monotonic() < deadline, "処理が終わりません"
+            func, args = self.pending.pop(0)
+            func(*args)
+            time.sleep(0.001)
+
+
+def _runner(widget, events):
+    return JobRunner(widget, on_progress=lambda info: events.append(("progress", info["done"])),
+                     on_done=lambda result: events.append(("done", result)),
+                     on_error=lambda e: events.append(("error", e)),
+                     on_cancel=lambda: events.append(("cancel",)), poll_ms=1)
+
+
+def test_done_after_progress():
+    widget, events = FakeWidget(), []
+    release = threading.Event()
+
+    def work(pages, progress, cancel):
+        release.wait()
+        for done in range(1, pages + 1):
+            progress(done, pages)
+        return {"pages": pages}
+
+    runner = _runner(widget, events)
+    runner.start(work, 3)
+    assert runner.running
+    with pytest.raises(RuntimeError):
+        runner.start(work, 3)
+    release.set()
+    widget.pump()
+    # 溜まった進捗は最新の1件だけ，終了の通知はその後に届く
+    assert events[-2:] == [("progress", 3), ("done", {"pages": 3})]
+    assert not runner.running
+
+
+def test_error_is_reported():
+    widget, events = FakeWidget(), []
+
+    def work(progress, cancel):
+        raise ValueError("壊れたPDF")
+
+    _runner(widget, events).start(work)
+    widget.pump()
+    [(kind, error)] = events
+    assert kind == "error" and str(error) == "壊れたPDF"
+
+
+def test_cancel_stops_the_job():
+    widget, events = FakeWidget(), []
+    started = threading.Event()
+
+    def work(progress, cancel):
+        started.set()
+        while True:
+            check_cancel(cancel)
+            time.sleep(0.001)
+
+    runner = _runner(widget, events)
+    runner.start(work)
+    started.wait()
+    runner.cancel()
+    widget.pump()
+    assert events == [("cancel",)]
+
+
+def test_cancelled_error_is_not_an_error():
+    widget, events = FakeWidget(), []
+
+    def work(progress, cancel):
+        raise Cancelled("中止しました")
+
+    _runner(widget, events).start(work)
+    widget.pump()
+    assert events == [("cancel",)]
+
+
+def test_call_in_ui_runs_on_the_polling_thread():
+    widget, events = FakeWidget(), []
+    runner = _runner(widget, events)
+    main = threading.get_ident()
+
+    def ask(path):
+        if path == "bad.pdf":
+            raise LookupError(path)
+        return threading.get_ident()
+
+    def work(progress, cancel):
+        with pytest.raises(LookupError):
+            runner.call_in_ui(ask, "bad.pdf")
+        return runner.call_in_ui(ask, "a.pdf")
+
+    runner.start(work)
+    widget.pump()
+    assert events == [("done", main)]
+
+
+def test_format_progress():
+    assert format_progress({"done": 3, "total": 10, "pages_per_second": 1.5, "eta_seconds": 125.0}) == \
+        "3/10ページ  1.5ページ/秒  残り約2分05秒"
+    info = ProgressTracker().describe(0, 10)
+    assert info["eta_seconds"] is None
+    assert format_progress(info) == "0/10ページ  0.0ページ/秒"
@@ -0,0 +1,59 @@
+import io
+import re
+
+from PyPDF2 import PdfReader
+
+from pdf_dc.core import merge, open_reader
+from pdf_dc.mergewriter import StreamingPdfWriter
+
+
+def _write(readers):
+    buf = io.BytesIO()
+    writer = StreamingPdfWriter(buf)
+    for reader in readers:
+        for page in reader.pages:
+            writer.add_page(page)
+        writer.release(reader)
+    writer.close()
+    return buf.getvalue()
+
+
+def test_round_trip_keeps_pages_and_text(make_pdf):
+    a = make_pdf("a.pdf", ["a1", "a2"])
+    b = make_pdf("b.pdf", ["b1"])
+    data = _write([PdfReader(a), PdfReader(b)])
+    reader = PdfReader(io.BytesIO(data), strict=True)
+    assert len(reader.pages) == 3
+    assert [page.extract_text().strip() for page in reader.pages] == ["a1", "a2", "b1"]
+
+
+def test_shared_resources_are_written_once(make_pdf):
+    path = make_pdf("logo.pdf", [f"p{i}" for i in range(5)], image=True)
+    data = _write([PdfReader(path)])
+    assert len(re.findall(rb"/Subtype\s*/Image", data)) == 1
+    reader = PdfReader(io.BytesIO(data))
+    images = {page["/Resources"]["/XObject"].raw_get(name).idnum
+              for page in reader.pages for name in page["/Resources"]["/XObject"]}
+    assert len(images) == 1
+
+
+def test_empty_writer_is_valid_pdf():
+    buf = io.BytesIO()
+    StreamingPdfWriter(buf).close()
+    assert len(PdfReader(io.BytesIO(buf.getvalue())).pages) == 0
+
+
+def test_encrypted_input(make_pdf):
+    path = make_pdf("secret.pdf", ["s1", "s2"], password="pw")
+    data = _write([open_reader(path, passwords=["pw"])])
+    reader = PdfReader(io.BytesIO(data))
+    assert not reader.is_encrypted
+    assert [page.extract_text().strip() for page in reader.pages] == ["s1", "s2"]
+
+
+def test_stream_merge_matches_merge(make_pdf, page_texts, tmp_path):
+    paths = [make_pdf("a.pdf", ["a1", "a2", "a3"]), make_pdf("b.pdf", ["b1"], password="pw")]
+    options = {"page_ranges": "1,3", "passwords": ["pw"]}
+    merge(paths, str(tmp_path / "plain.pdf"), **options)
+    merge(paths, str(tmp_path / "stream.pdf"), stream=True, **options)
+    assert page_texts(tmp_path / "stream.pdf") == page_texts(tmp_path / "plain.pdf") == ["a1", "a3", "b1"]
@@ -0,0 +1,23 @@
+from reportlab import rl_config
+
+from pdf_dc import core
+from pdf_dc.engine import OcrEngine
+from pdf_dc.ocr import text_layer_pdf
+
+
+def test_text_layer_is_binary_and_keeps_reportlab_setting():
+    before = rl_config.useA85
+    data = text_layer_pdf([], 100, 100)
+    assert b"ASCII85Decode" not in data
+    assert rl_config.useA85 == before
+
+
+def test_ocr_pages_keep_their_content(make_pdf, page_texts, fake_ocr, tmp_path):
+    # ページごとに作って捨てる reader の id() が使い回されても，前のページの中身と取り違えない
+    path = make_pdf("scan.pdf", [str(i) for i in range(100)])
+    expected = [f"scan.pdf:{i}" for i in range(1, 101)]
+    out = str(tmp_path / "merged.pdf")
+    core.merge([path], out, ocr=True, engine=OcrEngine(workers=1), skip_text=False, skip_blank=False)
+    assert page_texts(out) == expected
+    summary = core.ocr([path], output_dir=str(tmp_path), chunk_pages=30)
+    assert page_texts(summary["outputs"][0]) == expected
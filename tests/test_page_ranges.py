@@ -0,0 +1,22 @@
+import pytest
+
+from pdf_dc.core import parse_page_ranges, select_pages
+
+
+@pytest.mark.parametrize("spec, expected", [
+    ("1", [0]),
+    ("1,3,5-7", [0, 2, 4, 5, 6]),
+    ("3-1", []),
+    (" 2 , 4 - 5 ", [1, 3, 4]),
+    ("5-7,6,1", [0, 4, 5, 6]),      # 重複は1つにし，昇順に並べる
+    ("0,11,8-20", [7, 8, 9]),       # 範囲外は切り詰める・無視する
+    ("x,2-y,3", [2]),               # 不正な指定は無視する
+    ("", []),
+])
+def test_parse_page_ranges(spec, expected):
+    assert parse_page_ranges(spec, 10) == expected
+
+
+def test_select_pages_defaults_to_all_pages():
+    assert select_pages("", 3) == [0, 1, 2]
+    assert select_pages("2", 3) == [1]
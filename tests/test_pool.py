@@ -0,0 +1,27 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from pdf_dc.pool import LOOKAHEAD_PER_WORKER, submit_bounded
+
+
+def test_results_in_task_order():
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        assert list(submit_bounded(executor, lambda n: n * n, range(20), 3)) == [n * n for n in range(20)]
+
+
+def test_bounded_and_cancelled_when_closed():
+    started = []
+    release = threading.Event()
+
+    def work(n):
+        started.append(n)
+        release.wait()
+        return n
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        results = submit_bounded(executor, work, range(100), 1)
+        release.set()
+        assert next(results) == 0
+        results.close()
+    # 先に渡すのは並列数の LOOKAHEAD_PER_WORKER 倍までで，閉じたら残りは実行しない
+    assert len(started) <= 1 + LOOKAHEAD_PER_WORKER
@@ -0,0 +1,61 @@
+import random
+
+import numpy as np
+import pytest
+from PIL import Image
+from PyPDF2 import PdfReader
+
+from benchmarks.corpus import make_text_image
+from pdf_dc.preprocess import (MAX_SKEW_ANGLE, check_steps, choose_dpi, native_dpi, ocr_variant, otsu_threshold,
+                               page_dpis, prepare_for_ocr, unwarp_words)
+
+
+def test_deskew_crop_binarize():
+    image, _ = make_text_image(random.Random(0), dpi=100, skew=2.0)
+    prepared, angle, box = prepare_for_ocr(image, ("deskew", "crop", "binarize"), dpi=100)
+    assert angle == pytest.approx(-2.0)
+    # 余白を除いた範囲だけが残り，白と黒の2値になる
+    left, top, right, bottom = box
+    assert prepared.size == (right - left, bottom - top)
+    assert prepared.width < image.width and prepared.height < image.height
+    assert set(np.unique(np.asarray(prepared))) == {0, 255}
+
+
+def test_straight_page_is_not_rotated():
+    image, _ = make_text_image(random.Random(1), dpi=100)
+    prepared, angle, box = prepare_for_ocr(image, ("deskew",), dpi=100)
+    assert angle == 0.0 and box is None
+    assert prepared.size == image.size
+
+
+def test_no_steps_returns_the_image():
+    image = Image.new("L", (40, 40), 255)
+    assert prepare_for_ocr(image) == (image, 0.0, None)
+    assert otsu_threshold(np.asarray(image)) == -1
+
+
+def test_unwarp_words_restores_crop_offset():
+    words = [{"text": "a", "left": 10, "top": 20, "width": 30, "height": 8}]
+    assert unwarp_words(words, 0.0, None, (200, 200)) is words
+    [word] = unwarp_words(words, 0.0, (5, 7, 150, 150), (200, 200))
+    assert (word["left"], word["top"], word["width"], word["height"]) == (15, 27, 30, 8)
+    # 回転を戻した単語は元の単語を囲む（幅・高さが広がる）
+    [word] = unwarp_words(words, MAX_SKEW_ANGLE, None, (200, 200))
+    assert word["width"] > 30 and word["height"] > 8
+
+
+def test_dpi_follows_embedded_image(make_pdf):
+    # テスト用の画像は64pxを64pt（約0.89インチ）に描くため72dpi相当
+    path = make_pdf("scan.pdf", ["", ""], image=True)
+    assert native_dpi(PdfReader(path).pages[0]) == pytest.approx(72)
+    assert page_dpis(path, [0, 1], 300, min_dpi=150) == {0: 150, 1: 150}
+    assert choose_dpi(None, 300) == 300
+    assert choose_dpi(600, 300) == 300
+    assert choose_dpi(240.4, 300) == 240
+
+
+def test_variant_and_steps():
+    assert ocr_variant() == ()
+    assert ocr_variant(True, 200, ("crop", "deskew")) == ("auto200", "deskew", "crop")
+    with pytest.raises(ValueError):
+        check_steps(("sharpen",))
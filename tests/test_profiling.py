@@ -0,0 +1,88 @@
+import json
+import time
+
+import pytest
+
+from pdf_dc import profiling
+from pdf_dc.profiling import Profiler, profiled, stage
+
+
+def test_stage_does_nothing_without_profiler():
+    assert not profiling.active()
+    with stage("render", page=0) as event:
+        event["bytes_out"] = 10
+    assert profiling.current() is None
+
+
+def test_nested_stages():
+    with Profiler() as profiler:
+        assert profiling.current() is profiler
+        with stage("compose", path="a.pdf", page=2) as event:
+            event["bytes_out"] = 100
+            with stage("recognize"):
+                time.sleep(0.01)
+    assert not profiling.active()
+    recognize, compose = profiler.events
+    # 内側の段階は外側のファイル名・ページ番号を引き継ぐ
+    assert (recognize["stage"], recognize["path"], recognize["page"]) == ("recognize", "a.pdf", 2)
+    assert compose["child_wall"] == recognize["wall"]
+    rows = {row["stage"]: row for row in profiler.summary()}
+    assert rows["compose"]["bytes_out"] == 100
+    assert rows["compose"]["self"] == pytest.approx(compose["wall"] - recognize["wall"])
+    assert "compose" in profiler.table() and "全体" in profiler.table()
+
+
+def test_memory_peak():
+    with Profiler(memory=True) as profiler:
+        with stage("render"):
+            data = bytearray(4 * 1024 * 1024)
+            del data
+    [event] = profiler.events
+    assert event["peak_memory"] >= 4 * 1024 * 1024
+
+
+def test_trace_formats(tmp_path):
+    with Profiler() as profiler:
+        with stage("write", path="out.pdf"):
+            pass
+    with open(profiler.write(str(tmp_path / "trace.json"), "json"), encoding="utf-8") as f:
+        data = json.load(f)
+    assert [event["stage"] for event in data["events"]] == ["write"]
+    assert data["summary"][0]["count"] == 1
+    chrome = profiler.trace("chrome")
+    [event] = chrome["traceEvents"]
+    assert (event["name"], event["ph"], event["args"]["path"]) == ("write", "X", "out.pdf")
+    assert "wall" not in event["args"] and event["dur"] >= 0
+    with pytest.raises(ValueError):
+        profiler.trace("csv")
+
+
+def test_worker_events_are_drained():
+    with Profiler() as parent:
+        options = profiling.worker_options()
+        assert options == {"memory": False}
+        # 作業プロセスの代わりに，同じプロセスで作業側の計測を始めて取り出す
+        profiling.start_worker(options)
+        worker = profiling.current()
+        with stage("recognize", page=0):
+            pass
+        events = profiling.drain_worker()
+        assert profiling.drain_worker() == []
+        worker.stop()
+        parent.add(events)
+    assert [event["stage"] for event in parent.events] == ["recognize"]
+    assert profiling.drain_worker() == []
+
+
+def test_profiled_adds_summary(tmp_path):
+    def work(name):
+        with stage("read", path=name):
+            pass
+        return {"inputs": [name]}
+
+    summary = profiled(work, trace=str(tmp_path / "trace.json"))("a.pdf")
+    assert summary["inputs"] == ["a.pdf"]
+    assert summary["profile"][0]["stage"] == "read"
+    assert "read" in summary["profile_table"]
+    with open(summary["trace"], encoding="utf-8") as f:
+        assert "traceEvents" in json.load(f)
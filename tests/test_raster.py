@@ -0,0 +1,15 @@
+import pytest
+
+from pdf_dc.raster import iter_page_runs
+
+
+@pytest.mark.parametrize("pages, batch_size, expected", [
+    ([0, 1, 2, 5, 6], 8, [[0, 1, 2], [5, 6]]),
+    ([0, 1, 2, 3, 4], 2, [[0, 1], [2, 3], [4]]),
+    ([3, 2, 1], 8, [[3], [2], [1]]),       # 並び順は保持する（逆順は連続とみなさない）
+    ([4, 4], 8, [[4], [4]]),
+    ([], 8, []),
+    ([7], 1, [[7]]),
+])
+def test_iter_page_runs(pages, batch_size, expected):
+    assert list(iter_page_runs(pages, batch_size)) == expected
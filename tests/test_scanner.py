@@ -0,0 +1,37 @@
+import os
+
+from pdf_dc.scanner import natural_key, read_pdf_info, scan_folder
+
+
+def test_natural_key_orders_numbers_by_value():
+    names = ["scan_10.pdf", "scan_2.pdf", "Scan_1.pdf", "scan_2a.pdf", "a.pdf"]
+    assert sorted(names, key=natural_key) == ["a.pdf", "Scan_1.pdf", "scan_2.pdf", "scan_2a.pdf", "scan_10.pdf"]
+
+
+def test_natural_key_compares_each_number():
+    assert sorted(["v1.10.pdf", "v1.9.pdf", "v1.2.pdf"], key=natural_key) == ["v1.2.pdf", "v1.9.pdf", "v1.10.pdf"]
+
+
+def test_scan_folder(make_pdf, tmp_path):
+    for name in ("10.pdf", "2.pdf", "1.PDF"):
+        make_pdf(name, ["x"])
+    (tmp_path / "note.txt").write_text("x")
+    os.makedirs(tmp_path / "sub" / "inner")
+    os.makedirs(tmp_path / ".hidden")
+    make_pdf(os.path.join("sub", "3.pdf"), ["x"])
+    make_pdf(os.path.join(".hidden", "4.pdf"), ["x"])
+
+    names = [os.path.relpath(path, tmp_path) for path, _, _ in scan_folder(str(tmp_path))]
+    assert names == ["1.PDF", "2.pdf", "10.pdf"]
+    names = [os.path.relpath(path, tmp_path) for path, _, _ in scan_folder(str(tmp_path), recursive=True)]
+    assert names == ["1.PDF", "2.pdf", "10.pdf", os.path.join("sub", "3.pdf")]
+
+
+def test_read_pdf_info(make_pdf, tmp_path):
+    info = read_pdf_info(make_pdf("a.pdf", ["1", "2", "3"]))
+    assert (info["pages"], info["encrypted"], info["error"]) == (3, False, None)
+    info = read_pdf_info(make_pdf("s.pdf", ["1"], password="pw"))
+    assert (info["pages"], info["encrypted"]) == (None, True)
+    broken = tmp_path / "broken.pdf"
+    broken.write_bytes(b"not a pdf")
+    assert read_pdf_info(str(broken))["error"]
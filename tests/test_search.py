@@ -0,0 +1,55 @@
+import pytest
+
+from pdf_dc.search import SearchIndex, words_text
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = SearchIndex(str(tmp_path / "index.sqlite3"))
+    for number, text in enumerate(["請求書 2024年4月分 株式会社サンプル", "見積書 合計 12,000円", "領収書 AB-1"], start=1):
+        index.add_page(str(tmp_path / "out.pdf"), number, text)
+    index.commit(str(tmp_path / "out.pdf"))
+    yield index
+    index.close()
+
+
+def _pages(results):
+    return [result["page"] for result in results]
+
+
+def test_trigram_search(index):
+    assert _pages(index.search("請求書")) == [1]
+    assert _pages(index.search("サンプル 2024")) == [1]
+
+
+def test_two_character_terms(index):
+    # trigramの索引では引けない短い語も見つかる
+    assert _pages(index.search("合計")) == [2]
+    assert _pages(index.search("書")) == [1, 2, 3]
+    assert _pages(index.search("AB")) == [3]
+
+
+def test_short_and_long_terms_are_combined_with_and(index):
+    assert _pages(index.search("合計 見積書")) == [2]
+    assert _pages(index.search("合計 請求書")) == []
+
+
+def test_recommit_replaces_pages(index, tmp_path):
+    index.add_page(str(tmp_path / "out.pdf"), 1, "納品書")
+    index.commit(str(tmp_path / "out.pdf"))
+    assert index.search("請求書") == []
+    assert index.stats() == {"indexed_documents": 1, "indexed_pages": 1}
+
+
+def test_empty_query(index):
+    assert index.search("  ") == []
+
+
+def test_words_text():
+    words = [["請求", 0, 0, 1, 1, 90], ["書", 0, 0, 1, 1, 90], ["No.", 0, 0, 1, 1, 90], ["12", 0, 0, 1, 1, 90]]
+    assert words_text(words) == "請求書 No. 12"
+
+
+def test_short_terms_ignore_ascii_case_and_wildcards(index):
+    assert _pages(index.search("ab")) == [3]
+    assert _pages(index.search("%")) == []
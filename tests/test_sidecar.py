@@ -0,0 +1,61 @@
+import csv
+import io
+import json
+
+import pytest
+from PyPDF2 import PdfReader, PdfWriter
+
+from pdf_dc.sidecar import WORDS_KEY, WordIndex, attach_words, page_pdf_text, pop_words, sidecar_path
+
+WORDS = [["請求書", 72.0, 700.0, 130.5, 712.0, 96], ["2024", 140.0, 700.0, 170.0, 712.0, 88]]
+
+
+def _ocr_page(make_pdf, words):
+    # 単語の位置を持たせたOCRページ（PDFのbytes）
+    writer = PdfWriter()
+    writer.add_page(PdfReader(make_pdf("page.pdf", [""])).pages[0])
+    attach_words(writer.pages[0], words)
+    buf = io.BytesIO()
+    writer.write(buf)
+    return buf.getvalue()
+
+
+def test_words_travel_with_the_page(make_pdf):
+    page_pdf = _ocr_page(make_pdf, WORDS)
+    assert page_pdf_text(page_pdf) == "請求書 2024"
+    page = PdfReader(io.BytesIO(page_pdf)).pages[0]
+    assert pop_words(page) == WORDS
+    # 取り出した後はページに残らない
+    assert WORDS_KEY not in page
+    assert pop_words(page) is None
+
+
+def test_json_round_trip(make_pdf, tmp_path):
+    page = PdfReader(io.BytesIO(_ocr_page(make_pdf, WORDS))).pages[0]
+    index = WordIndex(str(tmp_path / "out.pdf"), "json")
+    index.add(1, page, pop_words(page))
+    index.add(2, page, None)  # OCRしていないページは載せない
+    path = index.write()
+    assert path == sidecar_path(str(tmp_path / "out.pdf"), "json") == str(tmp_path / "out.words.json")
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    assert data["pdf"] == "out.pdf"
+    [entry] = data["pages"]
+    assert entry["page"] == 1 and entry["width"] == float(page.mediabox.width)
+    assert [[w["text"], *w["bbox"], w["conf"]] for w in entry["words"]] == WORDS
+
+
+def test_tsv_round_trip(make_pdf, tmp_path):
+    page = PdfReader(io.BytesIO(_ocr_page(make_pdf, WORDS))).pages[0]
+    index = WordIndex(str(tmp_path / "out.pdf"), "tsv")
+    index.add(3, page, pop_words(page))
+    with open(index.write(), encoding="utf-8", newline="") as f:
+        rows = list(csv.reader(f, delimiter="\t"))
+    assert rows[0] == ["page", "x0", "y0", "x1", "y1", "conf", "text"]
+    assert [[row[6], *map(float, row[1:5]), int(row[5])] for row in rows[1:]] == WORDS
+    assert {row[0] for row in rows[1:]} == {"3"}
+
+
+def test_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        WordIndex(str(tmp_path / "out.pdf"), "xml")
@@ -0,0 +1,68 @@
+import pytest
+from PyPDF2 import PdfReader, PdfWriter
+
+from pdf_dc import core
+from pdf_dc.splitter import bookmark_starts, page_groups, safe_filename
+
+
+@pytest.fixture
+def bookmarked(make_pdf, tmp_path):
+    """
+    6ページ，最上位のしおりは 2ページ目「第1章」・5ページ目「第2章」（第1章の下に下位のしおり）
+    """
+    reader = PdfReader(make_pdf("plain.pdf", [f"p{i}" for i in range(1, 7)]))
+    writer = PdfWriter()
+    for page in reader.pages:
+        writer.add_page(page)
+    chapter = writer.add_outline_item("第1章", 1)
+    writer.add_outline_item("1.1", 2, parent=chapter)
+    writer.add_outline_item("第2章", 4)
+    path = tmp_path / "bookmarked.pdf"
+    with open(path, "wb") as f:
+        writer.write(f)
+    return PdfReader(path)
+
+
+def test_single_pages(make_pdf):
+    reader = PdfReader(make_pdf("a.pdf", ["1", "2", "3"]))
+    assert page_groups(reader, [0, 2]) == [([0], ""), ([2], "")]
+
+
+def test_every(make_pdf):
+    reader = PdfReader(make_pdf("a.pdf", [str(i) for i in range(5)]))
+    assert page_groups(reader, [0, 1, 2, 3, 4], every=2) == [([0, 1], ""), ([2, 3], ""), ([4], "")]
+    # ページ指定で選んだページだけをNページごとにまとめる
+    assert page_groups(reader, [0, 2, 4], every=2) == [([0, 2], ""), ([4], "")]
+
+
+def test_bookmark_starts(bookmarked):
+    assert bookmark_starts(bookmarked) == [(1, "第1章"), (4, "第2章")]
+
+
+def test_by_bookmark(bookmarked):
+    groups = page_groups(bookmarked, list(range(6)), by_bookmark=True)
+    assert groups == [([0], ""), ([1, 2, 3], "第1章"), ([4, 5], "第2章")]
+
+
+def test_by_bookmark_skips_empty_sections(bookmarked):
+    assert page_groups(bookmarked, [4, 5], by_bookmark=True) == [([4, 5], "第2章")]
+
+
+def test_by_bookmark_without_outline(make_pdf):
+    reader = PdfReader(make_pdf("a.pdf", ["1", "2"]))
+    assert page_groups(reader, [0, 1], by_bookmark=True) == [([0, 1], "")]
+
+
+def test_safe_filename():
+    assert safe_filename('第1章: 概要/"まとめ"') == "第1章_概要_まとめ"
+    assert safe_filename("  ") == "untitled"
+
+
+def test_small_split_is_written_in_process(make_pdf, page_texts, tmp_path, monkeypatch):
+    def fail(*args):
+        raise AssertionError("作業プロセスを起動した")
+
+    monkeypatch.setattr(core, "write_parallel", fail)
+    path = make_pdf("small.pdf", ["a", "b", "c"])
+    summary = core.split([path], str(tmp_path), workers=8)
+    assert [page_texts(out) for out in summary["outputs"]] == [["a"], ["b"], ["c"]]
@@ -0,0 +1,81 @@
+import os
+import threading
+
+import pytest
+from PIL import Image
+from PyPDF2 import PdfReader
+
+from conftest import fake_ocr_page
+from pdf_dc.core import Cancelled
+from pdf_dc.streaming import _ChunkWriter, _concat_parts, ocr_pdf
+
+
+def _page(number):
+    return fake_ocr_page("fpdf", Image.new("L", (60, 80), 255), path="doc.pdf", page=number - 1)
+
+
+def _part_pages(parts):
+    return [len(PdfReader(part).pages) for part in parts]
+
+
+def test_chunks_flush_by_page_count(tmp_path):
+    chunks = _ChunkWriter(str(tmp_path), chunk_pages=3, max_memory_bytes=1 << 30)
+    for number in range(1, 8):
+        chunks.add_page(_page(number))
+    chunks.flush()
+    assert _part_pages(chunks.parts) == [3, 3, 1]
+    assert chunks.total_pages == 7
+
+
+def test_chunks_flush_by_memory(tmp_path):
+    size = len(_page(1))
+    chunks = _ChunkWriter(str(tmp_path), chunk_pages=100, max_memory_bytes=size * 2)
+    for number in range(1, 6):
+        chunks.add_page(_page(number))
+    chunks.flush()
+    assert _part_pages(chunks.parts) == [2, 2, 1]
+
+
+def test_concat_parts_keeps_order(tmp_path, page_texts):
+    chunks = _ChunkWriter(str(tmp_path), chunk_pages=2, max_memory_bytes=1 << 30)
+    for number in range(1, 6):
+        chunks.add_page(_page(number))
+    chunks.flush()
+    out = str(tmp_path / "out.pdf")
+    _concat_parts(chunks.parts, out)
+    assert page_texts(out) == [f"doc.pdf:{number}" for number in range(1, 6)]
+
+
+def test_concat_parts_removes_output_on_error(tmp_path):
+    chunks = _ChunkWriter(str(tmp_path), chunk_pages=1, max_memory_bytes=1 << 30)
+    chunks.add_page(_page(1))
+    out = str(tmp_path / "out.pdf")
+    with pytest.raises(FileNotFoundError):
+        _concat_parts(chunks.parts + [str(tmp_path / "missing.pdf")], out)
+    assert not os.path.exists(out)
+
+
+def test_ocr_pdf_in_chunks(make_pdf, page_texts, fake_ocr, tmp_path):
+    src = make_pdf("scan.pdf", [f"p{i}" for i in range(7)])
+    out = str(tmp_path / "out.pdf")
+    progress = []
+    summary = ocr_pdf(src, out, chunk_pages=3, progress=lambda done, total: progress.append((done, total)))
+    assert summary["pages"] == 7
+    assert page_texts(out) == [f"scan.pdf:{number}" for number in range(1, 8)]
+    assert progress[-1] == (7, 7)
+    # 画像化もチャンクの大きさ（batch_size）ごとにまとめて行う
+    assert [(first, last) for _, first, last, _ in fake_ocr] == [(1, 3), (4, 6), (7, 7)]
+
+
+def test_ocr_pdf_cancel_leaves_no_output(make_pdf, fake_ocr, tmp_path):
+    src = make_pdf("scan.pdf", [f"p{i}" for i in range(7)])
+    out = str(tmp_path / "out.pdf")
+    cancel = threading.Event()
+
+    def progress(done, total):
+        if done == 4:
+            cancel.set()
+
+    with pytest.raises(Cancelled):
+        ocr_pdf(src, out, chunk_pages=3, progress=progress, cancel=cancel)
+    assert not os.path.exists(out)
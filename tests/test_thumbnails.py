@@ -0,0 +1,16 @@
+from pdf_dc.thumbnails import ThumbnailCache
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ThumbnailCache(str(tmp_path / "thumbnails.sqlite3"), max_mb=1000 / (1024 * 1024))
+    cache.put("a", [b"x" * 300])
+    cache.put("b", [b"x" * 300])
+    assert cache.get("a") == [b"x" * 300]  # b より後に使った
+    cache.put("c", [b"x" * 300, b"y" * 200])
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    cache.close()
+    # 開き直しても合計サイズは残った分から数える
+    cache = ThumbnailCache(str(tmp_path / "thumbnails.sqlite3"), max_mb=1000 / (1024 * 1024))
+    assert cache._total == 800
+    cache.close()
@@ -0,0 +1,122 @@
+import os
+
+import pytest
+
+from pdf_dc import watch
+from pdf_dc.watch import WatchService, is_complete_pdf
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(watch.time, "monotonic", clock)
+    return clock
+
+
+def _service(folder, **options):
+    return WatchService([str(folder)], action=lambda path, processed: {"outputs": []}, settle_seconds=5,
+                        log=lambda message: None, **options)
+
+
+def _queued(service):
+    return list(service._queue.queue)
+
+
+def test_waits_until_settled(make_pdf, tmp_path, clock):
+    path = os.path.abspath(make_pdf("a.pdf", ["1"]))
+    service = _service(tmp_path)
+    assert service.scan() == 0          # 初めて見たファイル
+    clock.now += 4
+    assert service.scan() == 0          # まだ settle_seconds 経っていない
+    clock.now += 2
+    assert service.scan() == 1
+    assert _queued(service) == [path]
+    clock.now += 10
+    assert service.scan() == 0          # 処理待ちのファイルは入れ直さない
+
+
+def test_change_restarts_settle_time(make_pdf, tmp_path, clock):
+    path = make_pdf("a.pdf", ["1"])
+    service = _service(tmp_path)
+    service.scan()
+    clock.now += 4
+    make_pdf("a.pdf", ["1", "2"])       # 書き込みが続いている
+    assert service.scan() == 0
+    clock.now += 4
+    assert service.scan() == 0
+    clock.now += 2
+    assert service.scan() == 1
+    assert _queued(service) == [os.path.abspath(path)]
+
+
+def test_incomplete_pdf_is_not_queued(tmp_path, clock):
+    path = tmp_path / "partial.pdf"
+    path.write_bytes(b"%PDF-1.7\n1 0 obj\n<<>>\nendobj\n")
+    service = _service(tmp_path)
+    service.scan()
+    clock.now += 10
+    assert service.scan() == 0
+    assert not is_complete_pdf(str(path))
+
+
+def test_eof_with_trailing_whitespace(make_pdf):
+    path = make_pdf("a.pdf", ["1"])
+    with open(path, "ab") as f:
+        f.write(b"\r\n  \n")
+    assert is_complete_pdf(path)
+
+
+def test_processed_and_failed_files_are_skipped(make_pdf, tmp_path, clock):
+    done = os.path.abspath(make_pdf("done.pdf", ["1"]))
+    failed = os.path.abspath(make_pdf("failed.pdf", ["1"]))
+    service = _service(tmp_path)
+    service.processed[done] = watch._signature(done)
+    service.failed[failed] = {"signature": watch._signature(failed), "error": "x"}
+    service.scan()
+    clock.now += 10
+    assert service.scan() == 0
+    make_pdf("failed.pdf", ["1", "2"])  # 置き直されたら処理し直す
+    service.scan()
+    clock.now += 10
+    assert service.scan() == 1
+    assert _queued(service) == [failed]
+
+
+def test_outputs_are_ignored(make_pdf, tmp_path, clock):
+    out = make_pdf("merged.pdf", ["1"])
+    service = _service(tmp_path, outputs=[out])
+    service.scan()
+    clock.now += 10
+    assert service.scan() == 0
+
+
+def test_full_queue_defers_files(make_pdf, tmp_path, clock):
+    paths = [os.path.abspath(make_pdf(f"{i}.pdf", ["1"])) for i in range(3)]
+    service = _service(tmp_path, queue_size=2)
+    service.scan()
+    clock.now += 10
+    assert service.scan() == 2
+    waiting = list(service._ready)
+    assert len(waiting) == 1            # 一杯の間は列の外で待たせる
+    first = service._queue.get_nowait()
+    assert service.scan() == 1
+    assert _queued(service)[-1] == waiting[0]
+    assert sorted([first] + _queued(service)) == sorted(paths)
+
+
+def test_queued_files_survive_restart(make_pdf, tmp_path, clock):
+    path = os.path.abspath(make_pdf("a.pdf", ["1"]))
+    service = _service(tmp_path)
+    service.scan()
+    clock.now += 10
+    service.scan()
+    restarted = _service(tmp_path)
+    assert list(restarted._ready) == [path]